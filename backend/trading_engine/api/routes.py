@@ -1,10 +1,17 @@
 """
 API routes for trading engine
 """
+from typing import Optional
 from fastapi import APIRouter, HTTPException, Response
 from fastapi.responses import JSONResponse
 from alpaca.trading.client import TradingClient
 from config import settings
+from core import (
+    rate_limiter, blocking_adapter, iv_history, get_db_context, SingleFlight, policy_cache,
+    redis_manager, warm_store, loop_scheduler, ProviderRouter, provider_recorder, bar_aggregator,
+    vol_surfaces, CacheKeys, chain_archive, shared_quote_book, http_transport
+)
+from core.models import Watchlist
 import logging
 
 logger = logging.getLogger(__name__)
@@ -27,12 +34,20 @@ trading_client = TradingClient(
     paper=True
 )
 
+async def _alpaca_rate_limit(cost: float = 1.0):
+    """Share the engine's Alpaca budget; reject instead of queueing requests."""
+    granted = await rate_limiter.acquire('alpaca', cost=cost, max_wait=settings.rate_limit_max_wait)
+    if not granted:
+        raise HTTPException(status_code=429, detail="Alpaca rate limit reached, retry shortly")
+
 @router.get("/alpaca/account")
 async def get_alpaca_account():
     """Get real Alpaca account data"""
+    await _alpaca_rate_limit(cost=2)
+    
     try:
-        account = trading_client.get_account()
-        positions = trading_client.get_all_positions()
+        account = await blocking_adapter.run('alpaca', trading_client.get_account)
+        positions = await blocking_adapter.run('alpaca', trading_client.get_all_positions)
         
         return {
             "equity": float(account.equity),
@@ -50,8 +65,10 @@ async def get_alpaca_account():
 @router.get("/alpaca/positions")
 async def get_alpaca_positions():
     """Get all positions from Alpaca"""
+    await _alpaca_rate_limit()
+    
     try:
-        positions = trading_client.get_all_positions()
+        positions = await blocking_adapter.run('alpaca', trading_client.get_all_positions)
         
         return [
             {
@@ -75,3 +92,85 @@ async def get_alpaca_positions():
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
+
+@router.get("/metrics/providers")
+async def provider_metrics():
+    """Executor queue depth, rate limiter, request coalescing and cache counters"""
+    return {
+        "executors": blocking_adapter.get_stats(),
+        "rate_limits": rate_limiter.get_stats(),
+        "single_flight": SingleFlight.get_all_stats(),
+        "quote_providers": ProviderRouter.get_all_stats(),
+        "cache_policy": policy_cache.get_stats(),
+        "l1_cache": redis_manager.get_cache_stats(),
+        "warm_store": warm_store.get_stats(),
+        "chain_archive": chain_archive.get_stats(),
+        "shared_quote_book": shared_quote_book.get_stats(),
+        "http": http_transport.get_stats(),
+        "loops": loop_scheduler.get_stats(),
+        "recorder": provider_recorder.get_stats()
+    }
+
+@router.get("/market/technicals")
+async def get_technicals(symbols: Optional[str] = None, interval: Optional[str] = None):
+    """Intraday RSI, MACD, EMA, ATR and realized volatility (defaults to the active watchlist)"""
+    try:
+        if symbols:
+            requested = [s.strip().upper() for s in symbols.split(',') if s.strip()]
+        else:
+            with get_db_context() as db:
+                rows = db.query(Watchlist.symbol).filter(Watchlist.is_active == True).distinct().all()
+                requested = sorted(row.symbol for row in rows)
+        
+        return {symbol: bar_aggregator.technicals(symbol, interval) for symbol in requested}
+    except Exception as e:
+        logger.error(f"Error fetching technicals: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/market/quotes")
+async def get_live_quotes(symbols: Optional[str] = None, max_age: Optional[float] = None):
+    """Latest streamed quotes from the shared-memory quote book (defaults to every symbol in it)"""
+    # API workers in their own process attach on first use
+    if not shared_quote_book.is_open and not shared_quote_book.attach():
+        raise HTTPException(status_code=503, detail="Shared quote book is not available")
+    
+    if symbols:
+        requested = [s.strip().upper() for s in symbols.split(',') if s.strip()]
+    else:
+        requested = sorted(shared_quote_book.symbols())
+    
+    return {symbol: shared_quote_book.get(symbol, max_age) for symbol in requested}
+
+@router.get("/market/vol-surface/{symbol}")
+async def get_vol_surface(symbol: str):
+    """Fitted volatility smile per expiration (quadratic total variance in log-moneyness)"""
+    surface = vol_surfaces.surface(symbol.upper())
+    if surface is None:
+        raise HTTPException(status_code=404, detail=f"No volatility surface for {symbol.upper()}")
+    return surface
+
+@router.get("/market/iv-rank")
+async def get_iv_rank(symbols: Optional[str] = None):
+    """IV percentile and rank from daily ATM IV history (defaults to the active watchlist)"""
+    try:
+        if symbols:
+            requested = [s.strip().upper() for s in symbols.split(',') if s.strip()]
+        else:
+            with get_db_context() as db:
+                rows = db.query(Watchlist.symbol).filter(Watchlist.is_active == True).distinct().all()
+                requested = sorted(row.symbol for row in rows)
+        
+        return iv_history.summary(requested)
+    except Exception as e:
+        logger.error(f"Error fetching IV rank: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/universe/candidates")
+async def get_universe_candidates(limit: Optional[int] = None):
+    """Ranked watchlist candidates from the last optionable-universe scan"""
+    scan = redis_manager.get(CacheKeys.universe_candidates())
+    if scan is None:
+        raise HTTPException(status_code=404, detail="No universe scan results available")
+    if limit:
+        scan['results'] = scan['results'][:limit]
+    return scan
@@ -16,6 +16,16 @@ class Settings(BaseSettings):
     # Redis
     redis_url: str = Field(..., env='REDIS_URL')
     
+    # In-process L1 cache in front of Redis
+    l1_cache_enabled: bool = Field(default=True, env='L1_CACHE_ENABLED')
+    l1_cache_max_bytes: int = Field(default=64 * 1024 * 1024, env='L1_CACHE_MAX_BYTES')
+    l1_cache_max_entries: int = Field(default=20000, env='L1_CACHE_MAX_ENTRIES')
+    l1_cache_ttl: float = Field(default=30.0, env='L1_CACHE_TTL')
+    l1_cache_prefixes: str = Field(
+        default='market_data:,options_chain,options_snapshot:,news_sentiment:,user_config:',
+        env='L1_CACHE_PREFIXES'
+    )
+    
     # API Keys
     alpaca_api_key: str = Field(..., env='ALPACA_API_KEY')
     alpaca_secret_key: str = Field(..., env='ALPACA_SECRET_KEY')
@@ -23,7 +33,9 @@ class Settings(BaseSettings):
         default='https://paper-api.alpaca.markets',
         env='ALPACA_BASE_URL'
     )
+    alpaca_data_url: str = Field(default='https://data.alpaca.markets', env='ALPACA_DATA_URL')
     polygon_api_key: str = Field(..., env='POLYGON_API_KEY')
+    polygon_base_url: str = Field(default='https://api.polygon.io', env='POLYGON_BASE_URL')
     news_api_key: str = Field(..., env='NEWS_API_KEY')
     
     # Trading Configuration
@@ -50,6 +62,10 @@ class Settings(BaseSettings):
     auto_sell_enabled: bool = Field(default=True, env='AUTO_SELL_ENABLED')
     trailing_stop_enabled: bool = Field(default=False, env='TRAILING_STOP_ENABLED')
     
+    # Loop scheduling outside market hours
+    offhours_position_update_interval: int = Field(default=1800, env='OFFHOURS_POSITION_UPDATE_INTERVAL')
+    offhours_health_check_interval: int = Field(default=1800, env='OFFHOURS_HEALTH_CHECK_INTERVAL')
+    
     # Feature Flags
     enable_auto_trading: bool = Field(default=True, env='ENABLE_AUTO_TRADING')
     enable_news_sentiment: bool = Field(default=True, env='ENABLE_NEWS_SENTIMENT')
@@ -58,6 +74,112 @@ class Settings(BaseSettings):
     alpaca_rate_limit: int = Field(default=200, env='ALPACA_RATE_LIMIT')
     polygon_rate_limit: int = Field(default=5, env='POLYGON_RATE_LIMIT')
     news_api_rate_limit: int = Field(default=1000, env='NEWS_API_RATE_LIMIT')
+    alpaca_rate_burst: int = Field(default=20, env='ALPACA_RATE_BURST')
+    polygon_rate_burst: int = Field(default=5, env='POLYGON_RATE_BURST')
+    news_api_rate_burst: int = Field(default=10, env='NEWS_API_RATE_BURST')
+    rate_limit_max_wait: float = Field(default=2.0, env='RATE_LIMIT_MAX_WAIT')
+    quote_batch_size: int = Field(default=200, env='QUOTE_BATCH_SIZE')
+    
+    # Shared HTTP transport (pooled keep-alive connections for REST calls)
+    http_pool_size: int = Field(default=100, env='HTTP_POOL_SIZE')
+    http_pool_per_host: int = Field(default=20, env='HTTP_POOL_PER_HOST')
+    http_keepalive_timeout: float = Field(default=60.0, env='HTTP_KEEPALIVE_TIMEOUT')
+    http_dns_cache_ttl: int = Field(default=300, env='HTTP_DNS_CACHE_TTL')
+    http_connect_timeout: float = Field(default=5.0, env='HTTP_CONNECT_TIMEOUT')
+    http_timeout: float = Field(default=30.0, env='HTTP_TIMEOUT')
+    
+    # Blocking SDK call executors
+    alpaca_executor_workers: int = Field(default=8, env='ALPACA_EXECUTOR_WORKERS')
+    alpaca_order_executor_workers: int = Field(default=2, env='ALPACA_ORDER_EXECUTOR_WORKERS')
+    polygon_executor_workers: int = Field(default=4, env='POLYGON_EXECUTOR_WORKERS')
+    openai_executor_workers: int = Field(default=4, env='OPENAI_EXECUTOR_WORKERS')
+    sdk_call_timeout: float = Field(default=15.0, env='SDK_CALL_TIMEOUT')
+    sdk_max_queue: int = Field(default=64, env='SDK_MAX_QUEUE')
+    
+    # Quote provider failover
+    quote_hedge_enabled: bool = Field(default=True, env='QUOTE_HEDGE_ENABLED')
+    quote_hedge_default_delay: float = Field(default=0.3, env='QUOTE_HEDGE_DEFAULT_DELAY')
+    quote_hedge_min_delay: float = Field(default=0.05, env='QUOTE_HEDGE_MIN_DELAY')
+    quote_hedge_max_delay: float = Field(default=1.0, env='QUOTE_HEDGE_MAX_DELAY')
+    stock_quote_polygon_reserve: int = Field(default=3, env='STOCK_QUOTE_POLYGON_RESERVE')
+    quote_provider_timeout: float = Field(default=5.0, env='QUOTE_PROVIDER_TIMEOUT')
+    circuit_breaker_failures: int = Field(default=5, env='CIRCUIT_BREAKER_FAILURES')
+    circuit_breaker_cooldown: float = Field(default=30.0, env='CIRCUIT_BREAKER_COOLDOWN')
+    
+    # Provider record/replay (off, record or replay)
+    provider_record_mode: str = Field(default='off', env='PROVIDER_RECORD_MODE')
+    provider_record_path: str = Field(default='data/recordings', env='PROVIDER_RECORD_PATH')
+    provider_replay_file: str = Field(default='', env='PROVIDER_REPLAY_FILE')
+    provider_replay_speed: float = Field(default=1.0, env='PROVIDER_REPLAY_SPEED')
+    
+    # Options Chains
+    options_chain_ttl: int = Field(default=300, env='OPTIONS_CHAIN_TTL')
+    options_chain_full_refresh_interval: int = Field(default=21600, env='OPTIONS_CHAIN_FULL_REFRESH_INTERVAL')
+    options_chain_retention: int = Field(default=86400, env='OPTIONS_CHAIN_RETENTION')
+    options_chain_demand_refresh_interval: int = Field(default=300, env='OPTIONS_CHAIN_DEMAND_REFRESH_INTERVAL')
+    options_chain_strike_margin_pct: float = Field(default=5.0, env='OPTIONS_CHAIN_STRIKE_MARGIN_PCT')
+    options_snapshot_ttl: int = Field(default=15, env='OPTIONS_SNAPSHOT_TTL')
+    options_snapshot_max_dte: int = Field(default=60, env='OPTIONS_SNAPSHOT_MAX_DTE')
+    options_snapshot_strike_range_pct: float = Field(default=20.0, env='OPTIONS_SNAPSHOT_STRIKE_RANGE_PCT')
+    
+    # Quote Streaming
+    enable_quote_streaming: bool = Field(default=False, env='ENABLE_QUOTE_STREAMING')
+    stock_stream_url: str = Field(
+        default='wss://stream.data.alpaca.markets/v2/iex',
+        env='STOCK_STREAM_URL'
+    )
+    option_stream_url: str = Field(
+        default='wss://stream.data.alpaca.markets/v1beta1/indicative',
+        env='OPTION_STREAM_URL'
+    )
+    option_stream_encoding: str = Field(default='msgpack', env='OPTION_STREAM_ENCODING')
+    quote_stream_refresh_interval: int = Field(default=60, env='QUOTE_STREAM_REFRESH_INTERVAL')
+    quote_book_max_age: float = Field(default=5.0, env='QUOTE_BOOK_MAX_AGE')
+    shared_quote_book_enabled: bool = Field(default=True, env='SHARED_QUOTE_BOOK_ENABLED')
+    shared_quote_book_name: str = Field(default='trading_quote_book', env='SHARED_QUOTE_BOOK_NAME')
+    shared_quote_book_capacity: int = Field(default=16384, env='SHARED_QUOTE_BOOK_CAPACITY')
+    
+    # Intraday bars and indicators
+    bar_aggregation_enabled: bool = Field(default=True, env='BAR_AGGREGATION_ENABLED')
+    bar_buffer_size: int = Field(default=390, env='BAR_BUFFER_SIZE')
+    indicator_bar_interval: str = Field(default='5m', env='INDICATOR_BAR_INTERVAL')
+    
+    # Optionable-universe scanner
+    universe_scan_enabled: bool = Field(default=False, env='UNIVERSE_SCAN_ENABLED')
+    universe_scan_interval: int = Field(default=900, env='UNIVERSE_SCAN_INTERVAL')
+    universe_scan_timeout: float = Field(default=240.0, env='UNIVERSE_SCAN_TIMEOUT')
+    universe_scan_page_size: int = Field(default=500, env='UNIVERSE_SCAN_PAGE_SIZE')
+    universe_scan_concurrency: int = Field(default=4, env='UNIVERSE_SCAN_CONCURRENCY')
+    universe_min_price: float = Field(default=10.0, env='UNIVERSE_MIN_PRICE')
+    universe_max_price: float = Field(default=500.0, env='UNIVERSE_MAX_PRICE')
+    universe_min_volume: int = Field(default=1000000, env='UNIVERSE_MIN_VOLUME')
+    universe_max_spread_pct: float = Field(default=0.5, env='UNIVERSE_MAX_SPREAD_PCT')
+    universe_min_hv: float = Field(default=15.0, env='UNIVERSE_MIN_HV')
+    universe_max_hv: float = Field(default=120.0, env='UNIVERSE_MAX_HV')
+    universe_min_iv_rank: float = Field(default=30.0, env='UNIVERSE_MIN_IV_RANK')
+    universe_max_candidates: int = Field(default=50, env='UNIVERSE_MAX_CANDIDATES')
+    
+    # Warm-start cache persistence (market_data_cache table)
+    warm_store_enabled: bool = Field(default=True, env='WARM_STORE_ENABLED')
+    warm_store_flush_interval: int = Field(default=30, env='WARM_STORE_FLUSH_INTERVAL')
+    warm_store_batch_size: int = Field(default=500, env='WARM_STORE_BATCH_SIZE')
+    
+    # Historical Bars
+    bar_store_path: str = Field(default='data/bars', env='BAR_STORE_PATH')
+    
+    # Options chain snapshot archive
+    chain_archive_enabled: bool = Field(default=True, env='CHAIN_ARCHIVE_ENABLED')
+    chain_archive_path: str = Field(default='data/chains', env='CHAIN_ARCHIVE_PATH')
+    chain_archive_flush_interval: int = Field(default=30, env='CHAIN_ARCHIVE_FLUSH_INTERVAL')
+    chain_archive_max_pending: int = Field(default=500, env='CHAIN_ARCHIVE_MAX_PENDING')
+    chain_archive_compress_after_days: int = Field(default=7, env='CHAIN_ARCHIVE_COMPRESS_AFTER_DAYS')
+    
+    # Options Pricing
+    risk_free_rate: float = Field(default=0.045, env='RISK_FREE_RATE')
+    
+    # Implied Volatility History
+    iv_history_window: int = Field(default=252, env='IV_HISTORY_WINDOW')
+    iv_history_min_samples: int = Field(default=20, env='IV_HISTORY_MIN_SAMPLES')
     
     # Logging
     log_level: str = Field(default='INFO', env='LOG_LEVEL')
@@ -96,6 +218,7 @@ class StrategyConfig:
         'min_dte': 7,   # Minimum days to expiration
         'delta_target': 0.30,  # Target delta for short strike
         'spread_width': 5,  # Width of spread in dollars
+        'moneyness': (0.90, 1.00),  # Strike band as a fraction of spot
         'profit_target_pct': 50.0,
         'stop_loss_pct': 100.0,
     }
@@ -108,6 +231,7 @@ class StrategyConfig:
         'min_dte': 14,
         'delta_target': 0.60,
         'spread_width': 5,
+        'moneyness': (0.95, 1.05),
         'profit_target_pct': 100.0,
         'stop_loss_pct': 50.0,
     }
@@ -120,6 +244,7 @@ class StrategyConfig:
         'min_dte': 14,
         'delta_target': 0.20,
         'spread_width': 5,
+        'moneyness': (0.90, 1.10),
         'profit_target_pct': 50.0,
         'stop_loss_pct': 100.0,
     }
@@ -130,10 +255,18 @@ class StrategyConfig:
         'max_dte': 45,
         'min_dte': 7,
         'delta_target': 0.30,
+        'moneyness': (1.00, 1.10),
         'profit_target_pct': 50.0,
         'stop_loss_pct': 100.0,
     }
     
+    # DTE range of each allowed_expirations type
+    EXPIRATION_WINDOWS = {
+        'weekly': (0, 7),
+        'monthly': (20, 45),
+        'quarterly': (60, 120),
+    }
+    
     @classmethod
     def get_strategy(cls, strategy_name: str) -> dict:
         """Get configuration for a specific strategy."""
@@ -164,19 +297,10 @@ class MarketHours:
     PRE_MARKET_OPEN = "04:00"  # ET
     AFTER_HOURS_CLOSE = "20:00"  # ET
     
-    # Days when US markets are closed
-    MARKET_HOLIDAYS_2024 = [
-        "2024-01-01",  # New Year's Day
-        "2024-01-15",  # MLK Day
-        "2024-02-19",  # Presidents' Day
-        "2024-03-29",  # Good Friday
-        "2024-05-27",  # Memorial Day
-        "2024-06-19",  # Juneteenth
-        "2024-07-04",  # Independence Day
-        "2024-09-02",  # Labor Day
-        "2024-11-28",  # Thanksgiving
-        "2024-12-25",  # Christmas
-    ]
+    EARLY_CLOSE = "13:00"  # ET
+    EARLY_AFTER_HOURS_CLOSE = "17:00"  # ET
+    
+    # Holidays and early-close days are computed by core.trading_calendar
 
 
 class LiquidityThresholds:
@@ -8,6 +8,28 @@ from core.models import (
     AuditLog, SystemConfig
 )
 from core.redis_manager import redis_manager, RedisManager, CacheKeys
+from core.local_cache import LocalCache
+from core.rate_limiter import rate_limiter, RateLimiter, TokenBucket
+from core.recorder import provider_recorder, ProviderRecorder, ReplayMissError
+from core.http_transport import http_transport, HttpTransport, HostMetrics
+from core.blocking_executor import blocking_adapter, BlockingCallAdapter, ExecutorSaturatedError
+from core.shared_quote_book import shared_quote_book, SharedQuoteBook
+from core.quote_book import quote_book, QuoteBook
+from core.bar_aggregator import bar_aggregator, BarAggregator, BarSeries, IndicatorState
+from core.options_chain import OptionsChain
+from core.chain_window import chain_demand, ChainDemand, ChainWindow
+from core.bar_store import bar_store, BarStore
+from core.volatility import realized_volatility, VOLATILITY_WINDOWS
+from core.iv_history import iv_history, IVHistory, RollingPercentile
+from core.greeks import greeks_engine, GreeksEngine
+from core.vol_surface import vol_surfaces, VolSurfaceStore, SmileFit
+from core.single_flight import SingleFlight
+from core.provider_router import ProviderRouter, ProviderHealth
+from core.trading_calendar import trading_calendar, TradingCalendar, REGULAR, EXTENDED, ALWAYS
+from core.scheduler import loop_scheduler, LoopScheduler, LoopSchedule
+from core.warm_store import warm_store, WarmStore
+from core.chain_archive import chain_archive, ChainArchive
+from core.cache_policy import policy_cache, PolicyCache, CachePolicy, CACHE_POLICIES, is_market_hours
 from core.logger import setup_logger, get_trade_logger
 
 __all__ = [
@@ -37,6 +59,99 @@ __all__ = [
     'redis_manager',
     'RedisManager',
     'CacheKeys',
+    'LocalCache',
+    
+    # Rate limiting
+    'rate_limiter',
+    'RateLimiter',
+    'TokenBucket',
+    
+    # Provider record/replay
+    'provider_recorder',
+    'ProviderRecorder',
+    'ReplayMissError',
+    
+    # Shared HTTP transport
+    'http_transport',
+    'HttpTransport',
+    'HostMetrics',
+    
+    # Blocking SDK calls
+    'blocking_adapter',
+    'BlockingCallAdapter',
+    'ExecutorSaturatedError',
+    
+    # Quote book
+    'quote_book',
+    'QuoteBook',
+    'shared_quote_book',
+    'SharedQuoteBook',
+    
+    # Intraday bars and indicators
+    'bar_aggregator',
+    'BarAggregator',
+    'BarSeries',
+    'IndicatorState',
+    
+    # Options chains
+    'OptionsChain',
+    'chain_demand',
+    'ChainDemand',
+    'ChainWindow',
+    
+    # Historical bars
+    'bar_store',
+    'BarStore',
+    
+    # Volatility
+    'realized_volatility',
+    'VOLATILITY_WINDOWS',
+    
+    # Implied volatility history
+    'iv_history',
+    'IVHistory',
+    'RollingPercentile',
+    
+    # Options Greeks
+    'greeks_engine',
+    'GreeksEngine',
+    
+    # Volatility surface
+    'vol_surfaces',
+    'VolSurfaceStore',
+    'SmileFit',
+    
+    # Request coalescing
+    'SingleFlight',
+    
+    # Provider failover
+    'ProviderRouter',
+    'ProviderHealth',
+    
+    # Trading calendar and loop scheduling
+    'trading_calendar',
+    'TradingCalendar',
+    'REGULAR',
+    'EXTENDED',
+    'ALWAYS',
+    'loop_scheduler',
+    'LoopScheduler',
+    'LoopSchedule',
+    
+    # Warm-start persistence
+    'warm_store',
+    'WarmStore',
+    
+    # Options chain snapshot archive
+    'chain_archive',
+    'ChainArchive',
+    
+    # Cache policies
+    'policy_cache',
+    'PolicyCache',
+    'CachePolicy',
+    'CACHE_POLICIES',
+    'is_market_hours',
     
     # Logger
     'setup_logger',
@@ -0,0 +1,366 @@
+"""
+Intraday bars built from streamed ticks, with incrementally updated indicators.
+"""
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+
+from config import settings
+
+
+# Bar intervals in seconds
+BAR_INTERVALS = {'1m': 60, '5m': 300}
+
+RSI_PERIOD = 14
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+EMA_FAST = 20
+EMA_SLOW = 50
+ATR_PERIOD = 14
+VOL_WINDOW = 30
+
+# Regular-session minutes per year, to annualize intraday realized volatility
+SESSION_MINUTES_PER_YEAR = 252 * 390
+
+
+class Ema:
+    """Exponential moving average seeded with the simple mean of its first ``period`` values."""
+    
+    def __init__(self, period: int):
+        """
+        Initialize EMA.
+        
+        Args:
+            period: Smoothing period
+        """
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.count = 0
+        self.value: Optional[float] = None
+    
+    def update(self, x: float) -> float:
+        """Add a value and return the new average."""
+        self.count += 1
+        if self.count <= self.period:
+            # Running simple mean until the seed window is full
+            self.value = x if self.value is None else self.value + (x - self.value) / self.count
+        else:
+            self.value += self.alpha * (x - self.value)
+        return self.value
+    
+    @property
+    def ready(self) -> bool:
+        """Whether a full period has been seen."""
+        return self.count >= self.period
+
+
+class Wilder(Ema):
+    """Wilder's smoothing (alpha = 1/period), as used by RSI and ATR."""
+    
+    def __init__(self, period: int):
+        """Initialize Wilder average."""
+        super().__init__(period)
+        self.alpha = 1.0 / period
+
+
+class IndicatorState:
+    """
+    RSI, MACD, EMAs, ATR and realized volatility of one bar series.
+    
+    Each closed bar updates every indicator in constant time; nothing is
+    recomputed over the history.
+    """
+    
+    def __init__(self, bar_seconds: int):
+        """
+        Initialize indicator state.
+        
+        Args:
+            bar_seconds: Bar length, to annualize realized volatility
+        """
+        self.prev_close: Optional[float] = None
+        
+        self.gain = Wilder(RSI_PERIOD)
+        self.loss = Wilder(RSI_PERIOD)
+        self.macd_fast = Ema(MACD_FAST)
+        self.macd_slow = Ema(MACD_SLOW)
+        self.macd_signal = Ema(MACD_SIGNAL)
+        self.ema_fast = Ema(EMA_FAST)
+        self.ema_slow = Ema(EMA_SLOW)
+        self.atr = Wilder(ATR_PERIOD)
+        
+        # Rolling sums of the last VOL_WINDOW log returns
+        self._returns: deque = deque()
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._annualize = math.sqrt(SESSION_MINUTES_PER_YEAR * 60 / bar_seconds)
+        
+        self.macd: Optional[float] = None
+    
+    def update(self, high: float, low: float, close: float):
+        """Fold one closed bar into every indicator."""
+        prev = self.prev_close
+        self.prev_close = close
+        
+        self.ema_fast.update(close)
+        self.ema_slow.update(close)
+        self.macd = self.macd_fast.update(close) - self.macd_slow.update(close)
+        if self.macd_slow.ready:
+            self.macd_signal.update(self.macd)
+        
+        if prev is None:
+            self.atr.update(high - low)
+            return
+        
+        change = close - prev
+        self.gain.update(max(change, 0.0))
+        self.loss.update(max(-change, 0.0))
+        self.atr.update(max(high - low, abs(high - prev), abs(low - prev)))
+        
+        if prev > 0 and close > 0:
+            r = math.log(close / prev)
+            self._returns.append(r)
+            self._sum += r
+            self._sum_sq += r * r
+            if len(self._returns) > VOL_WINDOW:
+                old = self._returns.popleft()
+                self._sum -= old
+                self._sum_sq -= old * old
+    
+    def rsi(self) -> Optional[float]:
+        """Relative strength index (0-100)."""
+        if not self.gain.ready:
+            return None
+        if self.loss.value == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + self.gain.value / self.loss.value)
+    
+    def realized_vol(self) -> Optional[float]:
+        """Annualized volatility of the last VOL_WINDOW bar returns, in percent."""
+        n = len(self._returns)
+        if n < VOL_WINDOW:
+            return None
+        mean = self._sum / n
+        variance = max(self._sum_sq / n - mean * mean, 0.0)
+        return math.sqrt(variance) * self._annualize * 100
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Current indicator values (None until each has warmed up)."""
+        def value(x: Optional[float], ready: bool = True) -> Optional[float]:
+            return round(x, 4) if x is not None and ready else None
+        
+        ema_fast = value(self.ema_fast.value, self.ema_fast.ready)
+        ema_slow = value(self.ema_slow.value, self.ema_slow.ready)
+        macd = value(self.macd, self.macd_slow.ready)
+        signal = value(self.macd_signal.value, self.macd_signal.ready)
+        histogram = round(macd - signal, 4) if macd is not None and signal is not None else None
+        
+        ma_signal = None
+        if ema_fast is not None and ema_slow is not None:
+            ma_signal = 'bullish' if ema_fast > ema_slow else 'bearish'
+        
+        # Trend needs the moving averages and MACD momentum to agree
+        trend = 'neutral'
+        if ma_signal and histogram is not None:
+            if ma_signal == 'bullish' and histogram > 0:
+                trend = 'bullish'
+            elif ma_signal == 'bearish' and histogram < 0:
+                trend = 'bearish'
+        
+        return {
+            'rsi': value(self.rsi()),
+            'macd': macd,
+            'macd_signal': signal,
+            'macd_histogram': histogram,
+            'ema_fast': ema_fast,
+            'ema_slow': ema_slow,
+            'ma_signal': ma_signal,
+            'atr': value(self.atr.value, self.atr.ready),
+            'realized_vol': value(self.realized_vol()),
+            'trend': trend,
+        }
+
+
+class BarSeries:
+    """Fixed-size ring buffer of OHLCV bars for one symbol and interval."""
+    
+    def __init__(self, seconds: int, capacity: int):
+        """
+        Initialize bar series.
+        
+        Args:
+            seconds: Bar length
+            capacity: Closed bars kept
+        """
+        self.seconds = seconds
+        self.capacity = capacity
+        
+        # Columns: start, open, high, low, close, volume
+        self._bars = np.zeros((capacity, 6), dtype=np.float64)
+        self._next = 0
+        self._count = 0
+        
+        self._current: Optional[List[float]] = None
+        self.indicators = IndicatorState(seconds)
+    
+    def on_tick(self, price: float, size: float, now: float):
+        """Fold a tick into the open bar, closing it first if its interval has passed."""
+        start = now - now % self.seconds
+        
+        if self._current is not None and start > self._current[0]:
+            self._close()
+        
+        if self._current is None:
+            self._current = [start, price, price, price, price, size]
+        elif start == self._current[0]:
+            bar = self._current
+            bar[2] = max(bar[2], price)
+            bar[3] = min(bar[3], price)
+            bar[4] = price
+            bar[5] += size
+        # Ticks for an already closed interval arrive late and are dropped
+    
+    def roll(self, now: float):
+        """Close the open bar once its interval has ended (no tick needed)."""
+        if self._current is not None and now - now % self.seconds > self._current[0]:
+            self._close()
+    
+    def _close(self):
+        """Move the open bar into the ring and update the indicators."""
+        bar = self._current
+        self._bars[self._next] = bar
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+        self._current = None
+        
+        self.indicators.update(bar[2], bar[3], bar[4])
+    
+    def last(self, count: int) -> np.ndarray:
+        """The newest ``count`` closed bars, oldest first."""
+        count = min(count, self._count)
+        index = (np.arange(self._next - count, self._next)) % self.capacity
+        return self._bars[index]
+    
+    def __len__(self) -> int:
+        """Number of closed bars held."""
+        return self._count
+
+
+class BarAggregator:
+    """
+    1-minute and 5-minute bars per symbol, fed by the quote stream.
+    
+    Ticks update the open bar of every interval; closing a bar updates that
+    series' indicators once, so technical state for every symbol is always
+    current and reading it is a dictionary lookup.
+    """
+    
+    def __init__(self, capacity: Optional[int] = None):
+        """
+        Initialize bar aggregator.
+        
+        Args:
+            capacity: Closed bars kept per symbol and interval
+        """
+        self.capacity = capacity or settings.bar_buffer_size
+        self._series: Dict[str, Dict[str, BarSeries]] = {}
+        # Written from the engine loop, read from the API server thread too
+        self._lock = threading.Lock()
+        self._stats = {'ticks': 0}
+    
+    def on_tick(self, symbol: str, price: float, size: float = 0.0, timestamp: Optional[float] = None):
+        """
+        Add a trade or quote-midpoint tick.
+        
+        Args:
+            symbol: Stock symbol
+            price: Trade price or quote midpoint
+            size: Traded shares (0 for quotes)
+            timestamp: Epoch seconds (defaults to the time received)
+        """
+        if not price or price <= 0:
+            return
+        
+        now = timestamp or time.time()
+        
+        with self._lock:
+            series = self._series.get(symbol)
+            if series is None:
+                series = self._series[symbol] = {
+                    interval: BarSeries(seconds, self.capacity)
+                    for interval, seconds in BAR_INTERVALS.items()
+                }
+            for bars in series.values():
+                bars.on_tick(price, size, now)
+            self._stats['ticks'] += 1
+    
+    def on_prices(self, prices: Dict[str, float]):
+        """Add one tick per symbol from a batch of polled prices."""
+        now = time.time()
+        for symbol, price in prices.items():
+            self.on_tick(symbol, price, timestamp=now)
+    
+    def technicals(self, symbol: str, interval: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Current indicators for a symbol.
+        
+        Args:
+            symbol: Stock symbol
+            interval: Bar interval ("1m" or "5m"; defaults to
+                ``settings.indicator_bar_interval``)
+                
+        Returns:
+            Indicator values with the bar count and interval, or None if no
+            ticks were seen for the symbol
+        """
+        interval = interval or settings.indicator_bar_interval
+        
+        with self._lock:
+            series = self._series.get(symbol, {}).get(interval)
+            if series is None:
+                return None
+            series.roll(time.time())
+            return dict(series.indicators.snapshot(), interval=interval, bars=len(series))
+    
+    def bars(self, symbol: str, interval: str = '1m', count: int = 60) -> Optional[Dict[str, List[float]]]:
+        """
+        Recent closed bars for a symbol.
+        
+        Args:
+            symbol: Stock symbol
+            interval: Bar interval
+            count: Number of bars
+            
+        Returns:
+            Column lists (start, open, high, low, close, volume), oldest first
+        """
+        with self._lock:
+            series = self._series.get(symbol, {}).get(interval)
+            if series is None:
+                return None
+            series.roll(time.time())
+            bars = series.last(count)
+        
+        return {
+            name: bars[:, i].tolist()
+            for i, name in enumerate(('start', 'open', 'high', 'low', 'close', 'volume'))
+        }
+    
+    def remove(self, symbols: Iterable[str]):
+        """Drop the bars of symbols that are no longer streamed."""
+        with self._lock:
+            for symbol in symbols:
+                self._series.pop(symbol, None)
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Get tick and symbol counters."""
+        with self._lock:
+            return dict(self._stats, symbols=len(self._series))
+
+
+# Global bar aggregator instance
+bar_aggregator = BarAggregator()
@@ -0,0 +1,165 @@
+"""
+Local append-only store of daily bars, one memory-mapped file per symbol.
+"""
+import os
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+import numpy as np
+from loguru import logger
+
+from config import settings
+
+
+# One fixed-size record per trading day; ``day`` is date.toordinal()
+BAR_DTYPE = np.dtype([
+    ('day', '<i4'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<f8'),
+])
+
+
+class BarStore:
+    """Append-only daily bar files read through memory maps."""
+    
+    def __init__(self, root: Optional[str] = None):
+        """
+        Initialize bar store.
+        
+        Args:
+            root: Directory holding the per-symbol files
+        """
+        self.root = Path(root or settings.bar_store_path)
+        self.root.mkdir(parents=True, exist_ok=True)
+        
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        # symbol -> (file size when mapped, memmap)
+        self._maps: Dict[str, Tuple[int, np.ndarray]] = {}
+    
+    def _path(self, symbol: str) -> Path:
+        """File holding a symbol's bars."""
+        return self.root / f"{symbol.upper()}.bars"
+    
+    def _lock(self, symbol: str) -> threading.Lock:
+        """Per-symbol lock serializing appends with remaps."""
+        with self._locks_guard:
+            if symbol not in self._locks:
+                self._locks[symbol] = threading.Lock()
+            return self._locks[symbol]
+    
+    def read(self, symbol: str) -> np.ndarray:
+        """
+        Get all stored bars for a symbol.
+        
+        Args:
+            symbol: Stock symbol
+            
+        Returns:
+            Read-only structured array ordered by day (empty if none stored)
+        """
+        path = self._path(symbol)
+        
+        with self._lock(symbol):
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                return np.empty(0, dtype=BAR_DTYPE)
+            
+            # Ignore a partially written trailing record
+            count = size // BAR_DTYPE.itemsize
+            if count == 0:
+                return np.empty(0, dtype=BAR_DTYPE)
+            
+            mapped = self._maps.get(symbol)
+            if mapped is None or mapped[0] != size:
+                bars = np.memmap(path, dtype=BAR_DTYPE, mode='r', shape=(count,))
+                self._maps[symbol] = (size, bars)
+                return bars
+            
+            return mapped[1]
+    
+    def last_date(self, symbol: str) -> Optional[date]:
+        """
+        Get the most recent stored bar date.
+        
+        Args:
+            symbol: Stock symbol
+            
+        Returns:
+            Date of the last bar or None if nothing is stored
+        """
+        bars = self.read(symbol)
+        if len(bars) == 0:
+            return None
+        return date.fromordinal(int(bars['day'][-1]))
+    
+    def append(self, symbol: str, bars: Iterable[Sequence]) -> int:
+        """
+        Append bars newer than the last stored one.
+        
+        Args:
+            symbol: Stock symbol
+            bars: (date, open, high, low, close, volume) tuples
+            
+        Returns:
+            Number of bars written
+        """
+        rows = sorted((d.toordinal(), o, h, l, c, v) for d, o, h, l, c, v in bars)
+        if not rows:
+            return 0
+        
+        # The last stored day is read under the same lock as the write, so
+        # concurrent syncs of a symbol cannot both append the same days
+        # (the lock is not re-entrant, hence no read()/last_date() here)
+        with self._lock(symbol):
+            path = self._path(symbol)
+            with open(path, 'a+b') as f:
+                # Truncate any partial record left by an interrupted write
+                size = f.seek(0, os.SEEK_END)
+                remainder = size % BAR_DTYPE.itemsize
+                if remainder:
+                    size = f.truncate(size - remainder)
+                
+                last_day = 0
+                if size:
+                    f.seek(size - BAR_DTYPE.itemsize)
+                    tail = np.frombuffer(f.read(BAR_DTYPE.itemsize), dtype=BAR_DTYPE)
+                    last_day = int(tail['day'][0])
+                
+                # Keep days after the stored ones, dropping duplicates within the batch
+                unique = []
+                for row in rows:
+                    if row[0] > last_day and (not unique or row[0] != unique[-1][0]):
+                        unique.append(row)
+                
+                if not unique:
+                    return 0
+                
+                records = np.array(unique, dtype=BAR_DTYPE)
+                f.write(records.tobytes())
+        
+        logger.debug(f"Bar store: appended {len(records)} bars for {symbol}")
+        return len(records)
+    
+    def closes(self, symbol: str, count: int) -> np.ndarray:
+        """
+        Get the most recent closing prices.
+        
+        Args:
+            symbol: Stock symbol
+            count: Number of closes
+            
+        Returns:
+            Up to ``count`` closes, oldest first
+        """
+        bars = self.read(symbol)
+        return np.asarray(bars['close'][-count:])
+
+
+# Global bar store instance
+bar_store = BarStore()
@@ -0,0 +1,270 @@
+"""
+Adapter for running synchronous SDK calls off the event loop.
+"""
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from loguru import logger
+
+from config import settings
+from core.recorder import provider_recorder
+
+
+# Providers whose calls change broker state and are never timed out
+ORDER_PROVIDERS = {'alpaca_orders'}
+
+
+class ExecutorSaturatedError(Exception):
+    """Raised when a provider's call queue is full."""
+
+
+class ProviderExecutor:
+    """Bounded thread pool for one provider's blocking SDK calls."""
+    
+    def __init__(
+        self,
+        provider: str,
+        max_workers: int,
+        max_queue: int,
+        timeout: Optional[float]
+    ):
+        """
+        Initialize provider executor.
+        
+        Args:
+            provider: Provider name (e.g. "alpaca")
+            max_workers: Number of worker threads
+            max_queue: Maximum calls waiting for a free worker
+            timeout: Default per-call timeout in seconds (None waits for the
+                result)
+        """
+        self.provider = provider
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix=f"sdk-{provider}"
+        )
+        
+        # Counters are shared by every event loop that submits calls
+        # (engine loop and the API server thread), so guard with a lock
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'timeouts': 0,
+            'rejected': 0,
+            'max_queue_depth': 0,
+            'total_latency_ms': 0.0,
+        }
+    
+    def _invoke(self, fn: Callable, args: tuple, kwargs: dict, state: dict) -> Any:
+        """Run the call on a worker thread, tracking queue and run state."""
+        with self._lock:
+            if state['abandoned']:
+                # Caller already gave up while the call was still queued
+                return None
+            state['started'] = True
+            self._queued -= 1
+            self._running += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+    
+    async def run(
+        self,
+        fn: Callable,
+        *args,
+        call_timeout: Optional[float] = None,
+        **kwargs
+    ) -> Any:
+        """
+        Run a blocking call on this provider's pool.
+        
+        Args:
+            fn: Blocking callable
+            args: Positional arguments for the call
+            call_timeout: Seconds to wait for the result (defaults to the
+                executor timeout)
+            kwargs: Keyword arguments for the call
+            
+        Returns:
+            The call's return value
+            
+        Raises:
+            ExecutorSaturatedError: If too many calls are already queued
+            asyncio.TimeoutError: If the call does not finish in time. A call
+                that already started keeps its worker until the SDK returns;
+                a call still queued is dropped.
+        """
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self._stats['rejected'] += 1
+                raise ExecutorSaturatedError(
+                    f"{self.provider} executor queue is full ({self._queued} waiting)"
+                )
+            self._queued += 1
+            self._stats['submitted'] += 1
+            self._stats['max_queue_depth'] = max(self._stats['max_queue_depth'], self._queued)
+        
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        state = {'started': False, 'abandoned': False}
+        
+        try:
+            future = loop.run_in_executor(
+                self._pool,
+                functools.partial(self._invoke, fn, args, kwargs, state)
+            )
+            result = await asyncio.wait_for(future, timeout=call_timeout or self.timeout)
+            
+            with self._lock:
+                self._stats['completed'] += 1
+                self._stats['total_latency_ms'] += (time.perf_counter() - started) * 1000
+            
+            return result
+            
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._stats['timeouts'] += 1
+            logger.warning(
+                f"{self.provider} call {getattr(fn, '__name__', fn)} timed out "
+                f"after {call_timeout or self.timeout}s"
+            )
+            raise
+        except Exception:
+            with self._lock:
+                self._stats['failed'] += 1
+            raise
+        finally:
+            # Drop calls that never left the queue (timeout or cancellation)
+            with self._lock:
+                if not state['started'] and not state['abandoned']:
+                    state['abandoned'] = True
+                    self._queued -= 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth and call metrics."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['queue_depth'] = self._queued
+            stats['in_flight'] = self._running
+            stats['max_workers'] = self.max_workers
+        
+        finished = stats['completed']
+        stats['avg_latency_ms'] = round(stats['total_latency_ms'] / finished, 2) if finished else 0.0
+        stats['total_latency_ms'] = round(stats['total_latency_ms'], 2)
+        
+        return stats
+    
+    def shutdown(self, wait: bool = False):
+        """Shut down the worker pool."""
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+class BlockingCallAdapter:
+    """Registry of per-provider executors for synchronous SDK clients."""
+    
+    def __init__(self):
+        """Initialize blocking call adapter."""
+        self._executors: Dict[str, ProviderExecutor] = {}
+        self._lock = threading.Lock()
+    
+    def _provider_workers(self, provider: str) -> int:
+        """Worker count for a provider."""
+        workers = {
+            'alpaca': settings.alpaca_executor_workers,
+            'alpaca_orders': settings.alpaca_order_executor_workers,
+            'polygon': settings.polygon_executor_workers,
+            'openai': settings.openai_executor_workers,
+        }
+        return max(1, workers.get(provider, 2))
+    
+    def _provider_timeout(self, provider: str) -> Optional[float]:
+        """Default call timeout for a provider."""
+        # Order submits and cancels wait for the broker's answer: giving up
+        # on a submit the broker already accepted would leave an untracked
+        # live position
+        if provider in ORDER_PROVIDERS:
+            return None
+        return settings.sdk_call_timeout
+    
+    def executor(self, provider: str) -> ProviderExecutor:
+        """
+        Get (or create) the executor for a provider.
+        
+        Args:
+            provider: Provider name
+            
+        Returns:
+            Provider executor
+        """
+        with self._lock:
+            if provider not in self._executors:
+                self._executors[provider] = ProviderExecutor(
+                    provider=provider,
+                    max_workers=self._provider_workers(provider),
+                    max_queue=settings.sdk_max_queue,
+                    timeout=self._provider_timeout(provider)
+                )
+            return self._executors[provider]
+    
+    async def run(
+        self,
+        provider: str,
+        fn: Callable,
+        *args,
+        call_timeout: Optional[float] = None,
+        **kwargs
+    ) -> Any:
+        """
+        Run a blocking SDK call on the provider's executor.
+        
+        Args:
+            provider: Provider name
+            fn: Blocking callable
+            args: Positional arguments for the call
+            call_timeout: Seconds to wait for the result
+            kwargs: Keyword arguments for the call
+            
+        Returns:
+            The call's return value
+        """
+        # Recorded per SDK method and arguments (see core.recorder)
+        return await provider_recorder.call(
+            provider,
+            getattr(fn, '__qualname__', repr(fn)),
+            (args, kwargs),
+            lambda: self.executor(provider).run(fn, *args, call_timeout=call_timeout, **kwargs)
+        )
+    
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get metrics for every provider executor."""
+        with self._lock:
+            executors = list(self._executors.values())
+        return {executor.provider: executor.get_stats() for executor in executors}
+    
+    def shutdown(self, wait: bool = False):
+        """Shut down all provider executors."""
+        with self._lock:
+            executors = list(self._executors.values())
+            self._executors.clear()
+        
+        for executor in executors:
+            executor.shutdown(wait=wait)
+        
+        logger.info("Blocking call executors shut down")
+
+
+# Global blocking call adapter instance
+blocking_adapter = BlockingCallAdapter()
@@ -0,0 +1,304 @@
+"""
+Declarative cache policies: stale-while-revalidate, TTL jitter, negative
+caching and market-hours-adaptive TTLs.
+"""
+import asyncio
+import random
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from loguru import logger
+
+from config import settings
+from core.redis_manager import redis_manager
+from core.single_flight import SingleFlight
+from core.trading_calendar import trading_calendar
+from core.warm_store import warm_store
+
+
+class CachePolicy:
+    """How long a cache namespace stays fresh, stale-but-servable and negative."""
+    
+    def __init__(
+        self,
+        ttl: float,
+        stale_ttl: float = 0,
+        jitter: float = 0.1,
+        negative_ttl: float = 0,
+        closed_ttl: Optional[float] = None,
+        persist: bool = False
+    ):
+        """
+        Initialize cache policy.
+        
+        Args:
+            ttl: Seconds a value is fresh while the market is open
+            stale_ttl: Further seconds a stale value is served while it is
+                refreshed in the background (0 disables stale-while-revalidate)
+            jitter: Random +/- fraction applied to TTLs so entries written
+                together don't expire together
+            negative_ttl: Seconds to remember that a key had no data
+                (0 disables negative caching)
+            closed_ttl: Fresh TTL while the market is closed (defaults to ``ttl``)
+            persist: Also write entries behind to the warm store, so they
+                survive a restart or Redis flush
+        """
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.jitter = jitter
+        self.negative_ttl = negative_ttl
+        self.closed_ttl = closed_ttl if closed_ttl is not None else ttl
+        self.persist = persist
+    
+    def _jittered(self, seconds: float) -> float:
+        """Randomize a TTL by the policy's jitter fraction."""
+        if not self.jitter:
+            return seconds
+        return seconds * random.uniform(1 - self.jitter, 1 + self.jitter)
+    
+    def fresh_ttl(self, market_open: Optional[bool] = None) -> float:
+        """
+        Fresh lifetime for a value written now.
+        
+        Args:
+            market_open: Whether the market is open (detected if None)
+            
+        Returns:
+            TTL in seconds
+        """
+        if market_open is None:
+            market_open = is_market_hours()
+        return self._jittered(self.ttl if market_open else self.closed_ttl)
+    
+    def negative(self) -> float:
+        """Lifetime of a negative (no data) entry."""
+        return self._jittered(self.negative_ttl)
+
+
+# Policy per cache namespace
+CACHE_POLICIES: Dict[str, CachePolicy] = {
+    'price': CachePolicy(ttl=5, stale_ttl=30, jitter=0.2, closed_ttl=300),
+    'options_chain': CachePolicy(
+        ttl=settings.options_chain_ttl,
+        stale_ttl=settings.options_chain_retention,
+        jitter=0.2,
+        negative_ttl=3600,
+        closed_ttl=settings.options_chain_ttl * 12
+    ),
+    'options_snapshot': CachePolicy(
+        ttl=settings.options_snapshot_ttl,
+        jitter=0.2,
+        closed_ttl=settings.options_snapshot_ttl * 20
+    ),
+    'volatility': CachePolicy(
+        ttl=3600,
+        stale_ttl=6 * 3600,
+        jitter=0.1,
+        negative_ttl=3600,
+        closed_ttl=4 * 3600,
+        persist=True
+    ),
+    'news': CachePolicy(ttl=900, stale_ttl=1800, jitter=0.1, negative_ttl=300, closed_ttl=1800),
+}
+
+
+def is_market_hours(now: Optional[datetime] = None) -> bool:
+    """
+    Whether US equity markets are in their regular session.
+    
+    Args:
+        now: Time to check (defaults to now)
+        
+    Returns:
+        True during the regular session on a trading day
+    """
+    return trading_calendar.is_open(now)
+
+
+class PolicyCache:
+    """
+    Redis cache that applies ``CACHE_POLICIES`` to JSON values.
+    
+    Values are stored in an envelope ``{'v': value, 'fresh_until': epoch}``
+    (plus ``'neg': True`` for negative entries). The Redis expiry covers the
+    fresh and stale periods; reads past ``fresh_until`` return the stale
+    value immediately and refresh it in the background.
+    """
+    
+    def __init__(self):
+        """Initialize policy cache."""
+        self._flights = SingleFlight('cache_refresh')
+        # Strong references so background refreshes aren't garbage collected
+        self._refreshes: set = set()
+        self._stats = {'fresh': 0, 'stale': 0, 'negative': 0, 'misses': 0, 'refreshes': 0}
+    
+    @staticmethod
+    def _unwrap(envelope: Any) -> Optional[Tuple[Any, float, bool]]:
+        """Split an envelope into (value, fresh_until, negative), or None if not one."""
+        if isinstance(envelope, dict) and 'fresh_until' in envelope:
+            return envelope.get('v'), envelope['fresh_until'], bool(envelope.get('neg'))
+        return None
+    
+    def _envelope(self, namespace: str, value: Any, market_open: bool) -> Tuple[Dict[str, Any], int]:
+        """Build an envelope and its Redis expiry."""
+        policy = CACHE_POLICIES[namespace]
+        
+        if value is None or value == [] or value == {}:
+            ttl = policy.negative()
+            return {'v': value, 'fresh_until': time.time() + ttl, 'neg': True}, max(1, int(ttl))
+        
+        ttl = policy.fresh_ttl(market_open)
+        envelope = {'v': value, 'fresh_until': time.time() + ttl}
+        return envelope, max(1, int(ttl + policy.stale_ttl))
+    
+    def put(self, namespace: str, key: str, value: Any) -> bool:
+        """
+        Cache a value under a namespace's policy.
+        
+        Empty values (None, [], {}) are written as negative entries when the
+        policy enables negative caching and skipped otherwise.
+        
+        Args:
+            namespace: Policy name
+            key: Cache key
+            value: JSON-serializable value
+            
+        Returns:
+            True if written
+        """
+        return self.put_many(namespace, {key: value})
+    
+    def put_many(self, namespace: str, mapping: Dict[str, Any]) -> bool:
+        """Cache several values under a namespace's policy in one round trip."""
+        policy = CACHE_POLICIES[namespace]
+        market_open = is_market_hours()
+        
+        # Group by expiry so each group is one pipelined MSET
+        groups: Dict[int, Dict[str, Any]] = {}
+        for key, value in mapping.items():
+            envelope, expiration = self._envelope(namespace, value, market_open)
+            if envelope.get('neg') and not policy.negative_ttl:
+                continue
+            groups.setdefault(expiration, {})[key] = envelope
+        
+        if policy.persist:
+            for exp, group in groups.items():
+                warm_store.stage_many(group, exp)
+        
+        return all(redis_manager.mset(group, expiration=exp) for exp, group in groups.items())
+    
+    def peek(self, key: str) -> Any:
+        """Get a cached value regardless of freshness (None if absent or negative)."""
+        unwrapped = self._unwrap(redis_manager.get(key))
+        return unwrapped[0] if unwrapped and not unwrapped[2] else None
+    
+    def lookup(self, keys: Iterable[str]) -> Tuple[Dict[str, Any], List[str], List[str]]:
+        """
+        Classify keys by cache state in one round trip.
+        
+        Args:
+            keys: Cache keys
+            
+        Returns:
+            (values, stale, missing): cached values by key (fresh, stale or
+            negative - negative entries hold their empty value), the keys
+            whose value is stale, and the keys with no entry
+        """
+        keys = list(keys)
+        stored = redis_manager.mget(keys)
+        now = time.time()
+        
+        values, stale, missing = {}, [], []
+        for key in keys:
+            unwrapped = self._unwrap(stored.get(key))
+            if unwrapped is None:
+                missing.append(key)
+                self._stats['misses'] += 1
+                continue
+            
+            value, fresh_until, negative = unwrapped
+            values[key] = value
+            
+            if negative:
+                self._stats['negative'] += 1
+            elif now >= fresh_until:
+                stale.append(key)
+                self._stats['stale'] += 1
+            else:
+                self._stats['fresh'] += 1
+        
+        return values, stale, missing
+    
+    async def get_or_load(
+        self,
+        namespace: str,
+        key: str,
+        loader: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Get a value, loading it on a miss and revalidating it in the background when stale.
+        
+        A loader returning None (provider unavailable) caches nothing; an
+        empty list or dict is cached as a negative entry.
+        
+        Args:
+            namespace: Policy name
+            key: Cache key
+            loader: Coroutine function producing the fresh value
+            
+        Returns:
+            Cached or loaded value
+        """
+        values, stale, missing = self.lookup([key])
+        
+        if key in stale:
+            self.refresh_in_background(namespace, key, loader)
+        
+        if not missing:
+            return values[key]
+        
+        return await self._flights.do(key, self._load_and_put, namespace, key, loader)
+    
+    async def _load_and_put(self, namespace: str, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Run a loader and cache its result."""
+        value = await loader()
+        if value is not None:
+            self.put(namespace, key, value)
+        return value
+    
+    def refresh_in_background(
+        self,
+        namespace: str,
+        key: str,
+        loader: Callable[[], Awaitable[Any]]
+    ):
+        """
+        Schedule a refresh without waiting for it (one per key at a time).
+        
+        Args:
+            namespace: Policy name
+            key: Key identifying the refresh (used to coalesce duplicates)
+            loader: Coroutine function that loads and caches the fresh value;
+                with ``namespace`` set its result is also written to ``key``
+        """
+        async def refresh():
+            try:
+                if namespace:
+                    await self._flights.do(key, self._load_and_put, namespace, key, loader)
+                else:
+                    await self._flights.do(key, loader)
+            except Exception as e:
+                logger.warning(f"Background refresh of {key} failed: {e}")
+        
+        self._stats['refreshes'] += 1
+        task = asyncio.get_running_loop().create_task(refresh())
+        self._refreshes.add(task)
+        task.add_done_callback(self._refreshes.discard)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit, stale, negative and refresh counters."""
+        return dict(self._stats, refreshing=len(self._refreshes))
+
+
+# Global policy cache instance
+policy_cache = PolicyCache()
@@ -0,0 +1,411 @@
+"""
+Append-only archive of options chain snapshots in columnar files, partitioned by day and underlying.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+import numpy as np
+import pytz
+from loguru import logger
+
+from config import settings
+from core.trading_calendar import EASTERN
+
+
+# One file per column; tickers are stored as indexes into the partition's dictionary
+COLUMNS = {
+    'fetched_at': np.dtype('<i8'),        # snapshot time, epoch milliseconds
+    'ticker': np.dtype('<i4'),            # index into tickers.txt
+    'expiration': np.dtype('<i4'),        # date.toordinal()
+    'strike': np.dtype('<f4'),
+    'type': np.dtype('i1'),               # 1 call, -1 put, 0 unknown
+    'underlying_price': np.dtype('<f4'),
+    'bid': np.dtype('<f4'),
+    'ask': np.dtype('<f4'),
+    'mid': np.dtype('<f4'),
+    'bid_size': np.dtype('<u4'),
+    'ask_size': np.dtype('<u4'),
+    'volume': np.dtype('<u4'),
+    'open_interest': np.dtype('<u4'),
+    'iv': np.dtype('<f4'),
+    'delta': np.dtype('<f4'),
+    'gamma': np.dtype('<f4'),
+    'theta': np.dtype('<f4'),
+    'vega': np.dtype('<f4'),
+    'quote_time': np.dtype('<i8'),        # provider quote timestamp (0 if unknown)
+}
+
+TICKERS_FILE = 'tickers.txt'
+COMPACT_FILE = 'chain.npz'
+
+# Seconds between passes compressing old partitions
+COMPACT_INTERVAL = 3600
+
+OPTION_TYPES = {'call': 1, 'put': -1}
+
+
+class ChainArchive:
+    """
+    History of every options chain snapshot fetched, for backtests and strike tuning.
+    
+    The fetch path only ``stage``s a reference to the snapshot; a background
+    task encodes and appends the queued snapshots off the event loop. Each
+    (trading day, underlying) partition is a directory with one raw file
+    per column plus a ticker dictionary, so a day can be read back as
+    memory maps without loading it.
+    
+    Partitions older than ``chain_archive_compress_after_days`` are packed
+    into a single compressed ``chain.npz`` and read back into memory.
+    """
+    
+    def __init__(self, root: Optional[str] = None):
+        """
+        Initialize chain archive.
+        
+        Args:
+            root: Directory holding the day partitions
+        """
+        self.root = Path(root or settings.chain_archive_path)
+        
+        # (underlying, fetched_at, contracts) waiting for the writer
+        self._pending: Deque[Tuple[str, float, Dict[str, Dict[str, Any]]]] = deque()
+        self._lock = threading.Lock()
+        # Serializes flushes, compaction and reads of a partition's row count
+        self._write_lock = threading.Lock()
+        
+        # partition -> (ticker -> index), and partition -> complete rows on disk
+        self._dictionaries: Dict[Path, Dict[str, int]] = {}
+        self._rows: Dict[Path, int] = {}
+        self._last_compact = 0.0
+        
+        self._stats = {'staged': 0, 'dropped': 0, 'snapshots': 0, 'rows': 0, 'flushes': 0, 'compacted': 0, 'errors': 0}
+    
+    @staticmethod
+    def trading_day(timestamp: float) -> date:
+        """Eastern calendar date of an epoch timestamp."""
+        return datetime.fromtimestamp(timestamp, pytz.utc).astimezone(EASTERN).date()
+    
+    def partition(self, day: date, underlying: str) -> Path:
+        """Directory holding one underlying's snapshots for a day."""
+        return self.root / day.isoformat() / underlying.upper()
+    
+    def stage(self, underlying: str, contracts: Dict[str, Dict[str, Any]], fetched_at: Optional[float] = None):
+        """
+        Queue a chain snapshot for archiving (never blocks on disk).
+        
+        Args:
+            underlying: Underlying symbol
+            contracts: Snapshot contracts keyed by ticker (not copied; must
+                not be mutated afterwards)
+            fetched_at: Epoch seconds the snapshot was fetched
+        """
+        if not settings.chain_archive_enabled or not contracts:
+            return
+        
+        with self._lock:
+            self._pending.append((underlying, fetched_at or time.time(), contracts))
+            self._stats['staged'] += 1
+            
+            # Writer fell behind (e.g. disk full) - keep the newest snapshots
+            while len(self._pending) > settings.chain_archive_max_pending:
+                self._pending.popleft()
+                self._stats['dropped'] += 1
+    
+    @staticmethod
+    def _float(value: Any) -> float:
+        """Numeric field or NaN when missing."""
+        return np.nan if value is None else value
+    
+    def _encode(
+        self,
+        fetched_at: float,
+        contracts: Dict[str, Dict[str, Any]],
+        dictionary: Dict[str, int],
+        new_tickers: List[str]
+    ) -> Dict[str, np.ndarray]:
+        """Turn one snapshot into column arrays, extending the ticker dictionary."""
+        quotes = list(contracts.values())
+        
+        ids = []
+        for quote in quotes:
+            ticker = quote['symbol']
+            index = dictionary.get(ticker)
+            if index is None:
+                index = dictionary[ticker] = len(dictionary)
+                new_tickers.append(ticker)
+            ids.append(index)
+        
+        def column(name: str, values) -> np.ndarray:
+            return np.array(values, dtype=np.float64).astype(COLUMNS[name])
+        
+        return {
+            'fetched_at': np.full(len(quotes), int(fetched_at * 1000), dtype=COLUMNS['fetched_at']),
+            'ticker': np.array(ids, dtype=COLUMNS['ticker']),
+            'expiration': np.array(
+                [date.fromisoformat(q['expiration']).toordinal() if q.get('expiration') else 0 for q in quotes],
+                dtype=COLUMNS['expiration']
+            ),
+            'strike': column('strike', [self._float(q.get('strike')) for q in quotes]),
+            'type': np.array([OPTION_TYPES.get(q.get('type'), 0) for q in quotes], dtype=COLUMNS['type']),
+            'underlying_price': column('underlying_price', [self._float(q.get('underlying_price')) for q in quotes]),
+            'bid': column('bid', [q.get('bid') or 0 for q in quotes]),
+            'ask': column('ask', [q.get('ask') or 0 for q in quotes]),
+            'mid': column('mid', [q.get('mid') or 0 for q in quotes]),
+            'bid_size': column('bid_size', [q.get('bid_size') or 0 for q in quotes]),
+            'ask_size': column('ask_size', [q.get('ask_size') or 0 for q in quotes]),
+            'volume': column('volume', [q.get('volume') or 0 for q in quotes]),
+            'open_interest': column('open_interest', [q.get('open_interest') or 0 for q in quotes]),
+            'iv': column('iv', [self._float(q.get('iv')) for q in quotes]),
+            'delta': column('delta', [self._float(q.get('delta')) for q in quotes]),
+            'gamma': column('gamma', [self._float(q.get('gamma')) for q in quotes]),
+            'theta': column('theta', [self._float(q.get('theta')) for q in quotes]),
+            'vega': column('vega', [self._float(q.get('vega')) for q in quotes]),
+            'quote_time': np.array(
+                [q.get('timestamp') if isinstance(q.get('timestamp'), int) else 0 for q in quotes],
+                dtype=COLUMNS['quote_time']
+            ),
+        }
+    
+    def _open(self, partition: Path) -> Dict[str, int]:
+        """
+        Load a partition's dictionary and align its columns (write lock held).
+        
+        Columns cut short by an interrupted write are truncated to the rows
+        every column has, so appends stay aligned.
+        """
+        dictionary = self._dictionaries.get(partition)
+        if dictionary is not None:
+            return dictionary
+        
+        partition.mkdir(parents=True, exist_ok=True)
+        
+        tickers_path = partition / TICKERS_FILE
+        tickers = tickers_path.read_text().splitlines() if tickers_path.exists() else []
+        dictionary = {ticker: i for i, ticker in enumerate(tickers)}
+        
+        rows = self._row_count(partition)
+        for name, dtype in COLUMNS.items():
+            path = partition / f"{name}.bin"
+            if path.exists() and os.path.getsize(path) != rows * dtype.itemsize:
+                with open(path, 'r+b') as f:
+                    f.truncate(rows * dtype.itemsize)
+        
+        self._dictionaries[partition] = dictionary
+        self._rows[partition] = rows
+        return dictionary
+    
+    @staticmethod
+    def _row_count(partition: Path) -> int:
+        """Rows present in every column file of a raw partition."""
+        counts = []
+        for name, dtype in COLUMNS.items():
+            path = partition / f"{name}.bin"
+            counts.append(os.path.getsize(path) // dtype.itemsize if path.exists() else 0)
+        return min(counts)
+    
+    def _append(self, partition: Path, snapshots: List[Tuple[float, Dict[str, Dict[str, Any]]]]) -> int:
+        """Encode and append a partition's queued snapshots (write lock held)."""
+        dictionary = self._open(partition)
+        new_tickers: List[str] = []
+        encoded = [self._encode(fetched_at, contracts, dictionary, new_tickers) for fetched_at, contracts in snapshots]
+        
+        # Dictionary first, so every stored index resolves
+        if new_tickers:
+            with open(partition / TICKERS_FILE, 'a') as f:
+                f.write(''.join(f"{ticker}\n" for ticker in new_tickers))
+        
+        rows = 0
+        for name in COLUMNS:
+            values = np.concatenate([columns[name] for columns in encoded])
+            with open(partition / f"{name}.bin", 'ab') as f:
+                f.write(values.tobytes())
+            rows = len(values)
+        
+        self._rows[partition] += rows
+        return rows
+    
+    def flush(self) -> int:
+        """
+        Write queued snapshots to their partitions (blocking).
+        
+        Returns:
+            Number of rows written
+        """
+        with self._lock:
+            pending, self._pending = self._pending, deque()
+        
+        if not pending:
+            return 0
+        
+        by_partition: Dict[Path, List[Tuple[float, Dict[str, Dict[str, Any]]]]] = {}
+        for underlying, fetched_at, contracts in pending:
+            partition = self.partition(self.trading_day(fetched_at), underlying)
+            by_partition.setdefault(partition, []).append((fetched_at, contracts))
+        
+        written = 0
+        with self._write_lock:
+            for partition, snapshots in by_partition.items():
+                try:
+                    rows = self._append(partition, snapshots)
+                    written += rows
+                    self._stats['snapshots'] += len(snapshots)
+                except Exception as e:
+                    logger.error(f"Chain archive write to {partition} failed: {e}")
+                    self._stats['errors'] += 1
+                    # Re-read the partition from disk before the next append
+                    self._dictionaries.pop(partition, None)
+                    self._rows.pop(partition, None)
+        
+        self._stats['rows'] += written
+        self._stats['flushes'] += 1
+        return written
+    
+    def compact(self, today: Optional[date] = None) -> int:
+        """
+        Compress raw partitions older than ``chain_archive_compress_after_days`` (blocking).
+        
+        Returns:
+            Number of partitions compressed
+        """
+        today = today or self.trading_day(time.time())
+        cutoff = today - timedelta(days=settings.chain_archive_compress_after_days)
+        compacted = 0
+        
+        for day in self.days():
+            if day >= cutoff:
+                continue
+            
+            for underlying in self.underlyings(day):
+                partition = self.partition(day, underlying)
+                if (partition / COMPACT_FILE).exists():
+                    continue
+                
+                with self._write_lock:
+                    try:
+                        columns = self._read_raw(partition)
+                        temp = partition / f"{COMPACT_FILE}.tmp"
+                        with open(temp, 'wb') as f:
+                            np.savez_compressed(f, **{name: np.array(values) for name, values in columns.items()})
+                        os.replace(temp, partition / COMPACT_FILE)
+                        
+                        for name in COLUMNS:
+                            (partition / f"{name}.bin").unlink(missing_ok=True)
+                        (partition / TICKERS_FILE).unlink(missing_ok=True)
+                        self._dictionaries.pop(partition, None)
+                        self._rows.pop(partition, None)
+                        compacted += 1
+                    except Exception as e:
+                        logger.error(f"Chain archive compaction of {partition} failed: {e}")
+                        self._stats['errors'] += 1
+        
+        self._stats['compacted'] += compacted
+        return compacted
+    
+    def days(self) -> List[date]:
+        """Trading days with archived snapshots, oldest first."""
+        if not self.root.exists():
+            return []
+        
+        days = []
+        for entry in self.root.iterdir():
+            try:
+                days.append(date.fromisoformat(entry.name))
+            except ValueError:
+                continue
+        return sorted(days)
+    
+    def underlyings(self, day: date) -> List[str]:
+        """Underlyings archived on a day."""
+        directory = self.root / day.isoformat()
+        if not directory.exists():
+            return []
+        return sorted(entry.name for entry in directory.iterdir() if entry.is_dir())
+    
+    def _read_raw(self, partition: Path) -> Dict[str, np.ndarray]:
+        """Memory-map a raw partition's columns."""
+        rows = self._rows.get(partition)
+        if rows is None:
+            rows = self._row_count(partition)
+        
+        columns: Dict[str, np.ndarray] = {}
+        for name, dtype in COLUMNS.items():
+            if rows == 0:
+                columns[name] = np.empty(0, dtype=dtype)
+            else:
+                columns[name] = np.memmap(partition / f"{name}.bin", dtype=dtype, mode='r', shape=(rows,))
+        
+        tickers_path = partition / TICKERS_FILE
+        tickers = tickers_path.read_text().splitlines() if tickers_path.exists() else []
+        columns['tickers'] = np.array(tickers, dtype=str)
+        return columns
+    
+    def read(self, day: date, underlying: str) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Read one underlying's snapshots for a day.
+        
+        Raw partitions are returned as read-only memory maps; compressed ones
+        are decompressed into memory.
+        
+        Args:
+            day: Trading day
+            underlying: Underlying symbol
+            
+        Returns:
+            Column arrays (see COLUMNS) plus ``tickers``, the dictionary that
+            ``ticker`` indexes into, or None if nothing was archived
+        """
+        partition = self.partition(day, underlying)
+        
+        if (partition / COMPACT_FILE).exists():
+            with np.load(partition / COMPACT_FILE) as archive:
+                return {name: archive[name] for name in archive.files}
+        
+        if not partition.exists():
+            return None
+        
+        with self._write_lock:
+            return self._read_raw(partition)
+    
+    def read_day(self, day: date) -> Dict[str, Dict[str, np.ndarray]]:
+        """Snapshots of every underlying archived on a day (see ``read``)."""
+        return {
+            underlying: columns
+            for underlying in self.underlyings(day)
+            for columns in [self.read(day, underlying)]
+            if columns is not None
+        }
+    
+    async def run(self, running: Optional[Callable[[], bool]] = None):
+        """
+        Write queued snapshots periodically until cancelled.
+        
+        Args:
+            running: Callable returning False once the engine is stopping
+        """
+        while running is None or running():
+            await asyncio.sleep(settings.chain_archive_flush_interval)
+            
+            try:
+                await asyncio.to_thread(self.flush)
+                
+                if time.monotonic() - self._last_compact >= COMPACT_INTERVAL:
+                    self._last_compact = time.monotonic()
+                    compacted = await asyncio.to_thread(self.compact)
+                    if compacted:
+                        logger.info(f"Chain archive compressed {compacted} partitions")
+            except Exception as e:
+                logger.error(f"Error in chain archive writer loop: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get staging, write and compaction counters."""
+        with self._lock:
+            return dict(self._stats, pending=len(self._pending), path=str(self.root))
+
+
+# Global chain archive instance
+chain_archive = ChainArchive()
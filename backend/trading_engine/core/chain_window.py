@@ -0,0 +1,216 @@
+"""
+Expiration and strike band of the options chain that active strategies can trade.
+"""
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from loguru import logger
+
+from config import settings, StrategyConfig
+from core.database import get_db_context
+from core.models import User, UserConfig
+
+
+class ChainWindow:
+    """
+    Union of the DTE ranges and strike bands a set of strategies can use.
+    
+    Polygon filters take one range per field, so the union is kept as an
+    envelope: the lowest and highest DTE, and the lowest and highest strike
+    any strategy could pick around the current spot price.
+    """
+    
+    def __init__(self, min_dte: int, max_dte: int, bands: List[Tuple[float, float, float]]):
+        """
+        Initialize chain window.
+        
+        Args:
+            min_dte: Nearest days to expiration needed
+            max_dte: Farthest days to expiration needed
+            bands: (low moneyness, high moneyness, spread width) per strategy
+        """
+        self.min_dte = min_dte
+        self.max_dte = max_dte
+        self.bands = bands
+    
+    @classmethod
+    def for_strategies(cls, demand: Iterable[Tuple[str, Optional[List[str]]]]) -> Optional['ChainWindow']:
+        """
+        Build the window for (strategy, allowed expiration types) pairs.
+        
+        Args:
+            demand: Strategy names with the expiration types allowed for
+                them (None for no restriction)
+                
+        Returns:
+            Chain window, or None if no pair can trade any expiration
+        """
+        min_dte, max_dte, bands = None, None, []
+        
+        for strategy_name, expirations in demand:
+            strategy = StrategyConfig.get_strategy(strategy_name)
+            if not strategy:
+                continue
+            
+            # Strategy DTE range clipped to each allowed expiration type
+            if expirations is None:
+                ranges = [(strategy['min_dte'], strategy['max_dte'])]
+            else:
+                ranges = []
+                for expiration_type in expirations:
+                    window = StrategyConfig.EXPIRATION_WINDOWS.get(expiration_type)
+                    if window:
+                        ranges.append((max(strategy['min_dte'], window[0]), min(strategy['max_dte'], window[1])))
+            
+            ranges = [(lo, hi) for lo, hi in ranges if lo <= hi]
+            if not ranges:
+                continue
+            
+            lows, highs = zip(*ranges)
+            min_dte = min(lows) if min_dte is None else min(min_dte, *lows)
+            max_dte = max(highs) if max_dte is None else max(max_dte, *highs)
+            
+            low, high = strategy.get('moneyness', (0.8, 1.2))
+            band = (low, high, float(strategy.get('spread_width', 0)))
+            if band not in bands:
+                bands.append(band)
+        
+        if min_dte is None:
+            return None
+        return cls(min_dte, max_dte, bands)
+    
+    def strike_bounds(self, spot: Optional[float], margin_pct: float = 0.0) -> Tuple[Optional[float], Optional[float]]:
+        """
+        Strike range around a spot price.
+        
+        Args:
+            spot: Underlying price (None leaves strikes unbounded)
+            margin_pct: Extra room on each side, in percent of the bound
+            
+        Returns:
+            (lowest strike, highest strike), or (None, None) without a spot
+        """
+        if not spot or not self.bands:
+            return None, None
+        
+        low = min(spot * band_low - width for band_low, _, width in self.bands)
+        high = max(spot * band_high + width for _, band_high, width in self.bands)
+        margin = margin_pct / 100
+        return round(max(low * (1 - margin), 0.0), 2), round(high * (1 + margin), 2)
+    
+    def describe(self, spot: Optional[float] = None) -> Dict[str, Any]:
+        """Window as stored in chain metadata, with the strike band fetched around ``spot``."""
+        strike_low, strike_high = self.strike_bounds(spot, settings.options_chain_strike_margin_pct)
+        return {
+            'min_dte': self.min_dte,
+            'max_dte': self.max_dte,
+            'strike_low': strike_low,
+            'strike_high': strike_high,
+        }
+    
+    def covered_by(self, fetched: Optional[Dict[str, Any]], spot: Optional[float]) -> bool:
+        """
+        Whether a previously fetched window still contains this one.
+        
+        Args:
+            fetched: ``describe()`` output stored when the chain was fetched
+            spot: Current underlying price
+            
+        Returns:
+            False when the DTE range grew or spot moved the strike band
+            outside what was fetched
+        """
+        if not fetched:
+            return False
+        
+        if fetched['min_dte'] > self.min_dte or fetched['max_dte'] < self.max_dte:
+            return False
+        
+        low, high = self.strike_bounds(spot)
+        if low is None:
+            # Spot unknown - nothing to compare against
+            return True
+        if fetched.get('strike_low') is not None and low < fetched['strike_low']:
+            return False
+        if fetched.get('strike_high') is not None and high > fetched['strike_high']:
+            return False
+        return True
+
+
+class ChainDemand:
+    """
+    Chain window needed by the active users, re-read from their configs periodically.
+    
+    Chains are shared across users, so the window is the union of every
+    active user's allowed strategies and expiration types. Without active
+    users it covers every configured strategy.
+    """
+    
+    def __init__(self):
+        """Initialize chain demand."""
+        self._window: Optional[ChainWindow] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _default() -> ChainWindow:
+        """Window covering every configured strategy and expiration."""
+        return ChainWindow.for_strategies(
+            (strategy['name'], None) for strategy in StrategyConfig.get_all_strategies()
+        )
+    
+    def _load(self) -> ChainWindow:
+        """Build the window from the latest config of each active user."""
+        with get_db_context() as db:
+            configs = db.query(
+                UserConfig.allowed_strategies,
+                UserConfig.allowed_expirations
+            ).join(
+                User, User.id == UserConfig.user_id
+            ).filter(
+                User.is_active == True
+            ).distinct(
+                UserConfig.user_id
+            ).order_by(
+                UserConfig.user_id, UserConfig.version.desc()
+            ).all()
+        
+        demand = [
+            (strategy_name, config.allowed_expirations or [])
+            for config in configs
+            for strategy_name in config.allowed_strategies or []
+        ]
+        
+        window = ChainWindow.for_strategies(demand) if demand else None
+        return window or self._default()
+    
+    def window(self) -> ChainWindow:
+        """
+        Current chain window (re-read every ``options_chain_demand_refresh_interval``).
+        
+        Returns:
+            Chain window; the last one if the configs cannot be read
+        """
+        with self._lock:
+            if self._window is not None and time.monotonic() - self._loaded_at < settings.options_chain_demand_refresh_interval:
+                return self._window
+            
+            try:
+                window = self._load()
+                if self._window is None or self._window.__dict__ != window.__dict__:
+                    logger.info(
+                        f"Options chain window: {window.min_dte}-{window.max_dte} DTE, "
+                        f"{len(window.bands)} strike bands"
+                    )
+                self._window = window
+            except Exception as e:
+                logger.error(f"Error loading options chain demand: {e}")
+                if self._window is None:
+                    self._window = self._default()
+            
+            self._loaded_at = time.monotonic()
+            return self._window
+
+
+# Global chain demand instance
+chain_demand = ChainDemand()
@@ -0,0 +1,315 @@
+"""
+Vectorized Black-Scholes pricing, implied volatility and Greeks.
+"""
+import threading
+from datetime import date, datetime, time
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+import pytz
+from scipy.special import ndtr
+
+from config import settings
+
+
+EASTERN = pytz.timezone('America/New_York')
+SECONDS_PER_YEAR = 365.0 * 24 * 60 * 60
+# Floor on time to expiry (~1 hour) so expiring contracts stay finite
+MIN_TIME_TO_EXPIRY = 1e-4
+
+IV_LOWER = 1e-4
+IV_UPPER = 5.0
+
+
+def _norm_pdf(x: np.ndarray) -> np.ndarray:
+    """Standard normal density."""
+    return np.exp(-0.5 * x * x) / np.sqrt(2 * np.pi)
+
+
+def _d1_d2(S, K, T, r, sigma, q):
+    """Black-Scholes d1 and d2."""
+    sqrt_t = np.sqrt(T)
+    d1 = (np.log(S / K) + (r - q + 0.5 * sigma * sigma) * T) / (sigma * sqrt_t)
+    return d1, d1 - sigma * sqrt_t
+
+
+def bs_price(
+    S: np.ndarray,
+    K: np.ndarray,
+    T: np.ndarray,
+    r: float,
+    sigma: np.ndarray,
+    is_call: np.ndarray,
+    q: float = 0.0
+) -> np.ndarray:
+    """
+    Black-Scholes option prices.
+    
+    Args:
+        S: Underlying prices
+        K: Strikes
+        T: Years to expiry
+        r: Risk-free rate
+        sigma: Volatilities (decimal)
+        is_call: True for calls, False for puts
+        q: Dividend yield
+        
+    Returns:
+        Option prices
+    """
+    d1, d2 = _d1_d2(S, K, T, r, sigma, q)
+    forward = S * np.exp(-q * T)
+    discount = K * np.exp(-r * T)
+    
+    call = forward * ndtr(d1) - discount * ndtr(d2)
+    put = discount * ndtr(-d2) - forward * ndtr(-d1)
+    return np.where(is_call, call, put)
+
+
+def implied_volatility(
+    price: np.ndarray,
+    S: np.ndarray,
+    K: np.ndarray,
+    T: np.ndarray,
+    r: float,
+    is_call: np.ndarray,
+    q: float = 0.0,
+    tol: float = 1e-6,
+    max_iter: int = 50
+) -> np.ndarray:
+    """
+    Implied volatility for arrays of contracts.
+    
+    Newton steps are taken while they stay inside a shrinking
+    [low, high] bracket; otherwise the step falls back to bisection, so
+    every contract converges even where vega is tiny.
+    
+    Args:
+        price: Option prices
+        S: Underlying prices
+        K: Strikes
+        T: Years to expiry
+        r: Risk-free rate
+        is_call: True for calls, False for puts
+        q: Dividend yield
+        tol: Price tolerance
+        max_iter: Iteration cap
+        
+    Returns:
+        Implied volatilities (decimal); NaN where the price is outside the
+        no-arbitrage bounds
+    """
+    price, S, K, T = (np.asarray(a, dtype=np.float64) for a in (price, S, K, T))
+    is_call = np.asarray(is_call, dtype=bool)
+    
+    forward = S * np.exp(-q * T)
+    discount = K * np.exp(-r * T)
+    lower_bound = np.where(is_call, np.maximum(forward - discount, 0), np.maximum(discount - forward, 0))
+    upper_bound = np.where(is_call, forward, discount)
+    valid = (price > lower_bound) & (price < upper_bound) & (T > 0) & (S > 0) & (K > 0)
+    
+    low = np.full(price.shape, IV_LOWER)
+    high = np.full(price.shape, IV_UPPER)
+    
+    # Brenner-Subrahmanyam starting point
+    sigma = np.clip(np.sqrt(2 * np.pi / np.where(T > 0, T, 1)) * price / np.where(S > 0, S, 1), 0.05, 2.0)
+    active = valid.copy()
+    
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for _ in range(max_iter):
+            if not active.any():
+                break
+            
+            d1, _ = _d1_d2(S, K, T, r, sigma, q)
+            diff = bs_price(S, K, T, r, sigma, is_call, q) - price
+            vega = forward * _norm_pdf(d1) * np.sqrt(T)
+            
+            active &= np.abs(diff) > tol
+            
+            high = np.where(active & (diff > 0), sigma, high)
+            low = np.where(active & (diff < 0), sigma, low)
+            
+            step = sigma - diff / vega
+            use_bisection = ~np.isfinite(step) | (step <= low) | (step >= high)
+            sigma = np.where(active, np.where(use_bisection, 0.5 * (low + high), step), sigma)
+    
+    return np.where(valid, sigma, np.nan)
+
+
+def greeks(
+    S: np.ndarray,
+    K: np.ndarray,
+    T: np.ndarray,
+    r: float,
+    sigma: np.ndarray,
+    is_call: np.ndarray,
+    q: float = 0.0
+) -> Dict[str, np.ndarray]:
+    """
+    Per-share Black-Scholes Greeks.
+    
+    Args:
+        S: Underlying prices
+        K: Strikes
+        T: Years to expiry
+        r: Risk-free rate
+        sigma: Volatilities (decimal)
+        is_call: True for calls, False for puts
+        q: Dividend yield
+        
+    Returns:
+        Mapping with delta, gamma, theta (per calendar day) and vega (per
+        volatility point)
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sqrt_t = np.sqrt(T)
+        d1, d2 = _d1_d2(S, K, T, r, sigma, q)
+        pdf = _norm_pdf(d1)
+        carry = np.exp(-q * T)
+        discount = K * np.exp(-r * T)
+        
+        delta = np.where(is_call, carry * ndtr(d1), carry * (ndtr(d1) - 1))
+        gamma = carry * pdf / (S * sigma * sqrt_t)
+        vega = S * carry * pdf * sqrt_t / 100
+        
+        decay = -S * carry * pdf * sigma / (2 * sqrt_t)
+        call_theta = decay - r * discount * ndtr(d2) + q * S * carry * ndtr(d1)
+        put_theta = decay + r * discount * ndtr(-d2) - q * S * carry * ndtr(-d1)
+        theta = np.where(is_call, call_theta, put_theta) / 365
+    
+    return {'delta': delta, 'gamma': gamma, 'theta': theta, 'vega': vega}
+
+
+def years_to_expiry(expiration: date, now: Optional[datetime] = None) -> float:
+    """
+    Years until the 4:00 PM ET close on the expiration date.
+    
+    Args:
+        expiration: Expiration date
+        now: Current time (defaults to now)
+        
+    Returns:
+        Time to expiry in years, floored at about one hour
+    """
+    if isinstance(expiration, str):
+        expiration = date.fromisoformat(expiration)
+    
+    expiry = EASTERN.localize(datetime.combine(expiration, time(16, 0)))
+    now = now or datetime.now(pytz.utc)
+    
+    return max((expiry - now).total_seconds() / SECONDS_PER_YEAR, MIN_TIME_TO_EXPIRY)
+
+
+class GreeksEngine:
+    """Batch IV and Greeks with a per-contract cache keyed by quote timestamp."""
+    
+    def __init__(self, risk_free_rate: Optional[float] = None, dividend_yield: float = 0.0):
+        """
+        Initialize Greeks engine.
+        
+        Args:
+            risk_free_rate: Annual risk-free rate (decimal)
+            dividend_yield: Annual dividend yield (decimal)
+        """
+        self.risk_free_rate = settings.risk_free_rate if risk_free_rate is None else risk_free_rate
+        self.dividend_yield = dividend_yield
+        
+        # contract -> (cache key, result); one entry per live contract
+        self._cache: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._stats = {'computed': 0, 'cached': 0, 'failed': 0}
+    
+    @staticmethod
+    def _cache_key(contract: Dict[str, Any]) -> Optional[tuple]:
+        """Key identifying the inputs a cached result was computed from."""
+        if contract.get('timestamp') is None:
+            return None
+        return (str(contract['timestamp']), contract['price'], contract['underlying_price'])
+    
+    def evaluate(self, contracts: Sequence[Dict[str, Any]]) -> List[Optional[Dict[str, float]]]:
+        """
+        Compute IV and per-share Greeks for many contracts in one pass.
+        
+        Contracts whose quote timestamp, price and underlying price match the
+        previous call are served from cache; the rest are solved together.
+        
+        Args:
+            contracts: Dicts with symbol, underlying_price, strike, expiration,
+                option_type, price and (optionally) the quote timestamp
+                
+        Returns:
+            Per contract, a dict with iv (percent), delta, gamma, theta, vega,
+            or None where the inputs don't admit a solution
+        """
+        results: List[Optional[Dict[str, float]]] = [None] * len(contracts)
+        pending = []
+        
+        with self._lock:
+            for i, contract in enumerate(contracts):
+                key = self._cache_key(contract)
+                cached = self._cache.get(contract['symbol'])
+                if key is not None and cached is not None and cached[0] == key:
+                    results[i] = cached[1]
+                    self._stats['cached'] += 1
+                else:
+                    pending.append(i)
+        
+        if not pending:
+            return results
+        
+        now = datetime.now(pytz.utc)
+        batch = [contracts[i] for i in pending]
+        
+        # Chains and portfolios share few expirations; convert each once
+        expiries = {}
+        for c in batch:
+            if c['expiration'] not in expiries:
+                expiries[c['expiration']] = years_to_expiry(c['expiration'], now)
+        
+        S = np.array([c['underlying_price'] or np.nan for c in batch], dtype=np.float64)
+        K = np.array([c['strike'] for c in batch], dtype=np.float64)
+        T = np.array([expiries[c['expiration']] for c in batch], dtype=np.float64)
+        price = np.array([c['price'] or np.nan for c in batch], dtype=np.float64)
+        is_call = np.array([c['option_type'].lower() == 'call' for c in batch], dtype=bool)
+        
+        r, q = self.risk_free_rate, self.dividend_yield
+        sigma = implied_volatility(price, S, K, T, r, is_call, q)
+        values = greeks(S, K, T, r, sigma, is_call, q)
+        
+        with self._lock:
+            for j, i in enumerate(pending):
+                if not np.isfinite(sigma[j]):
+                    self._stats['failed'] += 1
+                    continue
+                
+                result = {
+                    'iv': round(float(sigma[j]) * 100, 4),
+                    'delta': float(values['delta'][j]),
+                    'gamma': float(values['gamma'][j]),
+                    'theta': float(values['theta'][j]),
+                    'vega': float(values['vega'][j]),
+                }
+                results[i] = result
+                
+                key = self._cache_key(contracts[i])
+                if key is not None:
+                    self._cache[contracts[i]['symbol']] = (key, result)
+            
+            self._stats['computed'] += len(pending)
+        
+        return results
+    
+    def prune(self, symbols: Sequence[str]):
+        """Drop cached results for contracts not in ``symbols``."""
+        keep = set(symbols)
+        with self._lock:
+            for symbol in [s for s in self._cache if s not in keep]:
+                del self._cache[symbol]
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Get cache and solver counters."""
+        with self._lock:
+            return dict(self._stats, cached_contracts=len(self._cache))
+
+
+# Global Greeks engine instance
+greeks_engine = GreeksEngine()
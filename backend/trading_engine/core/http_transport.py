@@ -0,0 +1,244 @@
+"""
+Shared, pooled HTTP transport for outbound REST calls, with per-host metrics.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Dict, Optional
+import aiohttp
+import httpx
+import numpy as np
+from loguru import logger
+
+from config import settings
+
+
+# Latency samples kept per host
+LATENCY_WINDOW = 200
+
+
+class HostMetrics:
+    """Request, connection and latency counters for one host."""
+    
+    def __init__(self):
+        """Initialize host metrics."""
+        self._latencies: deque = deque(maxlen=LATENCY_WINDOW)
+        self.stats = {
+            'requests': 0, 'errors': 0, 'new_connections': 0, 'reused_connections': 0,
+            'dns_hits': 0, 'dns_misses': 0,
+        }
+    
+    def record(self, latency: float):
+        """Record one completed request."""
+        self.stats['requests'] += 1
+        self._latencies.append(latency)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get counters and latency percentiles."""
+        latencies = {}
+        if self._latencies:
+            for q, value in zip((50, 95, 99), np.percentile(self._latencies, (50, 95, 99))):
+                latencies[f"p{q}_ms"] = round(float(value) * 1000, 1)
+        return dict(self.stats, **latencies)
+
+
+class HttpTransport:
+    """
+    One set of keep-alive connection pools for every REST provider.
+    
+    Async callers share an ``aiohttp.ClientSession`` per event loop whose
+    connector keeps idle connections per host and caches DNS lookups, so
+    a request after the first one to a host skips DNS, TCP and TLS setup.
+    Blocking SDK clients that accept an ``httpx.Client`` (the OpenAI SDK)
+    share one pooled sync client instead of building their own. Large
+    bodies can be streamed in chunks rather than buffered by aiohttp.
+    
+    Trace hooks on both clients feed per-host request, error, connection
+    reuse and latency counters.
+    """
+    
+    def __init__(self):
+        """Initialize HTTP transport (sessions are created on first use)."""
+        self._sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+        self._sync_client: Optional[httpx.Client] = None
+        self._hosts: Dict[str, HostMetrics] = {}
+        # Sessions are looked up from the engine loop and the API server thread
+        self._lock = threading.Lock()
+    
+    def _host(self, host: Optional[str]) -> HostMetrics:
+        """Metrics of a host, created on first use."""
+        host = host or 'unknown'
+        metrics = self._hosts.get(host)
+        if metrics is None:
+            with self._lock:
+                metrics = self._hosts.setdefault(host, HostMetrics())
+        return metrics
+    
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        """aiohttp hooks recording per-host metrics."""
+        trace = aiohttp.TraceConfig()
+        
+        async def on_request_start(session, context, params):
+            context.started = time.monotonic()
+        
+        async def on_request_end(session, context, params):
+            self._host(params.url.host).record(time.monotonic() - context.started)
+        
+        async def on_request_exception(session, context, params):
+            self._host(params.url.host).stats['errors'] += 1
+        
+        async def on_connection_create_end(session, context, params):
+            context.new_connection = True
+        
+        async def on_connection_reuseconn(session, context, params):
+            context.new_connection = False
+        
+        async def on_request_headers_sent(session, context, params):
+            # Connection is known by the time headers go out
+            if hasattr(context, 'new_connection'):
+                key = 'new_connections' if context.new_connection else 'reused_connections'
+                self._host(params.url.host).stats[key] += 1
+        
+        async def on_dns_cache_hit(session, context, params):
+            self._host(params.host).stats['dns_hits'] += 1
+        
+        async def on_dns_cache_miss(session, context, params):
+            self._host(params.host).stats['dns_misses'] += 1
+        
+        trace.on_request_start.append(on_request_start)
+        trace.on_request_end.append(on_request_end)
+        trace.on_request_exception.append(on_request_exception)
+        trace.on_connection_create_end.append(on_connection_create_end)
+        trace.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace.on_request_headers_sent.append(on_request_headers_sent)
+        trace.on_dns_cache_hit.append(on_dns_cache_hit)
+        trace.on_dns_cache_miss.append(on_dns_cache_miss)
+        return trace
+    
+    def session(self) -> aiohttp.ClientSession:
+        """
+        Pooled session for the running event loop.
+        
+        Returns:
+            Shared client session (do not close it; the transport owns it)
+        """
+        loop = asyncio.get_running_loop()
+        
+        with self._lock:
+            session = self._sessions.get(loop)
+            if session is None or session.closed:
+                connector = aiohttp.TCPConnector(
+                    limit=settings.http_pool_size,
+                    limit_per_host=settings.http_pool_per_host,
+                    keepalive_timeout=settings.http_keepalive_timeout,
+                    use_dns_cache=True,
+                    ttl_dns_cache=settings.http_dns_cache_ttl,
+                )
+                session = aiohttp.ClientSession(
+                    connector=connector,
+                    timeout=aiohttp.ClientTimeout(
+                        total=settings.http_timeout,
+                        connect=settings.http_connect_timeout
+                    ),
+                    trace_configs=[self._trace_config()],
+                )
+                self._sessions[loop] = session
+            return session
+    
+    def sync_client(self) -> httpx.Client:
+        """
+        Pooled blocking client for SDKs that accept an ``httpx.Client``.
+        
+        Returns:
+            Shared, thread-safe client
+        """
+        with self._lock:
+            if self._sync_client is None or self._sync_client.is_closed:
+                def on_request(request: httpx.Request):
+                    request.extensions['started'] = time.monotonic()
+                
+                def on_response(response: httpx.Response):
+                    started = response.request.extensions.get('started')
+                    if started is not None:
+                        self._host(response.request.url.host).record(time.monotonic() - started)
+                    if response.status_code >= 500:
+                        self._host(response.request.url.host).stats['errors'] += 1
+                
+                self._sync_client = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=settings.http_pool_size,
+                        max_keepalive_connections=settings.http_pool_per_host,
+                        keepalive_expiry=settings.http_keepalive_timeout,
+                    ),
+                    timeout=httpx.Timeout(settings.http_timeout, connect=settings.http_connect_timeout),
+                    event_hooks={'request': [on_request], 'response': [on_response]},
+                )
+            return self._sync_client
+    
+    async def start(self):
+        """Open the session for the running loop so the first request doesn't pay for it."""
+        self.session()
+        logger.info(
+            f"HTTP transport started (pool {settings.http_pool_size}, "
+            f"{settings.http_pool_per_host} per host, DNS cache {settings.http_dns_cache_ttl}s)"
+        )
+    
+    async def stream(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        chunk_size: int = 65536
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream a response body in chunks instead of buffering it.
+        
+        Args:
+            url: Endpoint URL
+            params: Query parameters
+            headers: Request headers
+            chunk_size: Bytes per chunk
+            
+        Yields:
+            Body chunks
+            
+        Raises:
+            aiohttp.ClientResponseError: For non-2xx responses
+        """
+        async with self.session().get(url, params=params, headers=headers) as response:
+            response.raise_for_status()
+            async for chunk in response.content.iter_chunked(chunk_size):
+                yield chunk
+    
+    async def close(self):
+        """Close every pooled connection (sessions of other loops are closed on their loop)."""
+        current = asyncio.get_running_loop()
+        
+        with self._lock:
+            sessions, self._sessions = self._sessions, {}
+            sync_client, self._sync_client = self._sync_client, None
+        
+        for loop, session in sessions.items():
+            try:
+                if loop is current:
+                    await session.close()
+                elif not loop.is_closed():
+                    asyncio.run_coroutine_threadsafe(session.close(), loop)
+            except Exception as e:
+                logger.error(f"Error closing HTTP session: {e}")
+        
+        if sync_client is not None:
+            sync_client.close()
+        
+        logger.info("HTTP transport closed")
+    
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get per-host counters and latency percentiles."""
+        with self._lock:
+            hosts = dict(self._hosts)
+        return {host: metrics.get_stats() for host, metrics in hosts.items()}
+
+
+# Global HTTP transport instance
+http_transport = HttpTransport()
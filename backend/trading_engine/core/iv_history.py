@@ -0,0 +1,291 @@
+"""
+Daily at-the-money implied volatility history with rolling percentile queries.
+"""
+import threading
+from collections import deque
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+from loguru import logger
+
+from config import settings
+from core.redis_manager import redis_manager, CacheKeys
+from core.trading_calendar import trading_calendar, EASTERN
+
+
+class RollingPercentile:
+    """
+    Fixed-width window of values with O(log n) rank queries.
+    
+    Values are bucketed and counted in a Fenwick tree, so adding a value,
+    evicting the oldest one and asking for a percentile or an order
+    statistic never rescans the window.
+    """
+    
+    def __init__(self, window: int, resolution: float = 0.1, max_value: float = 500.0):
+        """
+        Initialize rolling percentile.
+        
+        Args:
+            window: Maximum number of values kept
+            resolution: Bucket width (values are in IV percent points)
+            max_value: Values above this fall into the top bucket
+        """
+        self.window = window
+        self.resolution = resolution
+        self.size = int(max_value / resolution) + 1
+        
+        self._tree = [0] * (self.size + 1)
+        self._values: deque = deque()
+    
+    def __len__(self) -> int:
+        """Number of values in the window."""
+        return len(self._values)
+    
+    def _bucket(self, value: float) -> int:
+        """Bucket index (0-based) for a value."""
+        return min(max(int(round(value / self.resolution)), 0), self.size - 1)
+    
+    def _add(self, bucket: int, delta: int):
+        """Add ``delta`` to a bucket count."""
+        i = bucket + 1
+        while i <= self.size:
+            self._tree[i] += delta
+            i += i & -i
+    
+    def _count_below(self, bucket: int) -> int:
+        """Number of values in buckets strictly below ``bucket``."""
+        total = 0
+        i = bucket
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+    
+    def _kth_bucket(self, k: int) -> int:
+        """Bucket holding the k-th smallest value (1-based)."""
+        position = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            nxt = position + step
+            if nxt <= self.size and self._tree[nxt] < k:
+                position = nxt
+                k -= self._tree[nxt]
+            step >>= 1
+        return position
+    
+    def append(self, value: float):
+        """Add the newest value, evicting the oldest once the window is full."""
+        bucket = self._bucket(value)
+        self._values.append(bucket)
+        self._add(bucket, 1)
+        
+        if len(self._values) > self.window:
+            self._add(self._values.popleft(), -1)
+    
+    def replace_last(self, value: float):
+        """Overwrite the newest value."""
+        if not self._values:
+            self.append(value)
+            return
+        
+        self._add(self._values.pop(), -1)
+        bucket = self._bucket(value)
+        self._values.append(bucket)
+        self._add(bucket, 1)
+    
+    def percentile(self, value: float) -> Optional[float]:
+        """
+        Share of window values below ``value``, in percent.
+        
+        Args:
+            value: Value to rank
+            
+        Returns:
+            Percentile (0-100) or None if the window is empty
+        """
+        if not self._values:
+            return None
+        return 100.0 * self._count_below(self._bucket(value)) / len(self._values)
+    
+    def quantile(self, k: int) -> Optional[float]:
+        """
+        k-th smallest value in the window (1-based), at bucket resolution.
+        
+        Args:
+            k: Rank
+            
+        Returns:
+            Bucket value or None if k is out of range
+        """
+        if k < 1 or k > len(self._values):
+            return None
+        return self._kth_bucket(k) * self.resolution
+    
+    def low(self) -> Optional[float]:
+        """Smallest value in the window."""
+        return self.quantile(1)
+    
+    def high(self) -> Optional[float]:
+        """Largest value in the window."""
+        return self.quantile(len(self._values))
+
+
+class IVHistory:
+    """Per-symbol daily ATM IV history, persisted in Redis."""
+    
+    def __init__(self, window: Optional[int] = None):
+        """
+        Initialize IV history.
+        
+        Args:
+            window: Trading days kept per symbol
+        """
+        self.window = window or settings.iv_history_window
+        
+        # symbol -> (rank structure, last recorded day, last IV)
+        self._series: Dict[str, Tuple[RollingPercentile, Optional[date], Optional[float]]] = {}
+        # Written from the engine loop, read from the API server thread too
+        self._lock = threading.Lock()
+    
+    def _load(self, symbol: str) -> Tuple[RollingPercentile, Optional[date], Optional[float]]:
+        """Get a symbol's series, hydrating it from Redis on first use."""
+        series = self._series.get(symbol)
+        if series is not None:
+            return series
+        
+        rolling = RollingPercentile(self.window)
+        last_day, last_iv = None, None
+        
+        stored = redis_manager.hgetall(CacheKeys.iv_history(symbol))
+        for day in sorted(stored)[-self.window:]:
+            rolling.append(float(stored[day]))
+            last_day, last_iv = date.fromisoformat(day), float(stored[day])
+        
+        series = (rolling, last_day, last_iv)
+        self._series[symbol] = series
+        return series
+    
+    def record(self, symbol: str, iv: float, day: Optional[date] = None):
+        """
+        Record a symbol's ATM IV for a day; later calls the same day overwrite it.
+        
+        Args:
+            symbol: Underlying symbol
+            iv: ATM implied volatility in percent
+            day: Trading day (defaults to today's Eastern session date)
+        """
+        if iv is None or iv <= 0:
+            return
+        
+        # Snapshots fetched on weekends and holidays would add extra "days"
+        # to the window and skew the rank
+        day = day or datetime.now(EASTERN).date()
+        if not trading_calendar.is_trading_day(day):
+            return
+        
+        key = CacheKeys.iv_history(symbol)
+        
+        with self._lock:
+            rolling, last_day, _ = self._load(symbol)
+            
+            if last_day is not None and day < last_day:
+                return
+            
+            if day == last_day:
+                rolling.replace_last(iv)
+            else:
+                rolling.append(iv)
+            
+            self._series[symbol] = (rolling, day, iv)
+        
+        redis_manager.hset(key, day.isoformat(), round(iv, 4))
+        
+        # Once per new day, drop days that have left the window
+        if day != last_day:
+            stored_days = sorted(redis_manager.hgetall(key))
+            if len(stored_days) > self.window:
+                redis_manager.hdel(key, *stored_days[:-self.window])
+    
+    def percentile(self, symbol: str, iv: Optional[float] = None) -> Optional[float]:
+        """
+        IV percentile: share of days in the window with lower IV.
+        
+        Args:
+            symbol: Underlying symbol
+            iv: IV to rank (defaults to the latest recorded IV)
+            
+        Returns:
+            Percentile (0-100) or None without enough history
+        """
+        with self._lock:
+            rolling, _, last_iv = self._load(symbol)
+            iv = last_iv if iv is None else iv
+            
+            if iv is None or len(rolling) < settings.iv_history_min_samples:
+                return None
+            
+            return round(rolling.percentile(iv), 2)
+    
+    def rank(self, symbol: str, iv: Optional[float] = None) -> Optional[float]:
+        """
+        IV rank: position of IV between the window's low and high.
+        
+        Args:
+            symbol: Underlying symbol
+            iv: IV to rank (defaults to the latest recorded IV)
+            
+        Returns:
+            Rank (0-100) or None without enough history
+        """
+        with self._lock:
+            rolling, _, last_iv = self._load(symbol)
+            iv = last_iv if iv is None else iv
+            
+            if iv is None or len(rolling) < settings.iv_history_min_samples:
+                return None
+            
+            low, high = rolling.low(), rolling.high()
+            if high <= low:
+                return 50.0
+            
+            return round(min(max((iv - low) / (high - low), 0.0), 1.0) * 100, 2)
+    
+    def summary(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get latest IV, percentile and rank for several symbols.
+        
+        Args:
+            symbols: Underlying symbols
+            
+        Returns:
+            Mapping of symbol to IV statistics for symbols with any history
+        """
+        results = {}
+        
+        for symbol in symbols:
+            try:
+                with self._lock:
+                    rolling, last_day, last_iv = self._load(symbol)
+                    samples = len(rolling)
+                    low, high = rolling.low(), rolling.high()
+                
+                if last_iv is None:
+                    continue
+                
+                results[symbol] = {
+                    'iv': last_iv,
+                    'as_of': last_day.isoformat(),
+                    'iv_percentile': self.percentile(symbol),
+                    'iv_rank': self.rank(symbol),
+                    'iv_low': low,
+                    'iv_high': high,
+                    'samples': samples,
+                }
+            except Exception as e:
+                logger.error(f"Error summarizing IV history for {symbol}: {e}")
+        
+        return results
+
+
+# Global IV history instance
+iv_history = IVHistory()
@@ -0,0 +1,171 @@
+"""
+Size-bounded in-process LRU/TTL cache used as an L1 tier in front of Redis.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+
+# Recent invalidations remembered to reject fills that raced with a write
+INVALIDATION_WINDOW = 4096
+
+
+class LocalCache:
+    """
+    LRU cache of raw Redis payloads with per-entry expiry and a byte budget.
+    
+    Values are kept serialized (str or bytes) so callers always get their
+    own decoded copy and can't mutate what other callers read. Entries are
+    dropped when Redis reports the key changed (see ``invalidate``), when
+    they expire, or when the entry or byte limits are exceeded.
+    
+    A fill started before an invalidation of the same key is discarded:
+    callers take ``version()`` before reading Redis and pass it to ``put``.
+    """
+    
+    def __init__(
+        self,
+        max_bytes: int,
+        max_entries: int,
+        ttl: float,
+        prefixes: Sequence[str] = ()
+    ):
+        """
+        Initialize local cache.
+        
+        Args:
+            max_bytes: Budget for the summed size of cached payloads
+            max_entries: Maximum number of cached keys
+            ttl: Seconds an entry may be served without revalidation
+            prefixes: Key prefixes eligible for caching (all keys if empty)
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.prefixes = tuple(prefixes)
+        
+        # key -> (payload, expires_at, size)
+        self._entries: 'OrderedDict[str, Tuple[Any, float, int]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        
+        # Invalidation sequence numbers, to detect fills that raced a write
+        self._version = 0
+        self._invalidated: 'OrderedDict[str, int]' = OrderedDict()
+        self._invalidated_floor = 0
+        
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0, 'rejected': 0}
+    
+    def cacheable(self, key: str) -> bool:
+        """Whether a key belongs to a cached prefix."""
+        return not self.prefixes or key.startswith(self.prefixes)
+    
+    def version(self) -> int:
+        """Current invalidation sequence number, taken before reading Redis."""
+        return self._version
+    
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get a cached payload.
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Serialized payload, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            
+            if entry[1] <= time.monotonic():
+                self._remove(key)
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry[0]
+    
+    def put(self, key: str, payload: Any, version: int, ttl: Optional[float] = None):
+        """
+        Cache a payload read from Redis.
+        
+        Args:
+            key: Cache key
+            payload: Serialized value (str or bytes)
+            version: ``version()`` taken before the payload was read
+            ttl: Seconds until the Redis key expires, if known
+        """
+        size = len(payload) + len(key)
+        if size > self.max_bytes:
+            return
+        
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        
+        with self._lock:
+            # Invalidated while the read was in flight - the payload may be old
+            if version < self._invalidated_floor or self._invalidated.get(key, -1) > version:
+                self._stats['rejected'] += 1
+                return
+            
+            if key in self._entries:
+                self._remove(key)
+            
+            self._entries[key] = (payload, time.monotonic() + ttl, size)
+            self._bytes += size
+            
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+    
+    def invalidate(self, keys: Optional[Iterable[str]] = None):
+        """
+        Drop keys changed in Redis.
+        
+        Args:
+            keys: Changed keys, or None to drop everything (e.g. after a
+                FLUSHDB or when the invalidation channel was lost)
+        """
+        with self._lock:
+            self._version += 1
+            
+            if keys is None:
+                self._stats['invalidations'] += len(self._entries)
+                self._entries.clear()
+                self._bytes = 0
+                self._invalidated.clear()
+                self._invalidated_floor = self._version
+                return
+            
+            for key in keys:
+                self._invalidated[key] = self._version
+                self._invalidated.move_to_end(key)
+                if key in self._entries:
+                    self._remove(key)
+                    self._stats['invalidations'] += 1
+            
+            while len(self._invalidated) > INVALIDATION_WINDOW:
+                _, version = self._invalidated.popitem(last=False)
+                self._invalidated_floor = max(self._invalidated_floor, version)
+    
+    def _remove(self, key: str):
+        """Remove an entry (lock held)."""
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit ratio, size and eviction counters."""
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return dict(
+                self._stats,
+                hit_ratio=round(self._stats['hits'] / lookups, 4) if lookups else 0.0,
+                entries=len(self._entries),
+                bytes=self._bytes,
+                max_bytes=self.max_bytes
+            )
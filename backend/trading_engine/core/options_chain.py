@@ -0,0 +1,259 @@
+"""
+Columnar options chain with indexed strike lookup and compact serialization.
+"""
+import json
+import struct
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+
+
+OPTION_TYPES = ('call', 'put')
+
+
+class OptionsChain:
+    """
+    Options chain stored as sorted contiguous arrays.
+    
+    Contracts are ordered by (expiration, type, strike). ``bounds`` holds the
+    start offset of every (expiration, type) block, so each block is a
+    sorted strike array that can be binary searched.
+    """
+    
+    MAGIC = b'OCH1'
+    
+    def __init__(
+        self,
+        symbol: str,
+        expirations: List[str],
+        bounds: np.ndarray,
+        strikes: np.ndarray,
+        types: np.ndarray,
+        ticker_ids: np.ndarray,
+        tickers: List[str]
+    ):
+        """
+        Initialize options chain.
+        
+        Args:
+            symbol: Underlying symbol
+            expirations: Sorted ISO expiration dates
+            bounds: Block offsets, length ``2 * len(expirations) + 1``
+            strikes: Strike per contract
+            types: Option type per contract (0 = call, 1 = put)
+            ticker_ids: Index into ``tickers`` per contract
+            tickers: Contract ticker dictionary
+        """
+        self.symbol = symbol
+        self.expirations = expirations
+        self.bounds = bounds
+        self.strikes = strikes
+        self.types = types
+        self.ticker_ids = ticker_ids
+        self.tickers = tickers
+        
+        self._expiration_index = {exp: i for i, exp in enumerate(expirations)}
+    
+    @classmethod
+    def from_contracts(cls, symbol: str, contracts: Iterable[Sequence[Any]]) -> 'OptionsChain':
+        """
+        Build a chain from ``[ticker, expiration, strike, type]`` rows.
+        
+        Args:
+            symbol: Underlying symbol
+            contracts: Contract rows
+            
+        Returns:
+            Options chain
+        """
+        rows = [
+            (str(expiration), OPTION_TYPES.index(option_type.lower()), float(strike), ticker)
+            for ticker, expiration, strike, option_type in contracts
+        ]
+        rows.sort()
+        
+        tickers = sorted({row[3] for row in rows})
+        ticker_index = {ticker: i for i, ticker in enumerate(tickers)}
+        
+        expirations = sorted({row[0] for row in rows})
+        expiration_index = {exp: i for i, exp in enumerate(expirations)}
+        
+        count = len(rows)
+        strikes = np.fromiter((row[2] for row in rows), dtype=np.float64, count=count)
+        types = np.fromiter((row[1] for row in rows), dtype=np.int8, count=count)
+        ticker_ids = np.fromiter((ticker_index[row[3]] for row in rows), dtype=np.int32, count=count)
+        
+        # Block id = expiration * 2 + type; rows are already grouped by it
+        block_ids = np.fromiter(
+            (expiration_index[row[0]] * 2 + row[1] for row in rows),
+            dtype=np.int64,
+            count=count
+        )
+        bounds = np.searchsorted(block_ids, np.arange(2 * len(expirations) + 1)).astype(np.int64)
+        
+        return cls(symbol, expirations, bounds, strikes, types, ticker_ids, tickers)
+    
+    def __len__(self) -> int:
+        """Number of contracts."""
+        return len(self.strikes)
+    
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the arrays and ticker dictionary."""
+        arrays = self.bounds.nbytes + self.strikes.nbytes + self.types.nbytes + self.ticker_ids.nbytes
+        return arrays + sum(len(t) for t in self.tickers)
+    
+    def _block(self, expiration: str, option_type: str) -> Tuple[int, int]:
+        """Offsets of the (expiration, type) block, or (0, 0) if absent."""
+        index = self._expiration_index.get(str(expiration))
+        if index is None:
+            return 0, 0
+        
+        block = index * 2 + OPTION_TYPES.index(option_type)
+        return int(self.bounds[block]), int(self.bounds[block + 1])
+    
+    def _contract(self, position: int, expiration: str) -> Dict[str, Any]:
+        """Contract dict for an array position."""
+        return {
+            'symbol': self.tickers[self.ticker_ids[position]],
+            'strike': float(self.strikes[position]),
+            'expiration': str(expiration),
+            'type': OPTION_TYPES[self.types[position]],
+        }
+    
+    def get_strikes(self, expiration: str, option_type: str) -> np.ndarray:
+        """
+        Get the sorted strikes for an expiration and type.
+        
+        Args:
+            expiration: ISO expiration date
+            option_type: "call" or "put"
+            
+        Returns:
+            Read-only view of the strike array
+        """
+        lo, hi = self._block(expiration, option_type)
+        view = self.strikes[lo:hi]
+        view.flags.writeable = False
+        return view
+    
+    def nearest(
+        self,
+        expiration: str,
+        option_type: str,
+        target_strike: float
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find the contract whose strike is closest to a target, in O(log n).
+        
+        Args:
+            expiration: ISO expiration date
+            option_type: "call" or "put"
+            target_strike: Desired strike
+            
+        Returns:
+            Contract dict or None if the block is empty
+        """
+        lo, hi = self._block(expiration, option_type)
+        if lo == hi:
+            return None
+        
+        i = lo + int(np.searchsorted(self.strikes[lo:hi], target_strike))
+        
+        if i == hi:
+            best = hi - 1
+        elif i == lo:
+            best = lo
+        else:
+            below, above = self.strikes[i - 1], self.strikes[i]
+            best = i - 1 if target_strike - below <= above - target_strike else i
+        
+        return self._contract(best, expiration)
+    
+    def strike_range(
+        self,
+        expiration: str,
+        option_type: str,
+        low: float,
+        high: float
+    ) -> List[Dict[str, Any]]:
+        """
+        Get contracts with low <= strike <= high, in O(log n + k).
+        
+        Args:
+            expiration: ISO expiration date
+            option_type: "call" or "put"
+            low: Lowest strike
+            high: Highest strike
+            
+        Returns:
+            Contract dicts ordered by strike
+        """
+        lo, hi = self._block(expiration, option_type)
+        block = self.strikes[lo:hi]
+        
+        start = lo + int(np.searchsorted(block, low, side='left'))
+        end = lo + int(np.searchsorted(block, high, side='right'))
+        
+        return [self._contract(i, expiration) for i in range(start, end)]
+    
+    def to_bytes(self) -> bytes:
+        """Serialize to a compact compressed binary blob."""
+        header = json.dumps({
+            'symbol': self.symbol,
+            'expirations': self.expirations,
+            'tickers': self.tickers,
+            'count': len(self.strikes),
+        }, separators=(',', ':')).encode()
+        
+        payload = b''.join([
+            struct.pack('<4sI', self.MAGIC, len(header)),
+            header,
+            self.bounds.astype('<i8').tobytes(),
+            self.strikes.astype('<f8').tobytes(),
+            self.types.astype('<i1').tobytes(),
+            self.ticker_ids.astype('<i4').tobytes(),
+        ])
+        
+        return zlib.compress(payload, 6)
+    
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> 'OptionsChain':
+        """
+        Deserialize a blob produced by ``to_bytes``.
+        
+        Raises:
+            ValueError: If the blob is not a serialized chain
+        """
+        payload = zlib.decompress(blob)
+        magic, header_len = struct.unpack_from('<4sI', payload)
+        if magic != cls.MAGIC:
+            raise ValueError("Not a serialized options chain")
+        
+        offset = struct.calcsize('<4sI')
+        header = json.loads(payload[offset:offset + header_len])
+        offset += header_len
+        
+        count = header['count']
+        block_count = 2 * len(header['expirations']) + 1
+        
+        def take(dtype: str, n: int) -> np.ndarray:
+            nonlocal offset
+            array = np.frombuffer(payload, dtype=dtype, count=n, offset=offset)
+            offset += array.nbytes
+            return array
+        
+        bounds = take('<i8', block_count)
+        strikes = take('<f8', count)
+        types = take('<i1', count)
+        ticker_ids = take('<i4', count)
+        
+        return cls(
+            header['symbol'],
+            header['expirations'],
+            bounds,
+            strikes,
+            types,
+            ticker_ids,
+            header['tickers']
+        )
@@ -0,0 +1,268 @@
+"""
+Multi-provider request routing with hedging, circuit breakers and health scores.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import numpy as np
+from loguru import logger
+
+from config import settings
+
+
+# Latency samples kept per provider
+LATENCY_WINDOW = 200
+# Samples needed before the measured p95 replaces the default hedge delay
+MIN_LATENCY_SAMPLES = 20
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class ProviderHealth:
+    """Latency distribution, success rate and circuit breaker for one provider."""
+    
+    def __init__(self, name: str):
+        """
+        Initialize provider health.
+        
+        Args:
+            name: Provider name
+        """
+        self.name = name
+        
+        self._latencies: deque = deque(maxlen=LATENCY_WINDOW)
+        # Exponentially weighted success rate
+        self._success_rate = 1.0
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.state = CLOSED
+        
+        self._stats = {'calls': 0, 'successes': 0, 'empty': 0, 'failures': 0, 'short_circuited': 0, 'wins': 0}
+    
+    def allow(self) -> bool:
+        """Whether a call may be sent (one trial call when half-open)."""
+        if self.state == OPEN:
+            if time.monotonic() - self._opened_at < settings.circuit_breaker_cooldown:
+                self._stats['short_circuited'] += 1
+                return False
+            self.state = HALF_OPEN
+            self._trial_in_flight = False
+        
+        if self.state == HALF_OPEN:
+            if self._trial_in_flight:
+                self._stats['short_circuited'] += 1
+                return False
+            self._trial_in_flight = True
+        
+        self._stats['calls'] += 1
+        return True
+    
+    def record(self, latency: float, ok: bool, empty: bool = False):
+        """
+        Record the outcome of a call.
+        
+        Args:
+            latency: Seconds the call took
+            ok: False for errors and timeouts
+            empty: True when the provider answered without data (not a fault)
+        """
+        self._trial_in_flight = False
+        
+        if not ok:
+            self._stats['failures'] += 1
+            self._success_rate = 0.9 * self._success_rate
+            self._consecutive_failures += 1
+            if self.state == HALF_OPEN or self._consecutive_failures >= settings.circuit_breaker_failures:
+                if self.state != OPEN:
+                    logger.warning(f"Circuit breaker for {self.name} opened after {self._consecutive_failures} failures")
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+            return
+        
+        # Empty answers include rate-limit deferrals, which say nothing about latency
+        if not empty:
+            self._latencies.append(latency)
+        self._success_rate = 0.9 * self._success_rate + 0.1
+        self._consecutive_failures = 0
+        self._stats['empty' if empty else 'successes'] += 1
+        
+        if self.state != CLOSED:
+            logger.info(f"Circuit breaker for {self.name} closed")
+            self.state = CLOSED
+    
+    def release(self):
+        """Forget a call that was cancelled before it finished."""
+        self._trial_in_flight = False
+    
+    def win(self):
+        """Count a call whose result was the one returned."""
+        self._stats['wins'] += 1
+    
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency percentile in seconds, or None without enough samples."""
+        if len(self._latencies) < MIN_LATENCY_SAMPLES:
+            return None
+        return float(np.percentile(self._latencies, q))
+    
+    def score(self) -> float:
+        """
+        Health score in [0, 1]: success rate discounted by median latency.
+        
+        Open circuits score 0.
+        """
+        if self.state == OPEN:
+            return 0.0
+        p50 = self.percentile(50)
+        latency_factor = 1.0 if p50 is None else 1.0 / (1.0 + p50)
+        return round(self._success_rate * latency_factor, 4)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get call counters, latency percentiles and breaker state."""
+        latencies = {
+            f"p{q}_ms": round(value * 1000, 1)
+            for q in (50, 95, 99)
+            for value in [self.percentile(q)]
+            if value is not None
+        }
+        return dict(self._stats, state=self.state, score=self.score(), success_rate=round(self._success_rate, 4), **latencies)
+
+
+class ProviderRouter:
+    """
+    Serve one kind of request from whichever provider answers first.
+    
+    Providers are tried in order of health score. If the preferred one
+    hasn't answered by its own p95 latency, the next one is started as a
+    hedge and the first usable answer wins; the slower call is cancelled.
+    Errors and empty answers move on to the next provider immediately.
+    """
+    
+    # Every router, by name, for the metrics endpoint
+    _routers: Dict[str, 'ProviderRouter'] = {}
+    
+    def __init__(self, name: str, providers: List[str]):
+        """
+        Initialize provider router.
+        
+        Args:
+            name: Request kind (e.g. "stock_quotes")
+            providers: Provider names, in default preference order
+        """
+        self.name = name
+        self.health = {provider: ProviderHealth(f"{name}/{provider}") for provider in providers}
+        self._stats = {'requests': 0, 'hedged': 0, 'hedge_wins': 0, 'exhausted': 0}
+        
+        ProviderRouter._routers[name] = self
+    
+    def _ranked(self, available: List[str]) -> List[str]:
+        """Providers ordered by health score (stable for ties)."""
+        return sorted(available, key=lambda p: -self.health[p].score())
+    
+    def _hedge_delay(self, provider: str) -> float:
+        """Seconds to wait on a provider before hedging."""
+        p95 = self.health[provider].percentile(95)
+        if p95 is None:
+            return settings.quote_hedge_default_delay
+        return min(max(p95, settings.quote_hedge_min_delay), settings.quote_hedge_max_delay)
+    
+    async def call(
+        self,
+        attempts: Dict[str, Callable[[], Awaitable[Any]]],
+        is_empty: Callable[[Any], bool] = lambda result: not result
+    ) -> Optional[Any]:
+        """
+        Run a request against the providers.
+        
+        Args:
+            attempts: Provider name -> coroutine function making the request
+            is_empty: Whether a result carries no data
+            
+        Returns:
+            The first non-empty result, or None if every provider failed,
+            was short-circuited or had nothing
+        """
+        self._stats['requests'] += 1
+        pending = self._ranked([p for p in attempts if p in self.health])
+        running: Dict[asyncio.Task, tuple] = {}
+        
+        async def timed(provider: str):
+            return await asyncio.wait_for(attempts[provider](), timeout=settings.quote_provider_timeout)
+        
+        def start_next() -> bool:
+            while pending:
+                provider = pending.pop(0)
+                if self.health[provider].allow():
+                    task = asyncio.ensure_future(timed(provider))
+                    running[task] = (provider, time.monotonic())
+                    return True
+            return False
+        
+        try:
+            if not start_next():
+                self._stats['exhausted'] += 1
+                return None
+            
+            first = next(iter(running.values()))[0]
+            hedged = False
+            while running:
+                # Hedge once the leading call has run past its p95
+                timeout = None
+                if not hedged and pending and settings.quote_hedge_enabled and len(running) == 1:
+                    provider, started = next(iter(running.values()))
+                    timeout = max(self._hedge_delay(provider) - (time.monotonic() - started), 0)
+                
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                
+                if not done:
+                    if start_next():
+                        hedged = True
+                        self._stats['hedged'] += 1
+                    continue
+                
+                for task in done:
+                    provider, started = running.pop(task)
+                    latency = time.monotonic() - started
+                    
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        logger.debug(f"{self.name} via {provider} failed: {e!r}")
+                        self.health[provider].record(latency, ok=False)
+                        continue
+                    
+                    empty = is_empty(result)
+                    self.health[provider].record(latency, ok=True, empty=empty)
+                    if not empty:
+                        self.health[provider].win()
+                        if hedged and provider != first:
+                            self._stats['hedge_wins'] += 1
+                        return result
+                
+                # Everything in flight failed or was empty - try the next provider now
+                if not running and not start_next():
+                    break
+            
+            self._stats['exhausted'] += 1
+            return None
+            
+        finally:
+            # Cancel the slower (or abandoned) calls
+            for task, (provider, _) in running.items():
+                task.cancel()
+                self.health[provider].release()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get request, hedge and per-provider health counters."""
+        return dict(
+            self._stats,
+            providers={provider: health.get_stats() for provider, health in self.health.items()}
+        )
+    
+    @classmethod
+    def get_all_stats(cls) -> Dict[str, Dict[str, Any]]:
+        """Get counters for every router."""
+        return {name: router.get_stats() for name, router in cls._routers.items()}
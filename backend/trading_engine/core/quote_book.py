@@ -0,0 +1,152 @@
+"""
+In-process book of the latest streamed quotes.
+"""
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from core.shared_quote_book import SharedQuoteBook
+
+
+class QuoteBook:
+    """Latest bid/ask per symbol, written by the quote stream."""
+    
+    def __init__(self):
+        """Initialize quote book."""
+        self._quotes: Dict[str, Dict[str, Any]] = {}
+        # Written from the engine loop, read from the API server thread too
+        self._lock = threading.Lock()
+        self._stats = {'updates': 0, 'hits': 0, 'misses': 0, 'stale': 0}
+        # Shared-memory copy for readers in other processes
+        self._shared: Optional[SharedQuoteBook] = None
+    
+    def share(self, shared: SharedQuoteBook):
+        """
+        Write every update through to a shared-memory quote book.
+        
+        Args:
+            shared: Segment created by this process
+        """
+        with self._lock:
+            self._shared = shared
+            for symbol, quote in self._quotes.items():
+                shared.write(
+                    symbol, quote['bid'], quote['ask'], quote['bid_size'], quote['ask_size'], quote['received_at']
+                )
+    
+    @staticmethod
+    def normalize(symbol: str) -> str:
+        """Strip the Polygon "O:" prefix so option tickers match the broker feed."""
+        return symbol[2:] if symbol.startswith('O:') else symbol
+    
+    def update(
+        self,
+        symbol: str,
+        bid: float,
+        ask: float,
+        bid_size: float = 0,
+        ask_size: float = 0,
+        timestamp: Optional[str] = None
+    ):
+        """
+        Record the latest quote for a symbol.
+        
+        Args:
+            symbol: Stock or option symbol
+            bid: Bid price
+            ask: Ask price
+            bid_size: Bid size
+            ask_size: Ask size
+            timestamp: Exchange timestamp as reported by the feed
+        """
+        if not bid or not ask or bid <= 0 or ask <= 0:
+            return
+        
+        quote = {
+            'bid': bid,
+            'ask': ask,
+            'bid_size': bid_size,
+            'ask_size': ask_size,
+            'mid': (bid + ask) / 2,
+            'spread': ask - bid,
+            'spread_pct': ((ask - bid) / ask) * 100,
+            'timestamp': timestamp,
+            'received_at': time.time(),
+        }
+        
+        symbol = self.normalize(symbol)
+        
+        with self._lock:
+            self._quotes[symbol] = quote
+            self._stats['updates'] += 1
+            if self._shared is not None:
+                self._shared.write(symbol, bid, ask, bid_size, ask_size, quote['received_at'])
+    
+    def get(self, symbol: str, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get the latest quote for a symbol.
+        
+        Args:
+            symbol: Stock or option symbol
+            max_age: Ignore quotes received more than this many seconds ago
+            
+        Returns:
+            Quote dict or None if missing or too old
+        """
+        with self._lock:
+            quote = self._quotes.get(self.normalize(symbol))
+            
+            if quote is None:
+                self._stats['misses'] += 1
+                return None
+            
+            if max_age is not None and time.time() - quote['received_at'] > max_age:
+                self._stats['stale'] += 1
+                return None
+            
+            self._stats['hits'] += 1
+            return dict(quote)
+    
+    def get_prices(self, symbols: Iterable[str], max_age: Optional[float] = None) -> Dict[str, float]:
+        """
+        Get mid prices for several symbols.
+        
+        Args:
+            symbols: Stock or option symbols
+            max_age: Ignore quotes received more than this many seconds ago
+            
+        Returns:
+            Mapping of symbol to mid price for the symbols with a fresh quote
+        """
+        prices = {}
+        for symbol in symbols:
+            quote = self.get(symbol, max_age)
+            if quote:
+                prices[symbol] = quote['mid']
+        return prices
+    
+    def remove(self, symbols: Iterable[str]):
+        """Drop quotes for symbols that are no longer subscribed."""
+        symbols = [self.normalize(symbol) for symbol in symbols]
+        
+        with self._lock:
+            for symbol in symbols:
+                self._quotes.pop(symbol, None)
+            if self._shared is not None:
+                self._shared.clear(symbols)
+    
+    def symbols(self) -> List[str]:
+        """Get all symbols in the book."""
+        with self._lock:
+            return list(self._quotes.keys())
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Get book size and hit counters."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['symbols'] = len(self._quotes)
+            return stats
+
+
+# Global quote book instance
+quote_book = QuoteBook()
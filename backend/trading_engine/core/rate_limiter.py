@@ -0,0 +1,236 @@
+"""
+Token-bucket rate limiting shared across coroutines, threads and replicas.
+"""
+import asyncio
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from loguru import logger
+
+from config import settings
+from core.redis_manager import redis_manager, CacheKeys
+
+
+# Refill and take tokens atomically. Uses the Redis clock so every replica
+# sees the same bucket state.
+TOKEN_BUCKET_SCRIPT = """
+local key = KEYS[1]
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local reserve = tonumber(ARGV[4])
+
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+
+local state = redis.call('HMGET', key, 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil or ts == nil then
+    tokens = capacity
+    ts = now
+end
+
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local wait = 0
+if tokens - cost >= reserve then
+    tokens = tokens - cost
+    allowed = 1
+else
+    wait = (cost + reserve - tokens) / rate
+end
+
+redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', key, math.ceil(capacity / rate * 1000) + 1000)
+
+return {allowed, tostring(wait)}
+"""
+
+
+class TokenBucket:
+    """Redis-backed token bucket with burst capacity and weighted costs."""
+    
+    def __init__(
+        self,
+        service: str,
+        rate_per_second: float,
+        capacity: float,
+        identifier: str = "global"
+    ):
+        """
+        Initialize token bucket.
+        
+        Args:
+            service: Provider name (e.g. "alpaca")
+            rate_per_second: Sustained refill rate
+            capacity: Maximum burst size in tokens
+            identifier: Bucket identifier within the service
+        """
+        self.service = service
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.key = CacheKeys.rate_limit(service, identifier)
+        
+        self._script = redis_manager.client.register_script(TOKEN_BUCKET_SCRIPT)
+        
+        # Process-local fallback used while Redis is unreachable
+        self._local_lock = threading.Lock()
+        self._local_tokens = capacity
+        self._local_ts = time.monotonic()
+        
+        self.stats = {'granted': 0, 'waited': 0, 'deferred': 0, 'fallback': 0}
+    
+    def try_acquire(self, cost: float = 1.0, reserve: float = 0.0) -> Tuple[bool, float]:
+        """
+        Try to take tokens without waiting.
+        
+        Args:
+            cost: Number of tokens the call consumes
+            reserve: Tokens that must be left in the bucket afterwards, kept
+                for more important callers
+            
+        Returns:
+            Tuple of (granted, seconds until enough tokens are available)
+        """
+        cost = min(cost, self.capacity)
+        reserve = min(max(reserve, 0.0), self.capacity - cost)
+        
+        try:
+            allowed, wait = self._script(
+                keys=[self.key],
+                args=[self.rate, self.capacity, cost, reserve]
+            )
+            return bool(int(allowed)), float(wait)
+        except Exception as e:
+            logger.warning(f"Rate limiter falling back to local bucket for {self.service}: {e}")
+            self.stats['fallback'] += 1
+            return self._try_acquire_local(cost, reserve)
+    
+    def _try_acquire_local(self, cost: float, reserve: float) -> Tuple[bool, float]:
+        """Take tokens from the in-process bucket."""
+        with self._local_lock:
+            now = time.monotonic()
+            self._local_tokens = min(
+                self.capacity,
+                self._local_tokens + (now - self._local_ts) * self.rate
+            )
+            self._local_ts = now
+            
+            if self._local_tokens - cost >= reserve:
+                self._local_tokens -= cost
+                return True, 0.0
+            
+            return False, (cost + reserve - self._local_tokens) / self.rate
+    
+    async def acquire(
+        self,
+        cost: float = 1.0,
+        max_wait: Optional[float] = None,
+        reserve: float = 0.0
+    ) -> bool:
+        """
+        Take tokens, waiting for the bucket to refill if needed.
+        
+        Args:
+            cost: Number of tokens the call consumes
+            max_wait: Maximum seconds to wait. None waits as long as needed,
+                0 never sleeps. When the wait would exceed this the call is
+                refused so the caller can defer or serve stale data.
+            reserve: Tokens that must be left in the bucket afterwards
+                
+        Returns:
+            True if the tokens were granted
+        """
+        waited = 0.0
+        
+        while True:
+            granted, wait = self.try_acquire(cost, reserve)
+            
+            if granted:
+                self.stats['granted'] += 1
+                if waited:
+                    self.stats['waited'] += 1
+                return True
+            
+            if max_wait is not None and waited + wait > max_wait:
+                self.stats['deferred'] += 1
+                return False
+            
+            await asyncio.sleep(wait)
+            waited += wait
+
+
+class RateLimiter:
+    """Registry of token buckets for the external providers."""
+    
+    def __init__(self):
+        """Initialize rate limiter."""
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+    
+    def _bucket_config(self, service: str) -> Tuple[float, float]:
+        """Return (rate per second, burst capacity) for a provider."""
+        configs = {
+            'alpaca': (settings.alpaca_rate_limit / 60, settings.alpaca_rate_burst),
+            'polygon': (settings.polygon_rate_limit / 60, settings.polygon_rate_burst),
+            'news_api': (settings.news_api_rate_limit / 86400, settings.news_api_rate_burst),
+        }
+        
+        if service not in configs:
+            raise ValueError(f"No rate limit configured for service '{service}'")
+        
+        rate, burst = configs[service]
+        return rate, max(1.0, float(burst))
+    
+    def bucket(self, service: str, identifier: str = "global") -> TokenBucket:
+        """
+        Get (or create) the bucket for a provider.
+        
+        Args:
+            service: Provider name
+            identifier: Bucket identifier within the service
+            
+        Returns:
+            Token bucket
+        """
+        name = f"{service}:{identifier}"
+        
+        with self._lock:
+            if name not in self._buckets:
+                rate, capacity = self._bucket_config(service)
+                self._buckets[name] = TokenBucket(service, rate, capacity, identifier)
+            return self._buckets[name]
+    
+    async def acquire(
+        self,
+        service: str,
+        cost: float = 1.0,
+        max_wait: Optional[float] = None,
+        identifier: str = "global",
+        reserve: float = 0.0
+    ) -> bool:
+        """
+        Take tokens from a provider's bucket.
+        
+        Args:
+            service: Provider name
+            cost: Number of tokens the call consumes
+            max_wait: Maximum seconds to wait (see TokenBucket.acquire)
+            identifier: Bucket identifier within the service
+            reserve: Tokens that must be left in the bucket afterwards
+            
+        Returns:
+            True if the tokens were granted
+        """
+        return await self.bucket(service, identifier).acquire(cost, max_wait, reserve)
+    
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """Get per-bucket counters."""
+        with self._lock:
+            return {name: dict(bucket.stats) for name, bucket in self._buckets.items()}
+
+
+# Global rate limiter instance
+rate_limiter = RateLimiter()
@@ -0,0 +1,383 @@
+"""
+Record and replay of provider responses for offline, deterministic runs.
+"""
+import asyncio
+import glob
+import gzip
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from collections import deque
+from datetime import date, datetime, timezone
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, Optional, Tuple
+import aiohttp
+from loguru import logger
+
+from config import settings
+
+
+OFF = 'off'
+RECORD = 'record'
+REPLAY = 'replay'
+
+# Query parameters that never go into recordings or keys
+SECRET_PARAMS = frozenset({'apiKey', 'apikey', 'api_key', 'token'})
+
+# Records written between gzip flushes
+FLUSH_EVERY = 100
+
+
+class ReplayMissError(Exception):
+    """Raised in replay mode when no response was recorded for a request."""
+    pass
+
+
+class ProviderRecorder:
+    """
+    Capture provider responses to disk, or serve them back instead of the network.
+    
+    In ``record`` mode every call passed through ``call`` is executed and its
+    result (or exception), latency and time offset are appended as pickle
+    records to a gzip file under ``provider_record_path``. In ``replay`` mode
+    the same calls are answered from a recording: responses are served in
+    recorded order per request key, after sleeping the recorded latency
+    divided by ``provider_replay_speed`` (0 disables the sleeps).
+    
+    Request keys are built from the provider, operation and parameters with
+    secrets dropped and dates/datetimes masked, so a session recorded on one
+    day replays on another.
+    """
+    
+    def __init__(self):
+        """Initialize provider recorder."""
+        self.mode = settings.provider_record_mode.lower()
+        self.speed = settings.provider_replay_speed
+        
+        self._lock = threading.Lock()
+        self._file: Optional[gzip.GzipFile] = None
+        self._path: Optional[str] = None
+        self._started = time.monotonic()
+        self._unflushed = 0
+        
+        # key -> recorded responses not yet served, and the last one served
+        self._responses: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._last: Dict[str, Dict[str, Any]] = {}
+        self._loaded = False
+        
+        self._stats = {'recorded': 0, 'replayed': 0, 'repeated': 0, 'misses': 0, 'errors': 0}
+    
+    @property
+    def recording(self) -> bool:
+        """Whether responses are being captured."""
+        return self.mode == RECORD
+    
+    @property
+    def replaying(self) -> bool:
+        """Whether responses are served from a recording."""
+        return self.mode == REPLAY
+    
+    @classmethod
+    def _normalize(cls, value: Any) -> Any:
+        """Reduce request parameters to a stable, secret-free structure."""
+        if isinstance(value, (datetime, date)):
+            return '<date>'
+        if isinstance(value, dict):
+            return {
+                str(k): cls._normalize(v)
+                for k, v in sorted(value.items(), key=lambda item: str(item[0]))
+                if k not in SECRET_PARAMS
+            }
+        if isinstance(value, (list, tuple, set, frozenset)):
+            items = [cls._normalize(v) for v in value]
+            return sorted(items, key=repr) if isinstance(value, (set, frozenset)) else items
+        if hasattr(value, 'model_dump'):
+            return cls._normalize(value.model_dump())
+        if hasattr(value, 'dict') and callable(value.dict):
+            return cls._normalize(value.dict())
+        return value
+    
+    def request_key(self, provider: str, operation: str, params: Any = None) -> str:
+        """
+        Key identifying a request across recording and replay.
+        
+        Args:
+            provider: Provider name
+            operation: SDK method or endpoint path
+            params: Request arguments or query parameters
+            
+        Returns:
+            ``provider:operation:digest``
+        """
+        digest = hashlib.sha1(repr(self._normalize(params)).encode()).hexdigest()[:16]
+        return f"{provider}:{operation}:{digest}"
+    
+    async def call(
+        self,
+        provider: str,
+        operation: str,
+        params: Any,
+        fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Run a provider request through the recorder.
+        
+        Args:
+            provider: Provider name
+            operation: SDK method or endpoint path
+            params: Request arguments used for the key
+            fetch: Coroutine function making the live request
+            
+        Returns:
+            The live or recorded response (recorded exceptions are re-raised)
+        """
+        if self.mode == OFF:
+            return await fetch()
+        
+        key = self.request_key(provider, operation, params)
+        
+        if self.replaying:
+            return await self._replay(key)
+        
+        started = time.monotonic()
+        try:
+            result = await fetch()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._write(key, provider, operation, started, error=e)
+            raise
+        
+        self._write(key, provider, operation, started, result=result)
+        return result
+    
+    async def get_json(
+        self,
+        provider: str,
+        session: Any,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        volatile: Iterable[str] = ()
+    ) -> Tuple[int, Any]:
+        """
+        GET a JSON endpoint through the recorder.
+        
+        Args:
+            provider: Provider name
+            session: aiohttp client session
+            url: Endpoint URL
+            params: Query parameters
+            headers: Request headers (never recorded)
+            volatile: Query parameters left out of the key (e.g. time windows)
+            
+        Returns:
+            (HTTP status, decoded body or None for non-200 responses)
+        """
+        async def fetch():
+            async with session.get(url, params=params, headers=headers) as response:
+                if response.status != 200:
+                    return response.status, None
+                return response.status, await response.json()
+        
+        skip = set(volatile)
+        key_params = {k: v for k, v in (params or {}).items() if k not in skip}
+        return await self.call(provider, url.split('?')[0], key_params, fetch)
+    
+    async def stream_json(
+        self,
+        provider: str,
+        transport: Any,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        volatile: Iterable[str] = ()
+    ) -> Tuple[int, Any]:
+        """
+        GET a large JSON endpoint through the recorder, streaming the body.
+        
+        Chunks are collected into one buffer and decoded from bytes, instead
+        of aiohttp buffering the body and decoding it to text first.
+        
+        Args:
+            provider: Provider name
+            transport: HTTP transport (see core.http_transport)
+            url: Endpoint URL
+            params: Query parameters
+            headers: Request headers (never recorded)
+            volatile: Query parameters left out of the key (e.g. time windows)
+            
+        Returns:
+            (HTTP status, decoded body or None for non-200 responses)
+        """
+        async def fetch():
+            body = bytearray()
+            try:
+                async for chunk in transport.stream(url, params=params, headers=headers):
+                    body += chunk
+            except aiohttp.ClientResponseError as e:
+                return e.status, None
+            return 200, json.loads(body)
+        
+        skip = set(volatile)
+        key_params = {k: v for k, v in (params or {}).items() if k not in skip}
+        return await self.call(provider, url.split('?')[0], key_params, fetch)
+    
+    def _write(
+        self,
+        key: str,
+        provider: str,
+        operation: str,
+        started: float,
+        result: Any = None,
+        error: Optional[BaseException] = None
+    ):
+        """Append one response record to the recording."""
+        record = {
+            'key': key,
+            'provider': provider,
+            'operation': operation,
+            'offset': round(started - self._started, 6),
+            'latency': round(time.monotonic() - started, 6),
+        }
+        
+        if error is not None:
+            try:
+                pickle.dumps(error)
+                record['error'] = error
+            except Exception:
+                record['error'] = RuntimeError(f"{type(error).__name__}: {error}")
+        else:
+            record['result'] = result
+        
+        try:
+            payload = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.warning(f"Response for {key} is not recordable: {e}")
+            self._stats['errors'] += 1
+            return
+        
+        with self._lock:
+            try:
+                if self._file is None:
+                    self._open()
+                self._file.write(payload)
+                self._stats['recorded'] += 1
+                
+                self._unflushed += 1
+                if self._unflushed >= FLUSH_EVERY:
+                    self._file.flush()
+                    self._unflushed = 0
+            except Exception as e:
+                logger.error(f"Error writing recording {self._path}: {e}")
+                self._stats['errors'] += 1
+    
+    def _open(self):
+        """Start a new recording file (lock held)."""
+        os.makedirs(settings.provider_record_path, exist_ok=True)
+        started = datetime.now(timezone.utc)
+        self._path = os.path.join(
+            settings.provider_record_path,
+            f"session-{started.strftime('%Y%m%dT%H%M%SZ')}.pkl.gz"
+        )
+        self._file = gzip.open(self._path, 'wb')
+        self._file.write(pickle.dumps({'format': 1, 'started': started.isoformat()}))
+        logger.info(f"Recording provider responses to {self._path}")
+    
+    def _replay_file(self) -> Optional[str]:
+        """The configured recording, or the newest one under the record path."""
+        if settings.provider_replay_file:
+            return settings.provider_replay_file
+        
+        files = glob.glob(os.path.join(settings.provider_record_path, '*.pkl.gz'))
+        return max(files, key=os.path.getmtime) if files else None
+    
+    def load(self) -> int:
+        """
+        Load the recording to replay (blocking).
+        
+        A recording cut short by a crash is read up to its last complete record.
+        
+        Returns:
+            Number of responses loaded
+        """
+        with self._lock:
+            if self._loaded:
+                return sum(len(responses) for responses in self._responses.values())
+            self._loaded = True
+            
+            path = self._replay_file()
+            if path is None:
+                logger.error(f"No recordings found in {settings.provider_record_path}")
+                return 0
+            
+            count = 0
+            try:
+                with gzip.open(path, 'rb') as f:
+                    pickle.load(f)  # header
+                    while True:
+                        record = pickle.load(f)
+                        self._responses.setdefault(record['key'], deque()).append(record)
+                        count += 1
+            except EOFError:
+                pass
+            except Exception as e:
+                logger.warning(f"Recording {path} ends early after {count} responses: {e}")
+            
+            self._path = path
+            logger.info(f"Replaying {count} provider responses from {path}")
+            return count
+    
+    async def _replay(self, key: str) -> Any:
+        """Serve the next recorded response for a key."""
+        if not self._loaded:
+            await asyncio.to_thread(self.load)
+        
+        responses = self._responses.get(key)
+        if responses:
+            record = responses.popleft()
+            self._last[key] = record
+            self._stats['replayed'] += 1
+        elif key in self._last:
+            # Replay ran more cycles than were recorded - keep the last answer
+            record = self._last[key]
+            self._stats['repeated'] += 1
+        else:
+            self._stats['misses'] += 1
+            raise ReplayMissError(f"No recorded response for {key}")
+        
+        if self.speed > 0 and record['latency'] > 0:
+            await asyncio.sleep(record['latency'] / self.speed)
+        
+        if 'error' in record:
+            raise record['error']
+        return record['result']
+    
+    def scale(self, delay: float) -> float:
+        """Scale a wall-clock delay by the replay speed."""
+        if self.replaying and self.speed > 0:
+            return delay / self.speed
+        return delay
+    
+    def close(self):
+        """Finish the current recording."""
+        with self._lock:
+            if self._file is not None:
+                try:
+                    self._file.close()
+                    logger.info(f"Recorded {self._stats['recorded']} provider responses to {self._path}")
+                except Exception as e:
+                    logger.error(f"Error closing recording {self._path}: {e}")
+                self._file = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get mode, file and record/replay counters."""
+        with self._lock:
+            remaining = sum(len(responses) for responses in self._responses.values())
+        return dict(self._stats, mode=self.mode, speed=self.speed, file=self._path, remaining=remaining)
+
+
+# Global provider recorder instance
+provider_recorder = ProviderRecorder()
@@ -2,12 +2,22 @@
 Redis connection and caching management.
 """
 import json
+import os
+import threading
+import time
 from typing import Any, Optional, Dict, List
 from datetime import timedelta
 import redis
 from loguru import logger
 
 from config import settings
+from core.local_cache import LocalCache
+
+
+# Channel Redis redirects client-side tracking invalidations to (RESP2)
+INVALIDATION_CHANNEL = '__redis__:invalidate'
+# Seconds between tracking health checks and reconnect attempts
+TRACKING_CHECK_INTERVAL = 5
 
 
 class RedisManager:
@@ -22,7 +32,31 @@ class RedisManager:
             socket_connect_timeout=5,
             retry_on_timeout=True
         )
+        # Separate client for binary payloads (no UTF-8 decoding)
+        self.binary_client = redis.from_url(
+            settings.redis_url,
+            decode_responses=False,
+            socket_keepalive=True,
+            socket_connect_timeout=5,
+            retry_on_timeout=True
+        )
         self._check_connection()
+        
+        # In-process L1 tier, served only while Redis tracking keeps it coherent
+        self.local_cache: Optional[LocalCache] = None
+        self._tracking = False
+        if settings.l1_cache_enabled:
+            self.local_cache = LocalCache(
+                max_bytes=settings.l1_cache_max_bytes,
+                max_entries=settings.l1_cache_max_entries,
+                ttl=settings.l1_cache_ttl,
+                prefixes=[p.strip() for p in settings.l1_cache_prefixes.split(',') if p.strip()]
+            )
+            threading.Thread(
+                target=self._listen_for_invalidations,
+                name='redis-l1-invalidation',
+                daemon=True
+            ).start()
     
     def _check_connection(self) -> bool:
         """Check Redis connection."""
@@ -34,6 +68,102 @@ class RedisManager:
             logger.error(f"Redis connection failed: {e}")
             raise
     
+    def _listen_for_invalidations(self):
+        """Keep the L1 cache coherent with Redis, reconnecting when tracking is lost."""
+        while True:
+            try:
+                self._track_invalidations()
+            except Exception as e:
+                logger.warning(f"Redis L1 invalidation tracking lost: {e}")
+            
+            # Changes may have been missed - stop serving from memory
+            self._tracking = False
+            self.local_cache.invalidate()
+            time.sleep(TRACKING_CHECK_INTERVAL)
+    
+    def _track_invalidations(self):
+        """
+        Subscribe to client-side tracking invalidations and apply them.
+        
+        One connection subscribes to the invalidation channel; a second,
+        dedicated connection enables broadcast tracking for the cached
+        prefixes and redirects the invalidations to the first. Every write
+        to a matching key, from any process, then evicts it here.
+        """
+        name = f"l1-invalidation-{os.getpid()}"
+        listener = redis.from_url(settings.redis_url, decode_responses=True, client_name=name)
+        tracker = redis.from_url(settings.redis_url, decode_responses=True, single_connection_client=True)
+        pubsub = listener.pubsub()
+        
+        try:
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            pubsub.get_message(timeout=TRACKING_CHECK_INTERVAL)
+            
+            listener_id = next(c['id'] for c in listener.client_list() if c.get('name') == name)
+            tracker.client_tracking_on(
+                clientid=listener_id,
+                prefix=list(self.local_cache.prefixes),
+                bcast=True
+            )
+            tracker_id = tracker.client_id()
+            
+            # Anything cached before tracking started may already be stale
+            self.local_cache.invalidate()
+            self._tracking = True
+            logger.info("Redis L1 cache tracking enabled")
+            
+            last_check = time.monotonic()
+            while True:
+                message = pubsub.get_message(timeout=1.0)
+                if message and message['type'] == 'message':
+                    keys = message['data']
+                    self.local_cache.invalidate([keys] if isinstance(keys, str) else keys)
+                
+                # A silently reconnected tracker no longer has tracking on
+                if time.monotonic() - last_check >= TRACKING_CHECK_INTERVAL:
+                    if tracker.client_id() != tracker_id:
+                        raise redis.ConnectionError("tracking connection was reset")
+                    last_check = time.monotonic()
+        finally:
+            self._tracking = False
+            for connection in (pubsub, tracker, listener):
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+    
+    def _l1(self, key: str) -> Optional[LocalCache]:
+        """The L1 cache if it may serve ``key``."""
+        cache = self.local_cache
+        if cache is not None and self._tracking and cache.cacheable(key):
+            return cache
+        return None
+    
+    def _read(self, client: redis.Redis, key: str) -> Optional[Any]:
+        """GET a raw payload, through the L1 cache for cacheable keys."""
+        cache = self._l1(key)
+        if cache is None:
+            return client.get(key)
+        
+        payload = cache.get(key)
+        if payload is None:
+            version = cache.version()
+            payload = client.get(key)
+            if payload:
+                cache.put(key, payload, version)
+        return payload
+    
+    def _invalidate_local(self, *keys: str):
+        """Drop keys this process just wrote (the tracking message follows later)."""
+        if self.local_cache is not None:
+            self.local_cache.invalidate(keys)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get L1 cache hit ratio, size and tracking state."""
+        if self.local_cache is None:
+            return {'enabled': False}
+        return dict(self.local_cache.get_stats(), enabled=True, tracking=self._tracking)
+    
     def set(self, key: str, value: Any, expiration: Optional[int] = None) -> bool:
         """
         Set a value in Redis.
@@ -49,9 +179,11 @@ class RedisManager:
         try:
             serialized_value = json.dumps(value)
             if expiration:
-                return self.client.setex(key, expiration, serialized_value)
+                result = self.client.setex(key, expiration, serialized_value)
             else:
-                return self.client.set(key, serialized_value)
+                result = self.client.set(key, serialized_value)
+            self._invalidate_local(key)
+            return result
         except Exception as e:
             logger.error(f"Redis SET error for key {key}: {e}")
             return False
@@ -67,7 +199,7 @@ class RedisManager:
             Cached value or None if not found
         """
         try:
-            value = self.client.get(key)
+            value = self._read(self.client, key)
             if value:
                 return json.loads(value)
             return None
@@ -75,6 +207,117 @@ class RedisManager:
             logger.error(f"Redis GET error for key {key}: {e}")
             return None
     
+    def mget(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        Get several values from Redis in one round trip.
+        
+        Keys held by the L1 cache are served from memory; only the rest are
+        requested from Redis.
+        
+        Args:
+            keys: Cache keys
+            
+        Returns:
+            Mapping of key to cached value for the keys that were found
+        """
+        if not keys:
+            return {}
+        try:
+            payloads = {}
+            remote = []
+            for key in keys:
+                cache = self._l1(key)
+                payload = cache.get(key) if cache else None
+                if payload is None:
+                    remote.append(key)
+                else:
+                    payloads[key] = payload
+            
+            if remote:
+                version = self.local_cache.version() if self.local_cache else 0
+                for key, payload in zip(remote, self.client.mget(remote)):
+                    if payload:
+                        payloads[key] = payload
+                        cache = self._l1(key)
+                        if cache:
+                            cache.put(key, payload, version)
+            
+            return {
+                key: json.loads(payloads[key])
+                for key in keys
+                if key in payloads
+            }
+        except Exception as e:
+            logger.error(f"Redis MGET error for {len(keys)} keys: {e}")
+            return {}
+    
+    def mset(self, mapping: Dict[str, Any], expiration: Optional[int] = None) -> bool:
+        """
+        Set several values in Redis in one pipelined round trip.
+        
+        Args:
+            mapping: Mapping of cache key to value (values are JSON serialized)
+            expiration: Expiration time in seconds applied to every key
+            
+        Returns:
+            True if successful
+        """
+        if not mapping:
+            return True
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key, value in mapping.items():
+                serialized_value = json.dumps(value)
+                if expiration:
+                    pipe.setex(key, expiration, serialized_value)
+                else:
+                    pipe.set(key, serialized_value)
+            pipe.execute()
+            self._invalidate_local(*mapping)
+            return True
+        except Exception as e:
+            logger.error(f"Redis MSET error for {len(mapping)} keys: {e}")
+            return False
+    
+    def set_bytes(self, key: str, value: bytes, expiration: Optional[int] = None) -> bool:
+        """
+        Set a raw binary value in Redis.
+        
+        Args:
+            key: Cache key
+            value: Serialized bytes
+            expiration: Expiration time in seconds
+            
+        Returns:
+            True if successful
+        """
+        try:
+            if expiration:
+                result = bool(self.binary_client.setex(key, expiration, value))
+            else:
+                result = bool(self.binary_client.set(key, value))
+            self._invalidate_local(key)
+            return result
+        except Exception as e:
+            logger.error(f"Redis SET (binary) error for key {key}: {e}")
+            return False
+    
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        """
+        Get a raw binary value from Redis.
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Cached bytes or None if not found
+        """
+        try:
+            return self._read(self.binary_client, key)
+        except Exception as e:
+            logger.error(f"Redis GET (binary) error for key {key}: {e}")
+            return None
+    
     def delete(self, key: str) -> bool:
         """
         Delete a key from Redis.
@@ -86,7 +329,9 @@ class RedisManager:
             True if successful
         """
         try:
-            return bool(self.client.delete(key))
+            result = bool(self.client.delete(key))
+            self._invalidate_local(key)
+            return result
         except Exception as e:
             logger.error(f"Redis DELETE error for key {key}: {e}")
             return False
@@ -169,7 +414,9 @@ class RedisManager:
         try:
             keys = self.keys(pattern)
             if keys:
-                return self.client.delete(*keys)
+                deleted = self.client.delete(*keys)
+                self._invalidate_local(*keys)
+                return deleted
             return 0
         except Exception as e:
             logger.error(f"Redis FLUSH error for pattern {pattern}: {e}")
@@ -312,7 +559,10 @@ class RedisManager:
     def flushdb(self) -> bool:
         """Flush current database (use with caution!)."""
         try:
-            return self.client.flushdb()
+            result = self.client.flushdb()
+            if self.local_cache is not None:
+                self.local_cache.invalidate()
+            return result
         except Exception as e:
             logger.error(f"Redis FLUSHDB error: {e}")
             return False
@@ -340,6 +590,36 @@ class CacheKeys:
         """Options chain cache key."""
         return f"options_chain:{symbol}"
     
+    @staticmethod
+    def options_chain_meta(symbol: str) -> str:
+        """Options chain refresh bookkeeping cache key."""
+        return f"options_chain_meta:{symbol}"
+    
+    @staticmethod
+    def options_chain_contracts(symbol: str) -> str:
+        """Options chain raw contract list cache key."""
+        return f"options_chain_contracts:{symbol}"
+    
+    @staticmethod
+    def options_snapshot(symbol: str) -> str:
+        """Options chain snapshot (quotes, volume, OI, Greeks) cache key."""
+        return f"options_snapshot:{symbol}"
+    
+    @staticmethod
+    def iv_history(symbol: str) -> str:
+        """Daily ATM implied volatility history cache key."""
+        return f"iv_history:{symbol}"
+    
+    @staticmethod
+    def universe_assets() -> str:
+        """Optionable asset symbol index cache key."""
+        return "universe:assets"
+    
+    @staticmethod
+    def universe_candidates() -> str:
+        """Ranked universe scan candidates cache key."""
+        return "universe:candidates"
+    
     @staticmethod
     def news_sentiment(symbol: str) -> str:
         """News sentiment cache key."""
@@ -0,0 +1,154 @@
+"""
+Trading-calendar-aware cadence for the engine's background loops.
+"""
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, Optional
+import pytz
+
+from core.recorder import provider_recorder
+from core.trading_calendar import trading_calendar, TradingCalendar, REGULAR
+
+
+class LoopSchedule:
+    """When and how often a background loop runs."""
+    
+    def __init__(
+        self,
+        name: str,
+        interval: float,
+        window: str = REGULAR,
+        idle_interval: Optional[float] = None,
+        lead: float = 0
+    ):
+        """
+        Initialize loop schedule.
+        
+        Args:
+            name: Loop name used in metrics
+            interval: Seconds between runs inside the window
+            window: Session window the loop is active in (REGULAR,
+                EXTENDED or ALWAYS)
+            idle_interval: Seconds between runs outside the window, or None
+                to sleep until the window opens
+            lead: Seconds before the window opens to become active
+        """
+        self.name = name
+        self.interval = interval
+        self.window = window
+        self.idle_interval = idle_interval
+        self.lead = lead
+
+
+class LoopScheduler:
+    """
+    Decide whether a loop should work now and how long it should sleep.
+    
+    Inside its window a loop runs at its normal interval; outside it runs at
+    its idle cadence (if any) and never sleeps past the window's next open.
+    Sleeps end early when the engine stops.
+    """
+    
+    def __init__(self, calendar: TradingCalendar = trading_calendar):
+        """
+        Initialize loop scheduler.
+        
+        Args:
+            calendar: Trading calendar
+        """
+        self.calendar = calendar
+        self._loops: Dict[str, Dict[str, Any]] = {}
+    
+    def _until_open(self, schedule: LoopSchedule, now: datetime) -> Optional[float]:
+        """Seconds until the schedule's window (minus its lead) opens; 0 if active."""
+        next_open = self.calendar.next_open(now, schedule.window)
+        if next_open is None:
+            return None
+        return max((next_open - now).total_seconds() - schedule.lead, 0.0)
+    
+    def is_active(self, schedule: LoopSchedule, now: Optional[datetime] = None) -> bool:
+        """
+        Whether a loop is inside its active window.
+        
+        Args:
+            schedule: Loop schedule
+            now: Reference time (defaults to now)
+            
+        Returns:
+            True inside the window or within its lead time before it opens
+            (always True while replaying a recording)
+        """
+        if provider_recorder.replaying:
+            return True
+        now = now or datetime.now(pytz.utc)
+        return self._until_open(schedule, now) == 0
+    
+    def next_delay(self, schedule: LoopSchedule, now: Optional[datetime] = None) -> float:
+        """
+        Seconds to sleep before the loop's next run.
+        
+        Args:
+            schedule: Loop schedule
+            now: Reference time (defaults to now)
+            
+        Returns:
+            The active interval inside the window; otherwise the idle
+            interval, capped at the time until the window opens
+        """
+        now = now or datetime.now(pytz.utc)
+        until_open = self._until_open(schedule, now)
+        
+        if until_open == 0:
+            return schedule.interval
+        if until_open is None:
+            return schedule.idle_interval or schedule.interval
+        if schedule.idle_interval is None:
+            return until_open
+        return min(schedule.idle_interval, until_open)
+    
+    def should_run(self, schedule: LoopSchedule, now: Optional[datetime] = None) -> bool:
+        """
+        Whether a loop should do its work on this wake-up.
+        
+        Loops with an idle cadence always run; others only inside their window.
+        """
+        active = self.is_active(schedule, now)
+        state = self._loops.setdefault(schedule.name, {'runs': 0, 'skips': 0})
+        state['active'] = active
+        
+        if active or schedule.idle_interval is not None:
+            state['runs'] += 1
+            return True
+        
+        state['skips'] += 1
+        return False
+    
+    async def wait(self, schedule: LoopSchedule, stop: asyncio.Event, delay: Optional[float] = None):
+        """
+        Sleep until the loop's next run or until ``stop`` is set.
+        
+        Args:
+            schedule: Loop schedule
+            stop: Event set when the engine shuts down
+            delay: Override for the computed delay (e.g. error backoff)
+        """
+        if delay is None:
+            delay = self.next_delay(schedule)
+        # Replays run the loops faster along with the provider latencies
+        delay = provider_recorder.scale(delay)
+        
+        state = self._loops.setdefault(schedule.name, {'runs': 0, 'skips': 0})
+        state['next_delay'] = round(delay, 1)
+        
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+    
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get per-loop run and skip counters and the current sleep."""
+        return {name: dict(state) for name, state in self._loops.items()}
+
+
+# Global loop scheduler instance
+loop_scheduler = LoopScheduler()
@@ -0,0 +1,411 @@
+"""
+Quote book in shared memory, written by the engine and read lock-free by other processes.
+"""
+import time
+import zlib
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from loguru import logger
+
+from config import settings
+
+
+MAGIC = 0x51424B31  # "QBK1"
+
+# Header slots (int64)
+H_MAGIC = 0
+H_CAPACITY = 1
+H_COUNT = 2
+H_GENERATION = 3
+HEADER_SIZE = 8
+
+# Quote columns, one float64 array each
+FIELDS = ('bid', 'ask', 'bid_size', 'ask_size', 'received_at')
+
+# Long enough for OCC option symbols (21 characters)
+SYMBOL_BYTES = 24
+
+# Attempts before a reader gives up on a slot being rewritten
+READ_RETRIES = 8
+
+
+def _layout(capacity: int) -> Dict[str, int]:
+    """Byte offsets of the header, sequence numbers, slot tags, quote columns and symbols."""
+    seq = HEADER_SIZE * 8
+    tags = seq + capacity * 8
+    fields = tags + capacity * 8
+    symbols = fields + len(FIELDS) * capacity * 8
+    size = symbols + capacity * SYMBOL_BYTES
+    return {'seq': seq, 'tags': tags, 'fields': fields, 'symbols': symbols, 'size': size}
+
+
+def _tag(symbol: str) -> int:
+    """Process-independent checksum identifying a slot's symbol."""
+    return zlib.crc32(symbol.encode())
+
+
+class SharedQuoteBook:
+    """
+    Fixed-size struct-of-arrays quote table in ``multiprocessing.shared_memory``.
+    
+    The engine creates the segment and is its only writer (through
+    ``QuoteBook``); API workers and analysis processes attach to it by name
+    and read without locks or Redis.
+    
+    Each slot holds one symbol. Writes are guarded by a per-slot seqlock:
+    the sequence number is odd while a slot is being written, and a reader
+    retries when it saw an odd number or the number changed during its
+    read. Slots are assigned append-only; readers learn new symbols from
+    the header count. When the table fills up the writer starts over and
+    bumps the generation, which makes readers rebuild their symbol index.
+    
+    Columns are accessed through typed memoryviews rather than numpy, so a
+    single-field read is a plain buffer load.
+    """
+    
+    def __init__(self, name: Optional[str] = None, capacity: Optional[int] = None):
+        """
+        Initialize shared quote book (not yet created or attached).
+        
+        Args:
+            name: Shared memory segment name
+            capacity: Symbol slots, when creating the segment
+        """
+        self.name = name or settings.shared_quote_book_name
+        self.capacity = capacity or settings.shared_quote_book_capacity
+        
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._owner = False
+        self._views: List[memoryview] = []
+        
+        # symbol -> (slot, tag), and the header count/generation it reflects
+        self._slots: Dict[str, Tuple[int, int]] = {}
+        self._seen_count = 0
+        self._seen_generation = -1
+        
+        self._stats = {'writes': 0, 'resets': 0, 'retries': 0}
+    
+    @property
+    def is_open(self) -> bool:
+        """Whether the segment is created or attached."""
+        return self._shm is not None
+    
+    def _map(self, capacity: int):
+        """Create typed views over the segment's columns."""
+        layout = _layout(capacity)
+        buf = self._shm.buf
+        
+        def view(offset: int, length: int, fmt: str) -> memoryview:
+            column = buf[offset:offset + length].cast(fmt)
+            self._views.append(column)
+            return column
+        
+        self._header = view(0, HEADER_SIZE * 8, 'q')
+        self._seq = view(layout['seq'], capacity * 8, 'q')
+        self._tags = view(layout['tags'], capacity * 8, 'q')
+        self._bid, self._ask, self._bid_size, self._ask_size, self._received_at = (
+            view(layout['fields'] + i * capacity * 8, capacity * 8, 'd')
+            for i in range(len(FIELDS))
+        )
+        self._symbols = view(layout['symbols'], capacity * SYMBOL_BYTES, 'B')
+        self.capacity = capacity
+    
+    def _unmap(self):
+        """Release the column views (required before the segment can be closed)."""
+        for column in self._views:
+            column.release()
+        self._views = []
+    
+    def create(self) -> bool:
+        """
+        Create the segment as its writer (replacing one left by a crashed run).
+        
+        Returns:
+            True if the segment was created
+        """
+        size = _layout(self.capacity)['size']
+        try:
+            try:
+                self._shm = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+            except FileExistsError:
+                stale = shared_memory.SharedMemory(name=self.name)
+                stale.close()
+                stale.unlink()
+                self._shm = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+        except Exception as e:
+            logger.error(f"Error creating shared quote book {self.name}: {e}")
+            self._shm = None
+            return False
+        
+        self._owner = True
+        self._map(self.capacity)
+        self._header[H_CAPACITY] = self.capacity
+        self._header[H_COUNT] = 0
+        self._header[H_GENERATION] = 0
+        # Written last so readers never attach to a half-initialized header
+        self._header[H_MAGIC] = MAGIC
+        self._seen_generation = 0
+        
+        logger.info(f"Shared quote book {self.name} created ({self.capacity} slots, {size // 1024} KiB)")
+        return True
+    
+    def attach(self) -> bool:
+        """
+        Attach to an existing segment as a reader.
+        
+        Returns:
+            True if the segment exists and is a quote book
+        """
+        try:
+            shm = shared_memory.SharedMemory(name=self.name)
+            # Readers must not unlink the segment when they exit
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.error(f"Error attaching to shared quote book {self.name}: {e}")
+            return False
+        
+        header = shm.buf[:HEADER_SIZE * 8].cast('q')
+        magic, capacity = header[H_MAGIC], header[H_CAPACITY]
+        header.release()
+        
+        if magic != MAGIC:
+            shm.close()
+            logger.error(f"Shared memory segment {self.name} is not a quote book")
+            return False
+        
+        self._shm = shm
+        self._owner = False
+        self._map(capacity)
+        return True
+    
+    def close(self):
+        """Detach from the segment (and remove it if this process created it)."""
+        if self._shm is None:
+            return
+        
+        self._unmap()
+        try:
+            self._shm.close()
+            if self._owner:
+                self._shm.unlink()
+        except Exception as e:
+            logger.error(f"Error closing shared quote book {self.name}: {e}")
+        self._shm = None
+        self._slots = {}
+    
+    def _assign(self, symbol: str) -> Tuple[int, int]:
+        """Give a symbol the next free slot (writer only)."""
+        header = self._header
+        count = header[H_COUNT]
+        if count >= self.capacity:
+            # Full - start over; readers rebuild their index on the new generation
+            self._slots = {}
+            header[H_COUNT] = 0
+            header[H_GENERATION] += 1
+            self._seen_generation = header[H_GENERATION]
+            count = 0
+            self._stats['resets'] += 1
+            logger.warning(f"Shared quote book {self.name} is full ({self.capacity} slots); reassigning")
+        
+        tag = _tag(symbol)
+        offset = count * SYMBOL_BYTES
+        
+        self._seq[count] += 1
+        self._tags[count] = tag
+        self._symbols[offset:offset + SYMBOL_BYTES] = symbol.encode().ljust(SYMBOL_BYTES, b'\0')
+        for column in (self._bid, self._ask, self._bid_size, self._ask_size, self._received_at):
+            column[count] = 0.0
+        self._seq[count] += 1
+        
+        # Published only after the slot is complete
+        header[H_COUNT] = count + 1
+        self._seen_count = count + 1
+        self._slots[symbol] = (count, tag)
+        return count, tag
+    
+    def write(
+        self,
+        symbol: str,
+        bid: float,
+        ask: float,
+        bid_size: float = 0,
+        ask_size: float = 0,
+        received_at: Optional[float] = None
+    ):
+        """
+        Publish a quote (writer only; the caller serializes writes).
+        
+        Args:
+            symbol: Normalized stock or option symbol
+            bid: Bid price
+            ask: Ask price
+            bid_size: Bid size
+            ask_size: Ask size
+            received_at: Epoch seconds the quote arrived
+        """
+        if self._shm is None:
+            return
+        
+        entry = self._slots.get(symbol)
+        if entry is None:
+            if len(symbol) > SYMBOL_BYTES:
+                return
+            entry = self._assign(symbol)
+        slot = entry[0]
+        
+        seq = self._seq
+        seq[slot] += 1
+        self._bid[slot] = bid
+        self._ask[slot] = ask
+        self._bid_size[slot] = bid_size or 0
+        self._ask_size[slot] = ask_size or 0
+        self._received_at[slot] = received_at or time.time()
+        seq[slot] += 1
+        self._stats['writes'] += 1
+    
+    def clear(self, symbols: Iterable[str]):
+        """Blank the quotes of symbols that are no longer streamed (writer only)."""
+        if self._shm is None:
+            return
+        
+        for symbol in symbols:
+            entry = self._slots.get(symbol)
+            if entry is not None:
+                slot = entry[0]
+                self._seq[slot] += 1
+                self._bid[slot] = 0.0
+                self._ask[slot] = 0.0
+                self._seq[slot] += 1
+    
+    def _refresh(self):
+        """Pick up symbols assigned since the index was last read (readers)."""
+        generation = self._header[H_GENERATION]
+        if generation != self._seen_generation:
+            self._slots = {}
+            self._seen_count = 0
+            self._seen_generation = generation
+        
+        count = self._header[H_COUNT]
+        for slot in range(self._seen_count, count):
+            offset = slot * SYMBOL_BYTES
+            symbol = bytes(self._symbols[offset:offset + SYMBOL_BYTES]).rstrip(b'\0').decode()
+            self._slots[symbol] = (slot, self._tags[slot])
+        self._seen_count = count
+    
+    def get(self, symbol: str, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Read the latest quote for a symbol without locking.
+        
+        Args:
+            symbol: Stock or option symbol ("O:" prefix allowed)
+            max_age: Ignore quotes received more than this many seconds ago
+            
+        Returns:
+            Quote dict (bid, ask, sizes, mid, spread, spread_pct,
+            received_at) or None if missing, blank or too old
+        """
+        if self._shm is None:
+            return None
+        
+        if symbol.startswith('O:'):
+            symbol = symbol[2:]
+        
+        header = self._header
+        if not self._owner and (header[H_COUNT] != self._seen_count or header[H_GENERATION] != self._seen_generation):
+            self._refresh()
+        
+        entry = self._slots.get(symbol)
+        if entry is None:
+            return None
+        slot, tag = entry
+        
+        seq = self._seq
+        for _ in range(READ_RETRIES):
+            before = seq[slot]
+            if before & 1:
+                self._stats['retries'] += 1
+                continue
+            
+            bid = self._bid[slot]
+            ask = self._ask[slot]
+            bid_size = self._bid_size[slot]
+            ask_size = self._ask_size[slot]
+            received_at = self._received_at[slot]
+            owner = self._tags[slot]
+            
+            if seq[slot] != before:
+                self._stats['retries'] += 1
+                continue
+            
+            if owner != tag:
+                # Slot was reassigned after a reset - re-read the index
+                self._refresh()
+                entry = self._slots.get(symbol)
+                if entry is None:
+                    return None
+                slot, tag = entry
+                continue
+            
+            if bid <= 0 or ask <= 0:
+                return None
+            if max_age is not None and time.time() - received_at > max_age:
+                return None
+            
+            return {
+                'bid': bid,
+                'ask': ask,
+                'bid_size': bid_size,
+                'ask_size': ask_size,
+                'mid': (bid + ask) / 2,
+                'spread': ask - bid,
+                'spread_pct': ((ask - bid) / ask) * 100,
+                'received_at': received_at,
+            }
+        
+        return None
+    
+    def get_prices(self, symbols: Iterable[str], max_age: Optional[float] = None) -> Dict[str, float]:
+        """
+        Get mid prices for several symbols.
+        
+        Args:
+            symbols: Stock or option symbols
+            max_age: Ignore quotes received more than this many seconds ago
+            
+        Returns:
+            Mapping of symbol to mid price for the symbols with a fresh quote
+        """
+        prices = {}
+        for symbol in symbols:
+            quote = self.get(symbol, max_age)
+            if quote:
+                prices[symbol] = quote['mid']
+        return prices
+    
+    def symbols(self) -> List[str]:
+        """Symbols with a slot in the book."""
+        if self._shm is None:
+            return []
+        if not self._owner:
+            self._refresh()
+        return list(self._slots)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get segment size and write/retry counters."""
+        if self._shm is None:
+            return dict(self._stats, name=self.name, open=False)
+        return dict(
+            self._stats,
+            name=self.name,
+            open=True,
+            owner=self._owner,
+            capacity=self.capacity,
+            slots_used=self._header[H_COUNT],
+            generation=self._header[H_GENERATION],
+        )
+
+
+# Global shared quote book instance (created by the engine, attached by readers)
+shared_quote_book = SharedQuoteBook()
@@ -0,0 +1,99 @@
+"""
+Single-flight coalescing of concurrent async calls for the same key.
+"""
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Tuple
+from loguru import logger
+
+
+class SingleFlight:
+    """
+    Share one in-flight call between concurrent callers of the same key.
+    
+    The first caller for a key starts the work as a task; callers arriving
+    while it runs await the same task instead of starting their own. Tasks
+    are tracked per event loop, since the API server thread runs its own
+    loop and futures cannot be awaited across loops.
+    """
+    
+    # Every group, by name, for the metrics endpoint
+    _groups: Dict[str, 'SingleFlight'] = {}
+    
+    def __init__(self, name: str):
+        """
+        Initialize single-flight group.
+        
+        Args:
+            name: Group name used in logs and metrics
+        """
+        self.name = name
+        
+        self._inflight: Dict[Tuple[int, str], asyncio.Task] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        
+        SingleFlight._groups[name] = self
+    
+    def _count(self, key: str, field: str):
+        """Increment a per-key counter."""
+        with self._lock:
+            stats = self._stats.setdefault(key, {'calls': 0, 'executions': 0, 'shared': 0, 'errors': 0})
+            stats[field] += 1
+    
+    async def do(self, key: str, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """
+        Run ``fn(*args, **kwargs)`` unless a call for ``key`` is already in flight.
+        
+        Args:
+            key: Coalescing key (e.g. "options_chain:AAPL")
+            fn: Coroutine function doing the work
+            *args: Positional arguments for ``fn``
+            **kwargs: Keyword arguments for ``fn``
+            
+        Returns:
+            The result of the shared call
+        """
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        
+        self._count(key, 'calls')
+        
+        task = self._inflight.get(flight_key)
+        if task is None:
+            task = loop.create_task(fn(*args, **kwargs))
+            self._inflight[flight_key] = task
+            task.add_done_callback(lambda t: self._finish(flight_key, t))
+            self._count(key, 'executions')
+        else:
+            self._count(key, 'shared')
+            logger.debug(f"Single-flight {self.name}: joined in-flight call for {key}")
+        
+        # A cancelled caller must not cancel the call other callers share
+        return await asyncio.shield(task)
+    
+    def _finish(self, flight_key: Tuple[int, str], task: asyncio.Task):
+        """Forget a finished call and record its outcome."""
+        if self._inflight.get(flight_key) is task:
+            del self._inflight[flight_key]
+        
+        # Retrieve the exception so it is never reported as unhandled
+        if not task.cancelled() and task.exception() is not None:
+            self._count(flight_key[1], 'errors')
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-key and total call counters."""
+        with self._lock:
+            keys = {key: dict(stats) for key, stats in self._stats.items()}
+        
+        totals = {'calls': 0, 'executions': 0, 'shared': 0, 'errors': 0}
+        for stats in keys.values():
+            for field in totals:
+                totals[field] += stats[field]
+        
+        return {'in_flight': len(self._inflight), 'totals': totals, 'keys': keys}
+    
+    @classmethod
+    def get_all_stats(cls) -> Dict[str, Dict[str, Any]]:
+        """Get counters for every single-flight group."""
+        return {name: group.get_stats() for name, group in cls._groups.items()}
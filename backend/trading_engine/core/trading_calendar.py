@@ -0,0 +1,237 @@
+"""
+NYSE trading calendar: holidays, early closes and session times.
+"""
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Optional, Set, Tuple
+import pytz
+
+from config import MarketHours
+
+
+EASTERN = pytz.timezone('America/New_York')
+
+# Session windows
+REGULAR = 'regular'
+EXTENDED = 'extended'
+ALWAYS = 'always'
+
+# How far ahead to look for the next session (covers the longest closures)
+MAX_LOOKAHEAD_DAYS = 10
+
+
+def _parse_time(value: str) -> time:
+    """Parse an "HH:MM" string."""
+    hours, minutes = value.split(':')
+    return time(int(hours), int(minutes))
+
+
+def easter_sunday(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """The n-th given weekday of a month (n=-1 for the last one)."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    
+    following = date(year + month // 12, month % 12 + 1, 1)
+    last = following - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day: date) -> date:
+    """Weekend holidays are observed on the Friday before or the Monday after."""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def nyse_holidays(year: int) -> Set[date]:
+    """
+    Full-day NYSE closures for a year.
+    
+    Args:
+        year: Calendar year
+        
+    Returns:
+        Holiday dates (as observed)
+    """
+    holidays = {
+        _nth_weekday(year, 1, 0, 3),               # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),               # Washington's Birthday
+        easter_sunday(year) - timedelta(days=2),   # Good Friday
+        _nth_weekday(year, 5, 0, -1),              # Memorial Day
+        _observed(date(year, 7, 4)),               # Independence Day
+        _nth_weekday(year, 9, 0, 1),               # Labor Day
+        _nth_weekday(year, 11, 3, 4),              # Thanksgiving
+        _observed(date(year, 12, 25)),             # Christmas
+    }
+    
+    # New Year's Day on a Saturday is not observed on the prior Friday
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays.add(_observed(new_year))
+    
+    if year >= 2022:
+        holidays.add(_observed(date(year, 6, 19)))  # Juneteenth
+    
+    return holidays
+
+
+def nyse_early_closes(year: int) -> Set[date]:
+    """
+    Days the NYSE closes early (1:00 PM ET).
+    
+    Args:
+        year: Calendar year
+        
+    Returns:
+        Early close dates
+    """
+    early = {
+        _nth_weekday(year, 11, 3, 4) + timedelta(days=1),  # Day after Thanksgiving
+    }
+    
+    # Eve of Independence Day and Christmas Eve, when they fall Monday-Thursday
+    for eve in (date(year, 7, 3), date(year, 12, 24)):
+        if eve.weekday() <= 3:
+            early.add(eve)
+    
+    return early - nyse_holidays(year)
+
+
+class TradingCalendar:
+    """
+    Session lookup for US equity and options markets.
+    
+    Holidays and early closes are computed per year and memoized, so
+    lookups are set membership checks.
+    """
+    
+    def __init__(self):
+        """Initialize trading calendar."""
+        self.market_open = _parse_time(MarketHours.MARKET_OPEN)
+        self.market_close = _parse_time(MarketHours.MARKET_CLOSE)
+        self.early_close = _parse_time(MarketHours.EARLY_CLOSE)
+        self.pre_market_open = _parse_time(MarketHours.PRE_MARKET_OPEN)
+        self.after_hours_close = _parse_time(MarketHours.AFTER_HOURS_CLOSE)
+        self.early_after_hours_close = _parse_time(MarketHours.EARLY_AFTER_HOURS_CLOSE)
+        
+        self._years: Dict[int, Tuple[Set[date], Set[date]]] = {}
+        self._lock = threading.Lock()
+        
+        # Precompute the years the engine will touch
+        this_year = datetime.now(EASTERN).year
+        for year in (this_year - 1, this_year, this_year + 1):
+            self._year(year)
+    
+    def _year(self, year: int) -> Tuple[Set[date], Set[date]]:
+        """Holidays and early closes for a year, computed once."""
+        cached = self._years.get(year)
+        if cached is None:
+            with self._lock:
+                cached = self._years.setdefault(year, (nyse_holidays(year), nyse_early_closes(year)))
+        return cached
+    
+    def is_holiday(self, day: date) -> bool:
+        """Whether the exchange is closed all day on a weekday."""
+        return day in self._year(day.year)[0]
+    
+    def is_early_close(self, day: date) -> bool:
+        """Whether the regular session ends at 1:00 PM ET."""
+        return day in self._year(day.year)[1]
+    
+    def is_trading_day(self, day: date) -> bool:
+        """Whether there is a session on a date."""
+        return day.weekday() < 5 and not self.is_holiday(day)
+    
+    def session(self, day: date, window: str = REGULAR) -> Optional[Tuple[datetime, datetime]]:
+        """
+        Start and end of a session window on a date.
+        
+        Args:
+            day: Date
+            window: REGULAR (9:30-16:00), EXTENDED (4:00-20:00) or ALWAYS
+            
+        Returns:
+            Timezone-aware (start, end) in ET, or None if the market is
+            closed that day
+        """
+        if window == ALWAYS:
+            start = EASTERN.localize(datetime.combine(day, time.min))
+            return start, EASTERN.localize(datetime.combine(day + timedelta(days=1), time.min))
+        
+        if not self.is_trading_day(day):
+            return None
+        
+        early = self.is_early_close(day)
+        if window == EXTENDED:
+            start, end = self.pre_market_open, self.early_after_hours_close if early else self.after_hours_close
+        else:
+            start, end = self.market_open, self.early_close if early else self.market_close
+        
+        return (
+            EASTERN.localize(datetime.combine(day, start)),
+            EASTERN.localize(datetime.combine(day, end))
+        )
+    
+    def is_open(self, now: Optional[datetime] = None, window: str = REGULAR) -> bool:
+        """
+        Whether a session window is in progress.
+        
+        Args:
+            now: Time to check (defaults to now)
+            window: Session window
+            
+        Returns:
+            True during the window on a trading day
+        """
+        now = (now or datetime.now(pytz.utc)).astimezone(EASTERN)
+        bounds = self.session(now.date(), window)
+        return bounds is not None and bounds[0] <= now < bounds[1]
+    
+    def next_open(self, now: Optional[datetime] = None, window: str = REGULAR) -> Optional[datetime]:
+        """
+        Start of the current or next session window.
+        
+        Args:
+            now: Reference time (defaults to now)
+            window: Session window
+            
+        Returns:
+            ``now`` if the window is open, otherwise when it next opens
+        """
+        now = (now or datetime.now(pytz.utc)).astimezone(EASTERN)
+        
+        for offset in range(MAX_LOOKAHEAD_DAYS):
+            bounds = self.session(now.date() + timedelta(days=offset), window)
+            if bounds and now < bounds[1]:
+                return max(bounds[0], now)
+        
+        return None
+    
+    def previous_trading_day(self, day: date) -> date:
+        """The last trading day before a date."""
+        day -= timedelta(days=1)
+        while not self.is_trading_day(day):
+            day -= timedelta(days=1)
+        return day
+
+
+# Global trading calendar instance
+trading_calendar = TradingCalendar()
@@ -0,0 +1,362 @@
+"""
+Per-expiration implied volatility smiles fitted from chain snapshot quotes.
+"""
+import hashlib
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+import pytz
+from scipy.special import ndtri
+
+from config import settings
+from core.greeks import implied_volatility, years_to_expiry, IV_LOWER, IV_UPPER
+
+
+# Log-moneyness grid the delta-to-strike lookup searches
+SMILE_GRID = np.linspace(-1.5, 1.5, 601)
+# Quotes needed for a quadratic fit; fewer give a flat smile
+MIN_POINTS = 3
+# Floor on fitted implied volatility (decimal), so wings stay positive
+MIN_IV = 0.01
+# Quotes below this mid price (no-bid wings) carry no usable volatility
+MIN_PRICE = 0.05
+
+
+class SmileFit:
+    """
+    One expiration's smile: total variance w(k) = a + b*k + c*k^2.
+    
+    ``k`` is log-moneyness ln(K / F) against the forward. The fit is kept in
+    moneyness terms, so lookups follow spot (sticky moneyness) until the
+    next refit.
+    """
+    
+    def __init__(self, coefficients: np.ndarray, years: float, points: int, rmse: float):
+        """
+        Initialize smile fit.
+        
+        Args:
+            coefficients: (a, b, c) of the total variance quadratic
+            years: Time to expiry at fit time
+            points: Quotes the fit used
+            rmse: Weighted RMS error of the fit in volatility points
+        """
+        self.a, self.b, self.c = (float(x) for x in coefficients)
+        self.years = years
+        self.points = points
+        self.rmse = rmse
+        
+        # Precomputed d1 along the grid for delta lookups
+        w = self.total_variance(SMILE_GRID)
+        sqrt_w = np.sqrt(w)
+        self._d1 = -SMILE_GRID / sqrt_w + sqrt_w / 2
+    
+    def total_variance(self, k):
+        """Fitted total variance at log-moneyness ``k`` (floored)."""
+        w = self.a + self.b * k + self.c * k * k
+        return np.maximum(w, MIN_IV * MIN_IV * self.years)
+    
+    def iv(self, k: float) -> float:
+        """Implied volatility (decimal) at log-moneyness ``k``."""
+        return float(np.sqrt(self.total_variance(k) / self.years))
+    
+    def log_moneyness_for_d1(self, d1: float) -> float:
+        """Log-moneyness where the smile's Black-Scholes d1 equals ``d1``."""
+        i = int(np.argmin(np.abs(self._d1 - d1)))
+        
+        # Interpolate with the neighbour on the other side of the target
+        j = i + 1 if (self._d1[i] - d1) > 0 else i - 1
+        if 0 <= j < len(SMILE_GRID) and self._d1[i] != self._d1[j]:
+            t = (d1 - self._d1[i]) / (self._d1[j] - self._d1[i])
+            if 0 <= t <= 1:
+                return float(SMILE_GRID[i] + t * (SMILE_GRID[j] - SMILE_GRID[i]))
+        return float(SMILE_GRID[i])
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Fit parameters and ATM volatility for the API."""
+        return {
+            'a': round(self.a, 6),
+            'b': round(self.b, 6),
+            'c': round(self.c, 6),
+            'atm_iv': round(self.iv(0.0) * 100, 2),
+            'years': round(self.years, 5),
+            'points': self.points,
+            'rmse': round(self.rmse * 100, 3),
+        }
+
+
+def fit_smiles(
+    group: np.ndarray,
+    k: np.ndarray,
+    total_variance: np.ndarray,
+    weights: np.ndarray,
+    years: np.ndarray,
+    groups: int
+) -> List[SmileFit]:
+    """
+    Weighted least-squares quadratic fits for many expirations in one solve.
+    
+    The 3x3 normal equations of every expiration are accumulated with
+    ``np.add.at`` and solved as one stacked system.
+    
+    Args:
+        group: Expiration index per quote
+        k: Log-moneyness per quote
+        total_variance: IV^2 * T per quote
+        weights: Fit weight per quote
+        years: Time to expiry per expiration
+        groups: Number of expirations
+        
+    Returns:
+        One SmileFit per expiration
+    """
+    X = np.stack([np.ones_like(k), k, k * k], axis=1)
+    WX = weights[:, None] * X
+    
+    normal = np.zeros((groups, 3, 3))
+    np.add.at(normal, group, WX[:, :, None] * X[:, None, :])
+    rhs = np.zeros((groups, 3))
+    np.add.at(rhs, group, WX * total_variance[:, None])
+    
+    counts = np.bincount(group, minlength=groups)
+    weight_sums = np.bincount(group, weights=weights, minlength=groups)
+    
+    # Too few quotes (or strikes) for a curve: flat smile at the mean variance
+    flat = counts < MIN_POINTS
+    flat |= np.abs(np.linalg.det(normal)) < 1e-18
+    normal[flat] = np.eye(3)
+    rhs[flat] = 0.0
+    rhs[flat, 0] = np.bincount(group, weights=weights * total_variance, minlength=groups)[flat] / np.maximum(weight_sums[flat], 1e-12)
+    
+    coefficients = np.linalg.solve(normal, rhs[:, :, None])[:, :, 0]
+    
+    # Fit error in volatility terms
+    fitted = np.einsum('ij,ij->i', X, coefficients[group])
+    fitted_iv = np.sqrt(np.maximum(fitted, 0.0) / years[group])
+    iv = np.sqrt(total_variance / years[group])
+    squared = np.bincount(group, weights=weights * (fitted_iv - iv) ** 2, minlength=groups)
+    rmse = np.sqrt(squared / np.maximum(weight_sums, 1e-12))
+    
+    return [
+        SmileFit(coefficients[g], float(years[g]), int(counts[g]), float(rmse[g]))
+        for g in range(groups)
+    ]
+
+
+class VolSurfaceStore:
+    """
+    Volatility smiles per underlying and expiration.
+    
+    ``update`` takes a chain snapshot, fingerprints each expiration's quotes
+    and refits only the expirations whose quotes changed, all in one
+    vectorized solve. Lookups (IV at a strike, strike at a delta) read a
+    fitted smile and take microseconds.
+    """
+    
+    def __init__(self, risk_free_rate: Optional[float] = None):
+        """
+        Initialize volatility surface store.
+        
+        Args:
+            risk_free_rate: Annual risk-free rate (decimal)
+        """
+        self.risk_free_rate = settings.risk_free_rate if risk_free_rate is None else risk_free_rate
+        
+        # underlying -> expiration -> fit, and the quote fingerprints they came from
+        self._smiles: Dict[str, Dict[str, SmileFit]] = {}
+        self._fingerprints: Dict[str, Dict[str, str]] = {}
+        self._spots: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stats = {'updates': 0, 'refits': 0, 'unchanged': 0}
+    
+    def update(self, underlying: str, contracts: Iterable[Dict[str, Any]]) -> int:
+        """
+        Refit the smiles of an underlying from snapshot quotes.
+        
+        Out-of-the-money quotes are used (puts below the forward, calls
+        above). Snapshot IV is used where present; otherwise it is solved
+        from the mid price.
+        
+        Args:
+            underlying: Underlying symbol
+            contracts: Snapshot quote dicts (strike, expiration, type, iv,
+                mid, spread_pct, underlying_price)
+                
+        Returns:
+            Number of expirations refit
+        """
+        quotes = [
+            c for c in contracts
+            if c.get('strike') and c.get('expiration') and c.get('type') in ('call', 'put')
+            and (c.get('iv') or (c.get('mid') or 0) > 0)
+        ]
+        spot = next((c['underlying_price'] for c in quotes if c.get('underlying_price')), None)
+        if not quotes or not spot:
+            return 0
+        
+        now = datetime.now(pytz.utc)
+        expirations = sorted({c['expiration'] for c in quotes})
+        index = {exp: i for i, exp in enumerate(expirations)}
+        years_by_exp = np.array([years_to_expiry(exp, now) for exp in expirations])
+        
+        group = np.array([index[c['expiration']] for c in quotes])
+        strike = np.array([c['strike'] for c in quotes], dtype=np.float64)
+        is_call = np.array([c['type'] == 'call' for c in quotes])
+        iv = np.array([c.get('iv') or np.nan for c in quotes], dtype=np.float64)
+        mid = np.array([c.get('mid') or np.nan for c in quotes], dtype=np.float64)
+        spread_pct = np.array([c.get('spread_pct') or 0.0 for c in quotes], dtype=np.float64)
+        years = years_by_exp[group]
+        
+        # Fill missing IVs from the mid price in one pass
+        missing = ~np.isfinite(iv)
+        if missing.any():
+            iv[missing] = implied_volatility(
+                mid[missing], np.full(missing.sum(), spot), strike[missing], years[missing],
+                self.risk_free_rate, is_call[missing]
+            )
+        
+        forward = spot * np.exp(self.risk_free_rate * years)
+        k = np.log(strike / forward)
+        usable = (
+            np.isfinite(iv) & (iv > IV_LOWER) & (iv < IV_UPPER) &
+            ~(mid < MIN_PRICE) &
+            (is_call == (k >= 0))  # out-of-the-money side only
+        )
+        
+        # Fingerprint each expiration's usable quotes; refit only the changed ones
+        fingerprints = {}
+        for exp, g in index.items():
+            rows = usable & (group == g)
+            digest = hashlib.sha1(np.round(strike[rows], 4).tobytes())
+            digest.update(np.round(iv[rows], 4).tobytes())
+            fingerprints[exp] = digest.hexdigest()
+        
+        with self._lock:
+            previous = self._fingerprints.get(underlying, {})
+            changed = [exp for exp in expirations if previous.get(exp) != fingerprints[exp]]
+        
+        refit = {}
+        if changed:
+            changed_index = np.array([index[exp] for exp in changed])
+            remap = np.full(len(expirations), -1)
+            remap[changed_index] = np.arange(len(changed))
+            
+            rows = usable & (remap[group] >= 0)
+            if rows.any():
+                fits = fit_smiles(
+                    remap[group[rows]],
+                    k[rows],
+                    iv[rows] ** 2 * years[rows],
+                    1.0 / np.maximum(spread_pct[rows], 1.0),  # tighter quotes count more
+                    years_by_exp[changed_index],
+                    len(changed)
+                )
+                counts = np.bincount(remap[group[rows]], minlength=len(changed))
+                refit = {exp: fit for exp, fit, n in zip(changed, fits, counts) if n > 0}
+        
+        with self._lock:
+            smiles = self._smiles.setdefault(underlying, {})
+            # Drop expirations no longer quoted (expired or out of the window)
+            for exp in [e for e in smiles if e not in index]:
+                del smiles[exp]
+            smiles.update(refit)
+            
+            self._fingerprints[underlying] = fingerprints
+            self._spots[underlying] = float(spot)
+            self._stats['updates'] += 1
+            self._stats['refits'] += len(refit)
+            self._stats['unchanged'] += len(expirations) - len(changed)
+        
+        return len(refit)
+    
+    def _smile(self, underlying: str, expiration: str) -> Optional[SmileFit]:
+        """Fitted smile for an expiration, if any."""
+        with self._lock:
+            return self._smiles.get(underlying, {}).get(expiration)
+    
+    def _forward(self, underlying: str, smile: SmileFit, spot: Optional[float]) -> Optional[float]:
+        """Forward price from the given or last snapshot spot."""
+        spot = spot or self._spots.get(underlying)
+        if not spot:
+            return None
+        return spot * np.exp(self.risk_free_rate * smile.years)
+    
+    def iv(self, underlying: str, expiration: str, strike: float, spot: Optional[float] = None) -> Optional[float]:
+        """
+        Interpolated implied volatility.
+        
+        Args:
+            underlying: Underlying symbol
+            expiration: ISO expiration date
+            strike: Strike
+            spot: Current underlying price (defaults to the snapshot's)
+            
+        Returns:
+            IV in percent, or None without a fitted smile
+        """
+        smile = self._smile(underlying, expiration)
+        if smile is None:
+            return None
+        forward = self._forward(underlying, smile, spot)
+        if not forward:
+            return None
+        return round(smile.iv(float(np.log(strike / forward))) * 100, 4)
+    
+    def strike_for_delta(
+        self,
+        underlying: str,
+        expiration: str,
+        option_type: str,
+        delta: float,
+        spot: Optional[float] = None
+    ) -> Optional[float]:
+        """
+        Strike whose Black-Scholes delta on the fitted smile equals a target.
+        
+        Args:
+            underlying: Underlying symbol
+            expiration: ISO expiration date
+            option_type: "call" or "put"
+            delta: Target delta magnitude (e.g. 0.30 for a 30-delta put or call)
+            spot: Current underlying price (defaults to the snapshot's)
+            
+        Returns:
+            Theoretical strike (round it to a listed one with the chain), or
+            None without a fitted smile
+        """
+        smile = self._smile(underlying, expiration)
+        if smile is None:
+            return None
+        forward = self._forward(underlying, smile, spot)
+        if not forward:
+            return None
+        
+        delta = min(max(abs(delta), 0.01), 0.99)
+        # Call delta N(d1); put delta N(d1) - 1
+        d1 = ndtri(delta) if option_type == 'call' else ndtri(1.0 - delta)
+        return round(float(forward * np.exp(smile.log_moneyness_for_d1(d1))), 2)
+    
+    def surface(self, underlying: str) -> Optional[Dict[str, Any]]:
+        """Fitted smiles of an underlying for the API."""
+        with self._lock:
+            smiles = self._smiles.get(underlying)
+            if not smiles:
+                return None
+            return {
+                'spot': self._spots.get(underlying),
+                'expirations': {exp: fit.to_dict() for exp, fit in sorted(smiles.items())},
+            }
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Get update and refit counters."""
+        with self._lock:
+            return dict(
+                self._stats,
+                underlyings=len(self._smiles),
+                smiles=sum(len(smiles) for smiles in self._smiles.values())
+            )
+
+
+# Global volatility surface store
+vol_surfaces = VolSurfaceStore()
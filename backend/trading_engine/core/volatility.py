@@ -0,0 +1,63 @@
+"""
+Vectorized realized volatility over many symbols and lookback windows.
+"""
+from typing import Dict, Sequence
+import numpy as np
+
+
+VOLATILITY_WINDOWS = (20, 60, 252)
+TRADING_DAYS_PER_YEAR = 252
+
+
+def realized_volatility(
+    closes: np.ndarray,
+    windows: Sequence[int] = VOLATILITY_WINDOWS
+) -> Dict[str, np.ndarray]:
+    """
+    Annualized close-to-close volatility for every symbol and window at once.
+    
+    Returns are computed once for the whole matrix; running sums taken from
+    the newest day backwards then give the mean and variance of the last
+    ``w`` returns for every window without rescanning the data.
+    
+    Args:
+        closes: Closing prices, one row per symbol, oldest first. Rows with
+            shorter history are left-padded with NaN.
+        windows: Lookbacks in trading days
+        
+    Returns:
+        Mapping of ``hv_<w>`` (simple returns) and ``log_hv_<w>`` (log
+        returns) to per-symbol volatility in percent; NaN where a symbol has
+        fewer than ``w`` returns
+    """
+    closes = np.atleast_2d(np.asarray(closes, dtype=np.float64))
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = closes[:, 1:] / closes[:, :-1]
+        # Axis 0: simple, log; newest return first along the last axis
+        returns = np.stack([ratio - 1.0, np.log(ratio)])[..., ::-1]
+    
+    valid = np.isfinite(returns)
+    filled = np.where(valid, returns, 0.0)
+    
+    counts = np.cumsum(valid, axis=-1)
+    sums = np.cumsum(filled, axis=-1)
+    squares = np.cumsum(filled * filled, axis=-1)
+    
+    available = returns.shape[-1]
+    results = {}
+    
+    for window in windows:
+        if window > available:
+            vol = np.full(returns.shape[:2], np.nan)
+        else:
+            i = window - 1
+            mean = sums[..., i] / window
+            variance = np.maximum(squares[..., i] / window - mean * mean, 0.0)
+            vol = np.sqrt(variance * TRADING_DAYS_PER_YEAR) * 100
+            vol[counts[..., i] < window] = np.nan
+        
+        results[f"hv_{window}"] = vol[0]
+        results[f"log_hv_{window}"] = vol[1]
+    
+    return results
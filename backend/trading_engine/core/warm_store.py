@@ -0,0 +1,236 @@
+"""
+Write-behind persistence of expensive cache entries in the market_data_cache table.
+"""
+import asyncio
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+from loguru import logger
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.sql import func
+
+from config import settings
+from core.database import get_db_context
+from core.models import MarketDataCache
+from core.redis_manager import redis_manager
+
+
+# Seconds between purges of expired rows
+PURGE_INTERVAL = 3600
+
+
+class WarmStore:
+    """
+    Persistent tier behind Redis for values that are slow to rebuild.
+    
+    Writers ``stage`` Redis entries; a background task upserts the latest
+    value per key in bulk. At startup ``hydrate`` copies unexpired rows back
+    into Redis, so a restart or Redis flush doesn't re-download every chain
+    and volatility series.
+    
+    Rows are keyed by (symbol, data_type), where data_type is the Redis key
+    with its symbol segment replaced by ``*`` (e.g. ``market_data:*:hv_20``).
+    """
+    
+    def __init__(self):
+        """Initialize warm store."""
+        # (symbol, data_type) -> (value, expires_at, source)
+        self._pending: Dict[Tuple[str, str], Tuple[Any, datetime, str]] = {}
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+        self._stats = {'staged': 0, 'written': 0, 'flushes': 0, 'errors': 0, 'hydrated': 0}
+    
+    @staticmethod
+    def _split_key(key: str) -> Tuple[str, str]:
+        """Split a ``namespace:SYMBOL[:field]`` Redis key into (symbol, data_type)."""
+        parts = key.split(':')
+        symbol = parts[1]
+        parts[1] = '*'
+        return symbol, ':'.join(parts)
+    
+    @staticmethod
+    def _join_key(symbol: str, data_type: str) -> str:
+        """Rebuild the Redis key of a stored row."""
+        parts = data_type.split(':')
+        parts[1] = symbol
+        return ':'.join(parts)
+    
+    def stage(self, key: str, value: Any, ttl: float, source: str = 'engine'):
+        """
+        Queue a Redis entry for persistence (replacing any queued value for the key).
+        
+        Args:
+            key: Redis key (``namespace:SYMBOL[:field]``)
+            value: JSON-serializable value as stored in Redis
+            ttl: Seconds the value stays valid
+            source: Provider the value came from
+        """
+        if not settings.warm_store_enabled or value is None:
+            return
+        
+        symbol, data_type = self._split_key(key)
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl)
+        
+        with self._lock:
+            self._pending[(symbol, data_type)] = (value, expires_at, source)
+            self._stats['staged'] += 1
+    
+    def stage_many(self, entries: Dict[str, Any], ttl: float, source: str = 'engine'):
+        """Queue several Redis entries sharing a TTL."""
+        for key, value in entries.items():
+            self.stage(key, value, ttl, source)
+    
+    def flush(self) -> int:
+        """
+        Upsert queued entries in bulk (blocking).
+        
+        Returns:
+            Number of rows written
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        
+        if not pending:
+            return 0
+        
+        rows = [
+            {
+                'id': uuid.uuid4(),
+                'symbol': symbol,
+                'data_type': data_type,
+                'data': value,
+                'source': source,
+                'expires_at': expires_at,
+            }
+            for (symbol, data_type), (value, expires_at, source) in pending.items()
+        ]
+        
+        try:
+            with get_db_context() as db:
+                batch_size = max(1, settings.warm_store_batch_size)
+                for i in range(0, len(rows), batch_size):
+                    stmt = insert(MarketDataCache).values(rows[i:i + batch_size])
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=['symbol', 'data_type'],
+                        set_={
+                            'data': stmt.excluded.data,
+                            'source': stmt.excluded.source,
+                            'expires_at': stmt.excluded.expires_at,
+                            'created_at': func.now(),
+                        }
+                    )
+                    db.execute(stmt)
+            
+            self._stats['written'] += len(rows)
+            self._stats['flushes'] += 1
+            return len(rows)
+            
+        except Exception as e:
+            logger.error(f"Warm store flush of {len(rows)} rows failed: {e}")
+            self._stats['errors'] += 1
+            
+            # Requeue unless a newer value was staged meanwhile
+            with self._lock:
+                for key, entry in pending.items():
+                    self._pending.setdefault(key, entry)
+            return 0
+    
+    def purge_expired(self) -> int:
+        """Delete expired rows (blocking)."""
+        try:
+            with get_db_context() as db:
+                result = db.execute(
+                    delete(MarketDataCache).where(MarketDataCache.expires_at <= func.now())
+                )
+                return result.rowcount or 0
+        except Exception as e:
+            logger.error(f"Warm store purge failed: {e}")
+            return 0
+    
+    def hydrate(self) -> int:
+        """
+        Copy unexpired rows into Redis keys that are missing (blocking).
+        
+        Existing Redis values are newer and are left untouched.
+        
+        Returns:
+            Number of keys restored
+        """
+        if not settings.warm_store_enabled:
+            return 0
+        
+        try:
+            now = datetime.now(timezone.utc)
+            with get_db_context() as db:
+                rows = db.execute(
+                    select(
+                        MarketDataCache.symbol,
+                        MarketDataCache.data_type,
+                        MarketDataCache.data,
+                        MarketDataCache.expires_at
+                    ).where(MarketDataCache.expires_at > now)
+                ).all()
+            
+            entries = {
+                self._join_key(row.symbol, row.data_type): (row.data, row.expires_at)
+                for row in rows
+            }
+            existing = redis_manager.mget(list(entries))
+            
+            # Group by remaining lifetime (rounded down to the minute) so
+            # each group is one pipelined MSET
+            groups: Dict[int, Dict[str, Any]] = {}
+            for key, (value, expires_at) in entries.items():
+                if key in existing:
+                    continue
+                ttl = int((expires_at - now).total_seconds())
+                if ttl >= 60:
+                    ttl -= ttl % 60
+                if ttl > 0:
+                    groups.setdefault(ttl, {})[key] = value
+            
+            restored = 0
+            for ttl, group in groups.items():
+                if redis_manager.mset(group, expiration=ttl):
+                    restored += len(group)
+            
+            self._stats['hydrated'] += restored
+            logger.info(f"Warm store restored {restored} of {len(rows)} cached entries into Redis")
+            return restored
+            
+        except Exception as e:
+            logger.error(f"Warm store hydration failed: {e}")
+            return 0
+    
+    async def run(self, running: Optional[Callable[[], bool]] = None):
+        """
+        Flush queued entries periodically until cancelled.
+        
+        Args:
+            running: Callable returning False once the engine is stopping
+        """
+        while running is None or running():
+            await asyncio.sleep(settings.warm_store_flush_interval)
+            
+            try:
+                await asyncio.to_thread(self.flush)
+                
+                if time.monotonic() - self._last_purge >= PURGE_INTERVAL:
+                    self._last_purge = time.monotonic()
+                    purged = await asyncio.to_thread(self.purge_expired)
+                    if purged:
+                        logger.debug(f"Warm store purged {purged} expired rows")
+            except Exception as e:
+                logger.error(f"Error in warm store flush loop: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get staging, flush and hydration counters."""
+        with self._lock:
+            return dict(self._stats, pending=len(self._pending))
+
+
+# Global warm store instance
+warm_store = WarmStore()
@@ -11,11 +11,17 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from config import settings
-from core import setup_logger, check_db_connection, redis_manager
+from core import (
+    setup_logger, check_db_connection, redis_manager, blocking_adapter, warm_store,
+    loop_scheduler, LoopSchedule, EXTENDED, provider_recorder, chain_archive, quote_book,
+    shared_quote_book, http_transport
+)
 from services.signal_generator import SignalGenerator
 from services.position_manager import PositionManager
 from services.market_data_service import MarketDataService
 from services.execution_service import ExecutionService
+from services.quote_stream_service import QuoteStreamService
+from services.universe_scanner import UniverseScanner
 from api.routes import router as api_router
 
 
@@ -29,6 +35,11 @@ class TradingEngine:
         self.position_manager: Optional[PositionManager] = None
         self.market_data_service: Optional[MarketDataService] = None
         self.execution_service: Optional[ExecutionService] = None
+        self.quote_stream_service: Optional[QuoteStreamService] = None
+        self.universe_scanner: Optional[UniverseScanner] = None
+        
+        # Wakes sleeping loops on shutdown
+        self._stop_event = asyncio.Event()
         
     async def initialize(self):
         """Initialize all services."""
@@ -44,10 +55,29 @@ class TradingEngine:
             logger.error("Redis connection failed. Exiting.")
             sys.exit(1)
         
+        # Restore persisted chains and volatility into Redis before any loop
+        # asks the providers for them
+        await asyncio.to_thread(warm_store.hydrate)
+        
+        # Load the recording up front so the first cycle isn't paced by disk reads
+        if provider_recorder.replaying:
+            await asyncio.to_thread(provider_recorder.load)
+        
+        # Publish streamed quotes for readers in other processes
+        if settings.shared_quote_book_enabled and shared_quote_book.create():
+            quote_book.share(shared_quote_book)
+        
+        # One pooled HTTP transport for every REST provider
+        await http_transport.start()
+        
         # Initialize services
         try:
-            self.market_data_service = MarketDataService()
+            self.market_data_service = MarketDataService(http=http_transport)
             self.execution_service = ExecutionService()
+            if settings.enable_quote_streaming:
+                self.quote_stream_service = QuoteStreamService()
+            if settings.universe_scan_enabled:
+                self.universe_scanner = UniverseScanner()
             self.signal_generator = SignalGenerator(
                 market_data_service=self.market_data_service
             )
@@ -66,6 +96,8 @@ class TradingEngine:
         logger.info("Starting Trading Engine...")
         logger.info(f"Trading Mode: {settings.trading_mode.upper()}")
         logger.info(f"Auto Trading: {'ENABLED' if settings.enable_auto_trading else 'DISABLED'}")
+        if provider_recorder.mode != 'off':
+            logger.info(f"Provider Responses: {provider_recorder.mode.upper()}")
         
         self.running = True
         
@@ -75,8 +107,16 @@ class TradingEngine:
             asyncio.create_task(self._position_monitoring_loop()),
             asyncio.create_task(self._market_data_update_loop()),
             asyncio.create_task(self._health_check_loop()),
+            asyncio.create_task(warm_store.run(lambda: self.running)),
+            asyncio.create_task(chain_archive.run(lambda: self.running)),
         ]
         
+        if self.quote_stream_service:
+            tasks.append(asyncio.create_task(self.quote_stream_service.run()))
+        
+        if self.universe_scanner:
+            tasks.append(asyncio.create_task(self._universe_scan_loop()))
+        
         logger.info("Trading Engine started successfully")
         
         # Wait for all tasks
@@ -89,87 +129,146 @@ class TradingEngine:
         """Stop the trading engine."""
         logger.info("Stopping Trading Engine...")
         self.running = False
+        self._stop_event.set()
+        
+        if self.quote_stream_service:
+            await self.quote_stream_service.stop()
         
         # Give tasks time to finish current iteration
         await asyncio.sleep(2)
         
+        # Persist whatever is still queued for the warm store and chain archive
+        await asyncio.to_thread(warm_store.flush)
+        await asyncio.to_thread(chain_archive.flush)
+        
+        # Release SDK worker threads, then the pooled HTTP connections
+        blocking_adapter.shutdown()
+        await http_transport.close()
+        
+        # Finish the provider recording, if one is being written
+        provider_recorder.close()
+        
+        # Remove the shared quote book segment
+        shared_quote_book.close()
+        
         logger.info("Trading Engine stopped")
     
     async def _signal_generation_loop(self):
         """Background task for generating trade signals."""
         logger.info("Signal generation loop started")
         
+        # Regular session only; sleeps through nights, weekends and holidays
+        schedule = LoopSchedule('signal_generation', settings.signal_generation_interval)
+        
         while self.running:
             try:
-                if settings.enable_auto_trading:
+                if settings.enable_auto_trading and loop_scheduler.should_run(schedule):
                     logger.debug("Running signal generation...")
                     await self.signal_generator.generate_signals()
                 
                 # Wait for next interval
-                await asyncio.sleep(settings.signal_generation_interval)
+                await loop_scheduler.wait(schedule, self._stop_event)
                 
             except Exception as e:
                 logger.error(f"Error in signal generation loop: {e}")
-                await asyncio.sleep(60)  # Wait before retrying
+                await loop_scheduler.wait(schedule, self._stop_event, delay=60)  # Wait before retrying
     
     async def _position_monitoring_loop(self):
         """Background task for monitoring open positions."""
         logger.info("Position monitoring loop started")
         
+        # Every few seconds in session; occasional refresh off hours
+        schedule = LoopSchedule(
+            'position_monitoring',
+            settings.position_update_interval,
+            idle_interval=settings.offhours_position_update_interval
+        )
+        
         while self.running:
             try:
-                logger.debug("Monitoring positions...")
-                await self.position_manager.monitor_positions()
+                if loop_scheduler.should_run(schedule):
+                    logger.debug("Monitoring positions...")
+                    await self.position_manager.monitor_positions()
                 
                 # Wait for next interval
-                await asyncio.sleep(settings.position_update_interval)
+                await loop_scheduler.wait(schedule, self._stop_event)
                 
             except Exception as e:
                 logger.error(f"Error in position monitoring loop: {e}")
-                await asyncio.sleep(10)  # Wait before retrying
+                await loop_scheduler.wait(schedule, self._stop_event, delay=10)  # Wait before retrying
     
     async def _market_data_update_loop(self):
         """Background task for updating market data."""
         logger.info("Market data update loop started")
         
+        # Every minute from pre-market to the end of after-hours
+        schedule = LoopSchedule('market_data', 60, window=EXTENDED)
+        
         while self.running:
             try:
-                logger.debug("Updating market data...")
-                await self.market_data_service.update_market_data()
+                if loop_scheduler.should_run(schedule):
+                    logger.debug("Updating market data...")
+                    await self.market_data_service.update_market_data()
                 
-                # Wait for next interval (every minute)
-                await asyncio.sleep(60)
+                # Wait for next interval
+                await loop_scheduler.wait(schedule, self._stop_event)
                 
             except Exception as e:
                 logger.error(f"Error in market data update loop: {e}")
-                await asyncio.sleep(60)  # Wait before retrying
+                await loop_scheduler.wait(schedule, self._stop_event, delay=60)  # Wait before retrying
+    
+    async def _universe_scan_loop(self):
+        """Background task for ranking optionable-universe candidates."""
+        logger.info("Universe scan loop started")
+        
+        # Market hours only; snapshots outside the session are stale
+        schedule = LoopSchedule('universe_scan', settings.universe_scan_interval)
+        
+        while self.running:
+            try:
+                if loop_scheduler.should_run(schedule):
+                    await self.universe_scanner.scan()
+                
+                await loop_scheduler.wait(schedule, self._stop_event)
+                
+            except Exception as e:
+                logger.error(f"Error in universe scan loop: {e}")
+                await loop_scheduler.wait(schedule, self._stop_event, delay=300)
     
     async def _health_check_loop(self):
         """Background task for health checks."""
         logger.info("Health check loop started")
         
+        # Every 5 minutes in session, less often off hours
+        schedule = LoopSchedule(
+            'health_check',
+            300,
+            idle_interval=settings.offhours_health_check_interval
+        )
+        
         while self.running:
             try:
-                # Check database
-                db_healthy = check_db_connection()
-                
-                # Check Redis
-                redis_healthy = redis_manager.ping()
-                
-                # Check external APIs
-                api_healthy = await self.market_data_service.check_api_health()
-                
-                if not all([db_healthy, redis_healthy, api_healthy]):
-                    logger.warning("Health check failed - some services are unhealthy")
-                else:
-                    logger.debug("Health check passed - all services healthy")
+                if loop_scheduler.should_run(schedule):
+                    # Check database
+                    db_healthy = check_db_connection()
+                    
+                    # Check Redis
+                    redis_healthy = redis_manager.ping()
+                    
+                    # Check external APIs
+                    api_healthy = await self.market_data_service.check_api_health()
+                    
+                    if not all([db_healthy, redis_healthy, api_healthy]):
+                        logger.warning("Health check failed - some services are unhealthy")
+                    else:
+                        logger.debug("Health check passed - all services healthy")
                 
-                # Wait for next check (every 5 minutes)
-                await asyncio.sleep(300)
+                # Wait for next check
+                await loop_scheduler.wait(schedule, self._stop_event)
                 
             except Exception as e:
                 logger.error(f"Error in health check loop: {e}")
-                await asyncio.sleep(300)
+                await loop_scheduler.wait(schedule, self._stop_event, delay=300)
 
 
 async def main():
@@ -8,6 +8,7 @@ from alpaca.trading.client import TradingClient
 from alpaca.trading.requests import GetAssetsRequest
 from alpaca.trading.enums import AssetClass
 from core.database import get_db_context
+from core.blocking_executor import blocking_adapter
 from core.models import Position, User
 from core.config import settings
 import uuid
@@ -34,12 +35,12 @@ class AlpacaSyncService:
         """
         try:
             # Get account info
-            account = self.trading_client.get_account()
+            account = await blocking_adapter.run('alpaca', self.trading_client.get_account)
             logger.info(f"Account equity: ${account.equity}")
             logger.info(f"Account cash: ${account.cash}")
             
             # Get all open positions from Alpaca
-            alpaca_positions = self.trading_client.get_all_positions()
+            alpaca_positions = await blocking_adapter.run('alpaca', self.trading_client.get_all_positions)
             logger.info(f"Found {len(alpaca_positions)} positions in Alpaca account")
             
             if not alpaca_positions:
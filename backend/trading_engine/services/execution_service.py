@@ -11,7 +11,9 @@ from alpaca.trading.requests import MarketOrderRequest, LimitOrderRequest
 from alpaca.trading.enums import OrderSide, TimeInForce, OrderType
 
 from config import settings
-from core import get_db_context, get_trade_logger
+from core import (
+    get_db_context, get_trade_logger, rate_limiter, blocking_adapter, trading_calendar, provider_recorder
+)
 from core.models import TradeSignal, Execution, Position
 
 
@@ -117,7 +119,8 @@ class ExecutionService:
                 return {'valid': False, 'reason': 'Market is closed'}
             
             # Check account status
-            account = self.trading_client.get_account()
+            await rate_limiter.acquire('alpaca')
+            account = await blocking_adapter.run('alpaca', self.trading_client.get_account)
             
             if account.trading_blocked:
                 return {'valid': False, 'reason': 'Trading is blocked'}
@@ -150,7 +153,8 @@ class ExecutionService:
                     qty=signal.quantity,
                     side=side,
                     time_in_force=TimeInForce.DAY,
-                    limit_price=float(signal.limit_price)
+                    limit_price=float(signal.limit_price),
+                    client_order_id=str(uuid.uuid4())
                 )
                 order_type = 'limit'
             else:
@@ -158,12 +162,13 @@ class ExecutionService:
                     symbol=signal.option_symbol,
                     qty=signal.quantity,
                     side=side,
-                    time_in_force=TimeInForce.DAY
+                    time_in_force=TimeInForce.DAY,
+                    client_order_id=str(uuid.uuid4())
                 )
                 order_type = 'market'
             
             # Submit order
-            order = self.trading_client.submit_order(order_request)
+            order = await self._submit_order(order_request)
             
             logger.info(f"Order submitted: {order.id} ({order_type})")
             
@@ -173,7 +178,8 @@ class ExecutionService:
             if not filled_order:
                 # Cancel unfilled order
                 try:
-                    self.trading_client.cancel_order_by_id(order.id)
+                    await rate_limiter.acquire('alpaca')
+                    await blocking_adapter.run('alpaca_orders', self.trading_client.cancel_order_by_id, order.id)
                     logger.warning(f"Order {order.id} cancelled due to timeout")
                 except:
                     pass
@@ -193,13 +199,43 @@ class ExecutionService:
             logger.error(f"Error placing order: {e}")
             return None
     
+    async def _submit_order(self, order_request) -> Any:
+        """
+        Submit an order on the order executor, which never times out.
+        
+        If the submit raises anyway (e.g. the connection drops after the
+        request went out), the broker is asked for the order by its client
+        order id before the submit is reported as failed.
+        
+        Args:
+            order_request: Order request carrying a client order id
+            
+        Returns:
+            Broker order
+        """
+        await rate_limiter.acquire('alpaca')
+        try:
+            return await blocking_adapter.run('alpaca_orders', self.trading_client.submit_order, order_request)
+        except Exception as e:
+            try:
+                await rate_limiter.acquire('alpaca')
+                order = await blocking_adapter.run(
+                    'alpaca_orders', self.trading_client.get_order_by_client_id, order_request.client_order_id
+                )
+            except Exception:
+                raise e
+            
+            logger.warning(f"Order submit raised ({e}) but broker accepted {order.id}")
+            return order
+    
     async def _wait_for_fill(self, order_id: str, timeout: int = 30) -> Optional[Any]:
         """Wait for order to be filled."""
         start_time = datetime.now()
         
         while (datetime.now() - start_time).seconds < timeout:
             try:
-                order = self.trading_client.get_order_by_id(order_id)
+                await rate_limiter.acquire('alpaca')
+                order = await blocking_adapter.run('alpaca', self.trading_client.get_order_by_id, order_id)
                 
                 if order.status == 'filled':
                     return order
@@ -341,10 +377,11 @@ class ExecutionService:
                 symbol=position.option_symbol,
                 qty=abs(position.quantity),
                 side=close_side,
-                time_in_force=TimeInForce.DAY
+                time_in_force=TimeInForce.DAY,
+                client_order_id=str(uuid.uuid4())
             )
             
-            order = self.trading_client.submit_order(order_request)
+            order = await self._submit_order(order_request)
             filled_order = await self._wait_for_fill(order.id, timeout=30)
             
             if not filled_order:
@@ -391,8 +428,14 @@ class ExecutionService:
     
     async def _is_market_open(self) -> bool:
         """Check if market is open."""
+        # Nights, weekends and holidays need no broker round trip (a replay
+        # answers from the recorded clock instead)
+        if not provider_recorder.replaying and not trading_calendar.is_open():
+            return False
+        
         try:
-            clock = self.trading_client.get_clock()
+            await rate_limiter.acquire('alpaca')
+            clock = await blocking_adapter.run('alpaca', self.trading_client.get_clock)
             return clock.is_open
         except Exception as e:
             logger.error(f"Error checking market hours: {e}")
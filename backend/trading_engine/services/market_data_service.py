@@ -2,9 +2,12 @@
 Market data service for fetching and caching market data from external APIs.
 """
 import asyncio
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
-import aiohttp
+import hashlib
+import re
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Any, Tuple
+import numpy as np
 from loguru import logger
 from alpaca.data.historical import StockHistoricalDataClient
 from alpaca.data.requests import StockBarsRequest, StockLatestQuoteRequest
@@ -22,15 +25,31 @@ except ImportError:
                 pass
 
 from config import settings, LiquidityThresholds
-from core import redis_manager, CacheKeys, get_db_context
+from core import (
+    redis_manager, CacheKeys, get_db_context, rate_limiter, blocking_adapter, quote_book,
+    OptionsChain, bar_store, realized_volatility, VOLATILITY_WINDOWS, iv_history, SingleFlight,
+    policy_cache, CACHE_POLICIES, warm_store, trading_calendar, ProviderRouter, provider_recorder,
+    chain_demand, bar_aggregator, vol_surfaces, chain_archive, http_transport, HttpTransport
+)
 from core.models import MarketDataCache
 
 
+# OCC option symbol: root, YYMMDD expiration, C/P, strike x 1000
+OCC_SYMBOL = re.compile(r'^([A-Z0-9.]+?)(\d{6})([CP])(\d{8})$')
+
+
 class MarketDataService:
     """Service for fetching and managing market data."""
     
-    def __init__(self):
-        """Initialize market data service."""
+    def __init__(self, http: Optional[HttpTransport] = None):
+        """
+        Initialize market data service.
+        
+        Args:
+            http: Pooled HTTP transport for REST calls (defaults to the shared one)
+        """
+        self.http = http or http_transport
+        
         self.alpaca_stock_client = StockHistoricalDataClient(
             api_key=settings.alpaca_api_key,
             secret_key=settings.alpaca_secret_key
@@ -38,9 +57,20 @@ class MarketDataService:
         
         self.polygon_client = PolygonClient(settings.polygon_api_key)
         
-        # Rate limiting
-        self.last_alpaca_request = datetime.now()
-        self.last_polygon_request = datetime.now()
+        # Last good value per cache key, served when a provider's rate
+        # limit would otherwise make the caller wait
+        self._stale: Dict[str, Any] = {}
+        # Underlying -> {'fetched_at', 'fresh_until', 'contracts'} of the last chain snapshot
+        self._snapshots: Dict[str, Dict[str, Any]] = {}
+        # Symbol -> date the bar store was last synced with the provider
+        self._bars_checked: Dict[str, date] = {}
+        
+        # Coalesces concurrent cache misses for the same key into one fetch
+        self._flights = SingleFlight('market_data')
+        
+        # Quotes can come from either provider, hedged on tail latency
+        self._stock_quotes = ProviderRouter('stock_quotes', ['alpaca', 'polygon'])
+        self._option_quotes = ProviderRouter('option_quotes', ['polygon', 'alpaca'])
         
         logger.info("Market data service initialized")
     
@@ -54,80 +84,608 @@ class MarketDataService:
         Returns:
             Current price or None
         """
+        # Concurrent lookups of the same symbol share one fetch
+        prices = await self._flights.do(f"stock_price:{symbol}", self.get_stock_prices, [symbol])
+        return prices.get(symbol)
+    
+    async def get_stock_prices(self, symbols: List[str]) -> Dict[str, float]:
+        """
+        Get current stock prices for several symbols.
+        
+        Streamed quotes are used first, cached prices are read in one round
+        trip and the remaining symbols are fetched with one multi-symbol
+        quote request per chunk of ``settings.quote_batch_size`` symbols.
+        Stale cached prices are returned as-is and refreshed in the
+        background.
+        
+        Args:
+            symbols: Stock symbols
+            
+        Returns:
+            Mapping of symbol to price for the symbols that could be priced
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {}
+        
+        # Streamed quotes first
+        prices: Dict[str, float] = quote_book.get_prices(symbols, max_age=settings.quote_book_max_age)
+        symbols = [symbol for symbol in symbols if symbol not in prices]
+        if not symbols:
+            return prices
+        
         try:
-            # Check cache first
-            cache_key = CacheKeys.market_data(symbol, "price")
-            cached_price = redis_manager.get(cache_key)
+            # Check cache next
+            cache_keys = {symbol: CacheKeys.market_data(symbol, "price") for symbol in symbols}
+            cached, stale, missing_keys = policy_cache.lookup(cache_keys.values())
             
-            if cached_price:
-                return float(cached_price)
+            missing = []
+            for symbol in symbols:
+                cached_price = cached.get(cache_keys[symbol])
+                if cached_price:
+                    prices[symbol] = float(cached_price)
+                elif cache_keys[symbol] in missing_keys:
+                    missing.append(symbol)
             
-            # Fetch from Alpaca
-            await self._rate_limit_alpaca()
+            if stale:
+                stale_symbols = [symbol for symbol in symbols if cache_keys[symbol] in stale]
+                policy_cache.refresh_in_background(
+                    None,
+                    f"stock_prices:{','.join(stale_symbols)}",
+                    lambda: self._load_stock_prices(stale_symbols)
+                )
             
-            request = StockLatestQuoteRequest(symbol_or_symbols=symbol)
-            quote = self.alpaca_stock_client.get_stock_latest_quote(request)
+            prices.update(await self._load_stock_prices(missing))
             
-            if symbol in quote:
-                price = float(quote[symbol].ask_price + quote[symbol].bid_price) / 2
-                
-                # Cache for 5 seconds
-                redis_manager.set(cache_key, price, expiration=5)
-                
-                return price
+        except Exception as e:
+            logger.error(f"Error fetching stock prices for {len(symbols)} symbols: {e}")
+        
+        return prices
+    
+    async def _load_stock_prices(self, symbols: List[str]) -> Dict[str, float]:
+        """
+        Fetch prices from Alpaca, one request per chunk, and cache them.
+        
+        Last good prices served during an outage are returned but neither
+        cached nor fed to the bar aggregator, so they don't pass for live ticks.
+        """
+        prices = {}
+        batch_size = max(1, settings.quote_batch_size)
+        
+        for i in range(0, len(symbols), batch_size):
+            fetched, stale = await self._fetch_stock_prices(symbols[i:i + batch_size])
+            prices.update(stale)
             
-            return None
+            if fetched:
+                policy_cache.put_many(
+                    'price',
+                    {CacheKeys.market_data(symbol, "price"): price for symbol, price in fetched.items()}
+                )
+                prices.update(fetched)
+                if settings.bar_aggregation_enabled:
+                    bar_aggregator.on_prices(fetched)
+        
+        return prices
+    
+    async def _fetch_stock_prices(
+        self,
+        symbols: List[str]
+    ) -> Tuple[Dict[str, float], Dict[str, float]]:
+        """
+        Fetch mid prices for a chunk of symbols from the fastest healthy provider.
+        
+        Alpaca and Polygon can both serve the request; the slower one is
+        hedged against (see ProviderRouter).
+        
+        Returns:
+            (fresh, stale) prices: what a provider returned, and the last
+            good prices served instead when no provider could answer
+        """
+        try:
+            prices = await self._stock_quotes.call({
+                'alpaca': lambda: self._alpaca_stock_prices(symbols),
+                'polygon': lambda: self._polygon_stock_prices(symbols),
+            })
+            
+            if not prices:
+                return {}, self._serve_stale(
+                    {symbol: CacheKeys.market_data(symbol, "price") for symbol in symbols}
+                )
+            
+            for symbol, price in prices.items():
+                self._stale[CacheKeys.market_data(symbol, "price")] = price
+            
+            return prices, {}
             
         except Exception as e:
-            logger.error(f"Error fetching stock price for {symbol}: {e}")
+            logger.error(f"Error fetching quotes for {len(symbols)} symbols: {e}")
+            return {}, {}
+    
+    async def _alpaca_stock_prices(self, symbols: List[str]) -> Optional[Dict[str, float]]:
+        """Mid prices from one Alpaca latest-quote request (None if rate limited)."""
+        if not await self._acquire('alpaca'):
             return None
+        
+        request = StockLatestQuoteRequest(symbol_or_symbols=symbols)
+        quotes = await blocking_adapter.run(
+            'alpaca', self.alpaca_stock_client.get_stock_latest_quote, request
+        )
+        
+        prices = {}
+        for symbol in symbols:
+            quote = quotes.get(symbol)
+            if quote and quote.ask_price and quote.bid_price:
+                prices[symbol] = float(quote.ask_price + quote.bid_price) / 2
+        
+        return prices
     
-    async def get_options_chain(self, symbol: str) -> Optional[Dict[str, Any]]:
+    async def _polygon_stock_prices(self, symbols: List[str]) -> Optional[Dict[str, float]]:
+        """Mid prices from one Polygon tickers snapshot request (None if rate limited)."""
+        # Stock quotes (mostly hedges of a slow Alpaca call) only spend Polygon
+        # tokens above the reserve kept for options snapshots and chains
+        if not await self._acquire('polygon', reserve=settings.stock_quote_polygon_reserve):
+            return None
+        
+        url = f"{settings.polygon_base_url}/v2/snapshot/locale/us/markets/stocks/tickers"
+        params = {'tickers': ','.join(symbols), 'apiKey': settings.polygon_api_key}
+        
+        status, data = await provider_recorder.get_json('polygon', self.http.session(), url, params=params)
+        if status != 200:
+            raise RuntimeError(f"Polygon snapshot error: {status}")
+        
+        prices = {}
+        for ticker in data.get('tickers') or []:
+            quote = ticker.get('lastQuote') or {}
+            bid, ask = quote.get('p'), quote.get('P')
+            if bid and ask:
+                prices[ticker['ticker']] = (float(bid) + float(ask)) / 2
+        
+        return prices
+    
+    async def get_options_chain(self, symbol: str) -> Optional[OptionsChain]:
         """
         Get options chain for a symbol.
         
+        The chain is rebuilt incrementally: expired expirations are dropped,
+        only expirations newer than the last stored one are fetched (with a
+        periodic full refresh), and an unchanged contract set is neither
+        re-organized nor re-written to Redis.
+        
         Args:
             symbol: Stock symbol
             
         Returns:
-            Options chain data
+            Columnar options chain
         """
+        return await self._flights.do(f"options_chain:{symbol}", self._load_options_chain, symbol)
+    
+    async def _load_options_chain(self, symbol: str) -> Optional[OptionsChain]:
+        """Load an options chain from cache or the provider (see get_options_chain)."""
         try:
-            # Check cache first
             cache_key = CacheKeys.options_chain(symbol)
-            cached_chain = redis_manager.get(cache_key)
+            meta = redis_manager.get(CacheKeys.options_chain_meta(symbol)) or {}
+            fresh = time.time() < meta.get('fresh_until', 0)
+            
+            # Recently found to have no contracts
+            if meta.get('empty') and fresh:
+                return None
+            
+            cached_blob = redis_manager.get_bytes(cache_key)
+            cached_chain = OptionsChain.from_bytes(cached_blob) if cached_blob else None
+            
+            if cached_chain is None and meta.get('hash'):
+                # Contracts restored without the binary chain (warm start) - rebuild locally
+                cached_chain = self._rebuild_options_chain(symbol)
             
             if cached_chain:
+                if not fresh:
+                    # Serve the stale chain now and refresh it in the background
+                    policy_cache.refresh_in_background(
+                        None,
+                        f"options_chain_refresh:{symbol}",
+                        lambda: self._refresh_options_chain(symbol, meta, cached_chain)
+                    )
                 return cached_chain
             
-            # Fetch from Polygon
-            await self._rate_limit_polygon()
+            return await self._refresh_options_chain(symbol, meta, None)
+            
+        except Exception as e:
+            logger.error(f"Error fetching options chain for {symbol}: {e}")
+            return None
+    
+    async def _refresh_options_chain(
+        self,
+        symbol: str,
+        meta: Dict[str, Any],
+        cached_chain: Optional[OptionsChain]
+    ) -> Optional[OptionsChain]:
+        """Fetch an underlying's contracts and rebuild its cached chain if they changed."""
+        cache_key = CacheKeys.options_chain(symbol)
+        meta_key = CacheKeys.options_chain_meta(symbol)
+        policy = CACHE_POLICIES['options_chain']
+        
+        contracts = await self._refresh_options_contracts(symbol, meta)
+        
+        if contracts is None:
+            # Rate limited or failed mid-fetch - keep serving what we have
+            return cached_chain or self._stale.get(cache_key)
+        
+        meta['checked_at'] = datetime.now().isoformat()
+        
+        if not contracts:
+            # Negative entry: don't ask again for a while
+            meta.update(empty=True, fresh_until=time.time() + policy.negative())
+            redis_manager.set(meta_key, meta, expiration=settings.options_chain_retention)
+            warm_store.stage(meta_key, meta, settings.options_chain_retention, source='polygon')
+            return None
+        
+        meta.pop('empty', None)
+        meta['fresh_until'] = time.time() + policy.fresh_ttl()
+        chain_hash = self._hash_contracts(contracts)
+        
+        if cached_chain and chain_hash == meta.get('hash'):
+            # Unchanged chain: only extend its lifetime
+            redis_manager.expire(cache_key, settings.options_chain_retention)
+            redis_manager.set(meta_key, meta, expiration=settings.options_chain_retention)
+            warm_store.stage(meta_key, meta, settings.options_chain_retention, source='polygon')
+            self._stale[cache_key] = cached_chain
+            return cached_chain
+        
+        # Organize by expiration, type and strike
+        chain = OptionsChain.from_contracts(symbol, contracts)
+        
+        meta['hash'] = chain_hash
+        redis_manager.set_bytes(cache_key, chain.to_bytes(), expiration=settings.options_chain_retention)
+        redis_manager.set(
+            CacheKeys.options_chain_contracts(symbol),
+            contracts,
+            expiration=settings.options_chain_retention
+        )
+        redis_manager.set(meta_key, meta, expiration=settings.options_chain_retention)
+        warm_store.stage_many(
+            {CacheKeys.options_chain_contracts(symbol): contracts, meta_key: meta},
+            settings.options_chain_retention,
+            source='polygon'
+        )
+        self._stale[cache_key] = chain
+        
+        return chain
+    
+    def _rebuild_options_chain(self, symbol: str) -> Optional[OptionsChain]:
+        """Rebuild and cache the binary chain from the stored contract rows."""
+        contracts = redis_manager.get(CacheKeys.options_chain_contracts(symbol))
+        if not contracts:
+            return None
+        
+        today = date.today().isoformat()
+        chain = OptionsChain.from_contracts(symbol, [row for row in contracts if row[1] >= today])
+        redis_manager.set_bytes(
+            CacheKeys.options_chain(symbol),
+            chain.to_bytes(),
+            expiration=settings.options_chain_retention
+        )
+        return chain
+    
+    async def _refresh_options_contracts(
+        self,
+        symbol: str,
+        meta: Dict[str, Any]
+    ) -> Optional[List[List[Any]]]:
+        """
+        Bring the stored contract list for an underlying up to date.
+        
+        Contracts are kept as compact ``[ticker, expiration, strike, type]``
+        rows. Only the expirations and strikes the active users' strategies
+        can trade are fetched (see ``core.chain_window``); the band is
+        refetched when the demand widens or spot moves outside it. ``meta``
+        is updated in place with the refresh bookkeeping.
+        
+        Returns:
+            Current contract rows, or None if the fetch could not complete
+        """
+        today = date.today()
+        now = datetime.now()
+        window = chain_demand.window()
+        spot = self._spot_price(symbol)
+        
+        nearest = (today + timedelta(days=window.min_dte)).isoformat()
+        stored = redis_manager.get(CacheKeys.options_chain_contracts(symbol)) or []
+        stored = [row for row in stored if row[1] >= nearest]
+        
+        full_refresh_at = meta.get('full_refresh_at')
+        needs_full = (
+            not stored or
+            not full_refresh_at or
+            not window.covered_by(meta.get('window'), spot) or
+            (now - datetime.fromisoformat(full_refresh_at)).total_seconds() >= settings.options_chain_full_refresh_interval
+        )
+        
+        if needs_full:
+            meta['window'] = window.describe(spot)
+        fetched_window = meta['window']
+        
+        params = {
+            'underlying_ticker': symbol,
+            'expiration_date.gte': (today + timedelta(days=fetched_window['min_dte'])).isoformat(),
+            'expiration_date.lte': (today + timedelta(days=fetched_window['max_dte'])).isoformat(),
+        }
+        if fetched_window['strike_low'] is not None:
+            params['strike_price.gte'] = fetched_window['strike_low']
+            params['strike_price.lte'] = fetched_window['strike_high']
+        if not needs_full:
+            # Only expirations that entered the window since the last refresh
+            del params['expiration_date.gte']
+            params['expiration_date.gt'] = max(row[1] for row in stored)
+        
+        fetched = []
+        async for page in self._iter_polygon_pages('/v3/reference/options/contracts', params):
+            if page is None:
+                return None
+            fetched.extend(
+                [
+                    contract['ticker'],
+                    contract['expiration_date'],
+                    float(contract['strike_price']),
+                    contract['contract_type'].lower()
+                ]
+                for contract in page
+            )
+        
+        if needs_full:
+            meta['full_refresh_at'] = now.isoformat()
+            return fetched
+        
+        return stored + fetched
+    
+    async def _iter_polygon_pages(
+        self,
+        path: str,
+        params: Dict[str, Any],
+        limit: int = 1000
+    ):
+        """
+        Stream pages of results from a Polygon v3 endpoint, following cursors.
+        
+        Each page spends one Polygon rate-limit token.
+        
+        Args:
+            path: Endpoint path
+            params: Query filters
+            limit: Page size
+            
+        Yields:
+            The ``results`` list of each page, or None (then stops) if the
+            rate limit or an error interrupted the walk
+        """
+        url = f"{settings.polygon_base_url}{path}"
+        query = dict(params, limit=limit, apiKey=settings.polygon_api_key)
+        
+        while url:
+            if not await self._acquire('polygon'):
+                yield None
+                return
+            
+            # Chain and snapshot pages run to megabytes; stream them
+            status, data = await provider_recorder.stream_json('polygon', self.http, url, params=query)
+            if status != 200:
+                logger.error(f"Polygon {path} error: {status}")
+                yield None
+                return
+            
+            yield data.get('results', [])
             
-            # Get options contracts
-            contracts = self.polygon_client.list_options_contracts(
-                underlying_ticker=symbol,
-                limit=1000
+            # next_url already carries the cursor and filters
+            url = data.get('next_url')
+            query = {'apiKey': settings.polygon_api_key}
+    
+    @staticmethod
+    def _hash_contracts(contracts: List[List[Any]]) -> str:
+        """Order-independent fingerprint of a contract list."""
+        digest = hashlib.sha1()
+        for ticker in sorted(row[0] for row in contracts):
+            digest.update(ticker.encode())
+        return digest.hexdigest()
+    
+    async def get_options_snapshot(self, underlying: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Get quotes, volume, open interest and Greeks for an underlying's contracts.
+        
+        The whole chain (within the configured expiration and strike window)
+        is fetched with one paged snapshot request and cached per
+        underlying, so per-contract quotes become lookups.
+        
+        Args:
+            underlying: Underlying symbol
+            
+        Returns:
+            Mapping of contract ticker (without the "O:" prefix) to quote
+            data, or None if no snapshot is available
+        """
+        snapshot = self._cached_snapshot(underlying)
+        if snapshot is not None:
+            return snapshot
+        
+        return await self._flights.do(f"options_snapshot:{underlying}", self._load_options_snapshot, underlying)
+    
+    async def _load_options_snapshot(self, underlying: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Load a chain snapshot from cache or the provider (see get_options_snapshot)."""
+        try:
+            snapshot = self._cached_snapshot(underlying)
+            if snapshot is not None:
+                return snapshot
+            
+            contracts = await self._fetch_options_snapshot(underlying)
+            
+            if contracts is None:
+                # Rate limited or failed mid-fetch - serve the last snapshot
+                previous = self._snapshots.get(underlying)
+                return previous['contracts'] if previous else None
+            
+            # Quotes move slowly outside the session; keep them longer
+            ttl = CACHE_POLICIES['options_snapshot'].fresh_ttl()
+            fetched_at = time.time()
+            payload = {'fetched_at': fetched_at, 'fresh_until': fetched_at + ttl, 'contracts': contracts}
+            self._snapshots[underlying] = payload
+            redis_manager.set(
+                CacheKeys.options_snapshot(underlying),
+                payload,
+                expiration=max(1, int(ttl))
             )
             
-            if not contracts:
-                return None
+            self._record_atm_iv(underlying, contracts)
             
-            # Organize by expiration and strike
-            chain = self._organize_options_chain(contracts)
+            # Queued for the background archive writer
+            chain_archive.stage(underlying, contracts, fetched_at)
             
-            # Cache for 5 minutes
-            redis_manager.set(cache_key, chain, expiration=300)
+            # Refit the smiles of expirations whose quotes moved
+            vol_surfaces.update(underlying, contracts.values())
             
-            return chain
+            return contracts
             
         except Exception as e:
-            logger.error(f"Error fetching options chain for {symbol}: {e}")
+            logger.error(f"Error fetching options snapshot for {underlying}: {e}")
             return None
     
+    async def get_options_snapshots(self, underlyings: List[str]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        Get snapshots for several underlyings concurrently.
+        
+        Args:
+            underlyings: Underlying symbols
+            
+        Returns:
+            Mapping of underlying to its snapshot for those available
+        """
+        underlyings = list(dict.fromkeys(underlyings))
+        results = await asyncio.gather(
+            *(self.get_options_snapshot(u) for u in underlyings),
+            return_exceptions=True
+        )
+        return {
+            underlying: snapshot
+            for underlying, snapshot in zip(underlyings, results)
+            if isinstance(snapshot, dict)
+        }
+    
+    def _cached_snapshot(self, underlying: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Fresh snapshot from memory or Redis, without calling the provider."""
+        local = self._snapshots.get(underlying)
+        if local and time.time() < local.get('fresh_until', 0):
+            return local['contracts']
+        
+        stored = redis_manager.get(CacheKeys.options_snapshot(underlying))
+        if stored:
+            self._snapshots[underlying] = stored
+            # Fetched elsewhere (or before a restart); unchanged expirations aren't refit
+            vol_surfaces.update(underlying, stored['contracts'].values())
+            return stored['contracts']
+        
+        return None
+    
+    @staticmethod
+    def _spot_price(symbol: str) -> Optional[float]:
+        """Latest known underlying price from the quote book or price cache (no provider call)."""
+        spot = quote_book.get(symbol, max_age=settings.quote_book_max_age)
+        return spot['mid'] if spot else policy_cache.peek(CacheKeys.market_data(symbol, "price"))
+    
+    async def _fetch_options_snapshot(self, underlying: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Page through Polygon's chain snapshot for an underlying.
+        
+        Returns:
+            Contract quotes keyed by ticker, or None if the fetch could not complete
+        """
+        params = {
+            'expiration_date.gte': date.today().isoformat(),
+            'expiration_date.lte': (date.today() + timedelta(days=settings.options_snapshot_max_dte)).isoformat(),
+        }
+        
+        spot_price = self._spot_price(underlying)
+        if spot_price:
+            band = settings.options_snapshot_strike_range_pct / 100
+            params['strike_price.gte'] = round(float(spot_price) * (1 - band), 2)
+            params['strike_price.lte'] = round(float(spot_price) * (1 + band), 2)
+        
+        contracts = {}
+        async for page in self._iter_polygon_pages(f"/v3/snapshot/options/{underlying}", params, limit=250):
+            if page is None:
+                return None
+            for result in page:
+                quote = self._parse_snapshot_contract(result)
+                if quote:
+                    contracts[quote['symbol']] = quote
+        
+        return contracts
+    
+    @staticmethod
+    def _parse_snapshot_contract(result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Flatten one Polygon snapshot result into a quote dict."""
+        details = result.get('details') or {}
+        ticker = details.get('ticker')
+        if not ticker:
+            return None
+        
+        last_quote = result.get('last_quote') or {}
+        greeks = result.get('greeks') or {}
+        bid = last_quote.get('bid') or 0
+        ask = last_quote.get('ask') or 0
+        
+        return {
+            'symbol': quote_book.normalize(ticker),
+            'underlying_price': (result.get('underlying_asset') or {}).get('price'),
+            'strike': details.get('strike_price'),
+            'expiration': details.get('expiration_date'),
+            'type': (details.get('contract_type') or '').lower(),
+            'bid': bid,
+            'ask': ask,
+            'bid_size': last_quote.get('bid_size', 0),
+            'ask_size': last_quote.get('ask_size', 0),
+            'mid': last_quote.get('midpoint') or (bid + ask) / 2,
+            'spread': ask - bid,
+            'spread_pct': ((ask - bid) / ask) * 100 if ask > 0 else 0,
+            'timestamp': last_quote.get('last_updated'),
+            'volume': (result.get('day') or {}).get('volume', 0),
+            'open_interest': result.get('open_interest', 0),
+            'iv': result.get('implied_volatility'),
+            'delta': greeks.get('delta'),
+            'gamma': greeks.get('gamma'),
+            'theta': greeks.get('theta'),
+            'vega': greeks.get('vega'),
+        }
+    
+    def _record_atm_iv(self, underlying: str, contracts: Dict[str, Dict[str, Any]]):
+        """Record the snapshot's ATM IV (expiration nearest 30 days) in the IV history."""
+        try:
+            quoted = [c for c in contracts.values() if c['iv'] and c['strike'] and c['expiration']]
+            spot = next((c['underlying_price'] for c in quoted if c['underlying_price']), None)
+            if not quoted or not spot:
+                return
+            
+            target = date.today() + timedelta(days=30)
+            expiration = min(
+                {c['expiration'] for c in quoted},
+                key=lambda exp: abs((date.fromisoformat(exp) - target).days)
+            )
+            
+            # Average the call and put IV at the strike closest to spot
+            candidates = [c for c in quoted if c['expiration'] == expiration]
+            atm_strike = min({c['strike'] for c in candidates}, key=lambda k: abs(k - spot))
+            ivs = [c['iv'] for c in candidates if c['strike'] == atm_strike]
+            
+            iv_history.record(underlying, sum(ivs) / len(ivs) * 100)
+            
+        except Exception as e:
+            logger.error(f"Error recording ATM IV for {underlying}: {e}")
+    
     async def get_option_quote(self, option_symbol: str) -> Optional[Dict[str, Any]]:
         """
         Get quote for a specific option.
         
+        Streamed quotes come first (with snapshot volume and open interest
+        merged in when cached), then the underlying's chain snapshot, and
+        only contracts outside the snapshot window fall back to a
+        per-contract last-quote call.
+        
         Args:
             option_symbol: Option symbol
             
@@ -135,28 +693,94 @@ class MarketDataService:
             Option quote data
         """
         try:
-            await self._rate_limit_polygon()
+            ticker = quote_book.normalize(option_symbol)
+            parsed = OCC_SYMBOL.match(ticker)
+            underlying = parsed.group(1) if parsed else None
+            
+            # Streamed quote first
+            streamed = quote_book.get(option_symbol, max_age=settings.quote_book_max_age)
+            if streamed:
+                snapshot = self._cached_snapshot(underlying) if underlying else None
+                if snapshot and ticker in snapshot:
+                    return dict(snapshot[ticker], **streamed)
+                return streamed
+            
+            # Then the underlying's chain snapshot
+            if underlying:
+                snapshot = await self.get_options_snapshot(underlying)
+                if snapshot and ticker in snapshot:
+                    return snapshot[ticker]
             
-            quote = self.polygon_client.get_last_quote(option_symbol)
+            stale_key = f"option_quote:{option_symbol}"
+            quote = await self._option_quotes.call({
+                'polygon': lambda: self._polygon_option_quote(option_symbol),
+                'alpaca': lambda: self._alpaca_option_quote(ticker),
+            })
             
             if quote:
-                return {
-                    'bid': quote.bid_price,
-                    'ask': quote.ask_price,
-                    'bid_size': quote.bid_size,
-                    'ask_size': quote.ask_size,
-                    'mid': (quote.bid_price + quote.ask_price) / 2,
-                    'spread': quote.ask_price - quote.bid_price,
-                    'spread_pct': ((quote.ask_price - quote.bid_price) / quote.ask_price) * 100 if quote.ask_price > 0 else 0,
-                    'timestamp': quote.sip_timestamp
-                }
+                self._stale[stale_key] = quote
+                return quote
             
-            return None
+            return self._stale.get(stale_key)
             
         except Exception as e:
             logger.error(f"Error fetching option quote for {option_symbol}: {e}")
             return None
     
+    @staticmethod
+    def _option_quote(bid: float, ask: float, bid_size: int, ask_size: int, timestamp: Any) -> Dict[str, Any]:
+        """Build an option quote dict from top-of-book values."""
+        return {
+            'bid': bid,
+            'ask': ask,
+            'bid_size': bid_size,
+            'ask_size': ask_size,
+            'mid': (bid + ask) / 2,
+            'spread': ask - bid,
+            'spread_pct': ((ask - bid) / ask) * 100 if ask > 0 else 0,
+            'timestamp': timestamp
+        }
+    
+    async def _polygon_option_quote(self, option_symbol: str) -> Optional[Dict[str, Any]]:
+        """Last quote for one contract from Polygon (None if rate limited)."""
+        if not await self._acquire('polygon'):
+            return None
+        
+        quote = await blocking_adapter.run(
+            'polygon', self.polygon_client.get_last_quote, option_symbol
+        )
+        if not quote:
+            return None
+        
+        return self._option_quote(
+            quote.bid_price, quote.ask_price, quote.bid_size, quote.ask_size, quote.sip_timestamp
+        )
+    
+    async def _alpaca_option_quote(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """Latest quote for one contract from Alpaca's options data API (None if rate limited)."""
+        if not await self._acquire('alpaca'):
+            return None
+        
+        url = f"{settings.alpaca_data_url}/v1beta1/options/quotes/latest"
+        headers = {
+            'APCA-API-KEY-ID': settings.alpaca_api_key,
+            'APCA-API-SECRET-KEY': settings.alpaca_secret_key,
+        }
+        
+        status, data = await provider_recorder.get_json(
+            'alpaca', self.http.session(), url, params={'symbols': ticker}, headers=headers
+        )
+        if status != 200:
+            raise RuntimeError(f"Alpaca option quote error: {status}")
+        
+        quote = (data.get('quotes') or {}).get(ticker)
+        if not quote:
+            return None
+        
+        return self._option_quote(
+            quote.get('bp', 0), quote.get('ap', 0), quote.get('bs', 0), quote.get('as', 0), quote.get('t')
+        )
+    
     async def calculate_liquidity_score(
         self,
         volume: int,
@@ -208,52 +832,186 @@ class MarketDataService:
             Annualized volatility
         """
         try:
-            # Check cache
             cache_key = CacheKeys.market_data(symbol, f"hv_{days}")
-            cached_hv = redis_manager.get(cache_key)
+            hv = await policy_cache.get_or_load(
+                'volatility', cache_key, lambda: self._compute_historical_volatility(symbol, days)
+            )
+            return float(hv) if hv is not None else None
             
-            if cached_hv:
-                return float(cached_hv)
+        except Exception as e:
+            logger.error(f"Error calculating historical volatility for {symbol}: {e}")
+            return None
+    
+    async def _compute_historical_volatility(self, symbol: str, days: int) -> Optional[float]:
+        """Compute historical volatility from the local bar store (see get_historical_volatility)."""
+        cache_key = CacheKeys.market_data(symbol, f"hv_{days}")
+        
+        # Bring the local bar file up to date, then compute from disk
+        await self._sync_daily_bars([symbol], days + 1)
+        
+        closes = bar_store.closes(symbol, days + 1)
+        annualized_vol = realized_volatility(closes, windows=(days,))[f"hv_{days}"][0]
+        
+        if not np.isfinite(annualized_vol):
+            return self._stale.get(cache_key)
+        
+        annualized_vol = round(float(annualized_vol), 2)
+        self._stale[cache_key] = annualized_vol
+        
+        return annualized_vol
+    
+    async def get_volatility_profiles(self, symbols: List[str]) -> Dict[str, Dict[str, float]]:
+        """
+        Get 20/60/252-day realized volatilities for several symbols.
+        
+        Cached profiles are read in one round trip (stale ones are refreshed
+        in the background); the rest share one multi-symbol bar request and
+        one vectorized computation.
+        
+        Args:
+            symbols: Stock symbols
             
-            # Fetch historical data
-            await self._rate_limit_alpaca()
+        Returns:
+            Mapping of symbol to ``{'hv_20': ..., 'log_hv_20': ..., ...}``
+            (percent, annualized) for the symbols with enough history
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {}
+        
+        try:
+            cache_keys = {symbol: CacheKeys.market_data(symbol, 'volatility') for symbol in symbols}
+            cached, stale, missing_keys = policy_cache.lookup(cache_keys.values())
             
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days + 10)  # Extra buffer
+            profiles = {
+                symbol: cached[key] for symbol, key in cache_keys.items() if cached.get(key)
+            }
+            missing = [symbol for symbol in symbols if cache_keys[symbol] in missing_keys]
             
-            request = StockBarsRequest(
-                symbol_or_symbols=symbol,
-                timeframe=TimeFrame.Day,
-                start=start_date,
-                end=end_date
-            )
+            if stale:
+                stale_symbols = [symbol for symbol in symbols if cache_keys[symbol] in stale]
+                policy_cache.refresh_in_background(
+                    None,
+                    f"volatility:{','.join(stale_symbols)}",
+                    lambda: self._compute_volatility_profiles(stale_symbols)
+                )
             
-            bars = self.alpaca_stock_client.get_stock_bars(request)
+            if missing:
+                profiles.update(await self._compute_volatility_profiles(missing))
             
-            if symbol not in bars or len(bars[symbol]) < days:
-                return None
+            return profiles
             
-            # Calculate returns
-            prices = [bar.close for bar in bars[symbol]]
-            returns = []
+        except Exception as e:
+            logger.error(f"Error calculating volatility profiles for {len(symbols)} symbols: {e}")
+            return {}
+    
+    async def _compute_volatility_profiles(self, symbols: List[str]) -> Dict[str, Dict[str, float]]:
+        """Compute and cache volatility profiles from the local bar store."""
+        lookback = max(VOLATILITY_WINDOWS) + 1
+        await self._sync_daily_bars(symbols, lookback)
+        
+        # One row per symbol, left-padded where history is short
+        closes = np.full((len(symbols), lookback), np.nan)
+        for row, symbol in enumerate(symbols):
+            history = bar_store.closes(symbol, lookback)
+            if len(history):
+                closes[row, -len(history):] = history
+        
+        volatilities = realized_volatility(closes)
+        
+        profiles = {}
+        entries = {}
+        for row, symbol in enumerate(symbols):
+            cache_key = CacheKeys.market_data(symbol, 'volatility')
+            profile = {
+                name: round(float(values[row]), 2)
+                for name, values in volatilities.items()
+                if np.isfinite(values[row])
+            }
+            
+            if not profile:
+                # Not enough history: the last good profile, or a negative entry
+                profile = self._stale.get(cache_key)
+                entries[cache_key] = profile
+                if profile:
+                    profiles[symbol] = profile
+                continue
+            
+            profiles[symbol] = profile
+            entries[cache_key] = profile
+            self._stale[cache_key] = profile
+            for window in VOLATILITY_WINDOWS:
+                if f"hv_{window}" in profile:
+                    entries[CacheKeys.market_data(symbol, f"hv_{window}")] = profile[f"hv_{window}"]
+        
+        policy_cache.put_many('volatility', entries)
+        
+        return profiles
+    
+    async def _sync_daily_bars(self, symbols: List[str], lookback: int):
+        """
+        Append completed daily bars missing from the local bar store.
+        
+        Only bars after the last stored date are requested, so after the
+        initial backfill each call downloads at most a few days. All symbols
+        that are behind share one multi-symbol request per chunk.
+        
+        Args:
+            symbols: Stock symbols
+            lookback: Trading days to backfill when nothing is stored yet
+        """
+        today = date.today()
+        previous_session = trading_calendar.previous_trading_day(today)
+        
+        # ~365 calendar days per 252 trading days, plus a buffer
+        backfill_start = today - timedelta(days=int(lookback * 365 / 252) + 10)
+        
+        starts = {}
+        for symbol in symbols:
+            # Holidays return no bars; don't ask again until tomorrow
+            if self._bars_checked.get(symbol) == today:
+                continue
             
-            for i in range(1, len(prices)):
-                daily_return = (prices[i] - prices[i-1]) / prices[i-1]
-                returns.append(daily_return)
+            last = bar_store.last_date(symbol)
+            if last is None:
+                starts[symbol] = backfill_start
+            elif last < previous_session:
+                starts[symbol] = last + timedelta(days=1)
+        
+        if not starts:
+            return
+        
+        pending = list(starts)
+        batch_size = max(1, settings.quote_batch_size)
+        
+        for i in range(0, len(pending), batch_size):
+            chunk = pending[i:i + batch_size]
             
-            # Calculate standard deviation and annualize
-            import numpy as np
-            std_dev = np.std(returns)
-            annualized_vol = std_dev * np.sqrt(252) * 100  # Annualize and convert to percentage
+            if not await self._acquire('alpaca'):
+                return
             
-            # Cache for 1 hour
-            redis_manager.set(cache_key, annualized_vol, expiration=3600)
+            # End at midnight today so the in-progress session is never stored
+            request = StockBarsRequest(
+                symbol_or_symbols=chunk,
+                timeframe=TimeFrame.Day,
+                start=datetime.combine(min(starts[s] for s in chunk), datetime.min.time()),
+                end=datetime.combine(today, datetime.min.time())
+            )
             
-            return round(annualized_vol, 2)
+            bars = await blocking_adapter.run(
+                'alpaca', self.alpaca_stock_client.get_stock_bars, request
+            )
             
-        except Exception as e:
-            logger.error(f"Error calculating historical volatility for {symbol}: {e}")
-            return None
+            for symbol in chunk:
+                rows = [
+                    (bar.timestamp.date(), bar.open, bar.high, bar.low, bar.close, bar.volume)
+                    for bar in (bars[symbol] if symbol in bars else [])
+                    if bar.timestamp.date() < today
+                ]
+                
+                # Bars already stored are skipped by the append
+                await asyncio.to_thread(bar_store.append, symbol, rows)
+                self._bars_checked[symbol] = today
     
     async def get_iv_percentile(
         self,
@@ -264,25 +1022,28 @@ class MarketDataService:
         """
         Calculate IV percentile.
         
+        Uses the rolling daily ATM IV history when there is enough of it and
+        falls back to comparing IV with historical volatility otherwise.
+        
         Args:
             symbol: Stock symbol
-            current_iv: Current implied volatility
-            days: Lookback period
+            current_iv: Current implied volatility (percent)
+            days: Lookback period for the HV fallback
             
         Returns:
             IV percentile (0-100)
         """
         try:
-            # This is a simplified version - in production, you'd fetch historical IV data
-            # For now, we'll use historical volatility as a proxy
+            percentile = iv_history.percentile(symbol, current_iv)
+            if percentile is not None:
+                return percentile
             
+            # Not enough IV history yet: use historical volatility as a proxy
             hv = await self.get_historical_volatility(symbol, days)
             
             if not hv:
                 return None
             
-            # Simple percentile calculation (current IV vs HV)
-            # In production, use actual historical IV data
             if current_iv > hv * 1.5:
                 return 90.0
             elif current_iv > hv * 1.2:
@@ -298,6 +1059,18 @@ class MarketDataService:
             logger.error(f"Error calculating IV percentile for {symbol}: {e}")
             return None
     
+    def get_iv_ranks(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get latest ATM IV with its percentile and rank for several symbols.
+        
+        Args:
+            symbols: Stock symbols
+            
+        Returns:
+            Mapping of symbol to IV statistics for symbols with IV history
+        """
+        return iv_history.summary(symbols)
+    
     async def update_market_data(self):
         """Update market data for all watched symbols."""
         try:
@@ -313,12 +1086,11 @@ class MarketDataService:
             
             logger.info(f"Updating market data for {len(symbols)} symbols")
             
-            # Update prices and options chains
-            tasks = []
-            for symbol in symbols:
-                tasks.append(self.get_stock_price(symbol))
-                tasks.append(self.get_options_chain(symbol))
+            # Update prices and volatilities in bulk, then options chains
+            await self.get_stock_prices(symbols)
+            await self.get_volatility_profiles(symbols)
             
+            tasks = [self.get_options_chain(symbol) for symbol in symbols]
             await asyncio.gather(*tasks, return_exceptions=True)
             
             logger.info("Market data update complete")
@@ -344,60 +1116,35 @@ class MarketDataService:
             logger.error(f"API health check failed: {e}")
             return False
     
-    def _organize_options_chain(self, contracts: List) -> Dict[str, Any]:
-        """Organize options contracts into a structured chain."""
-        chain = {
-            'calls': {},
-            'puts': {},
-            'expirations': set()
-        }
-        
-        for contract in contracts:
-            expiration = contract.expiration_date
-            strike = contract.strike_price
-            option_type = contract.contract_type.lower()
-            
-            chain['expirations'].add(expiration)
-            
-            if option_type == 'call':
-                if expiration not in chain['calls']:
-                    chain['calls'][expiration] = {}
-                chain['calls'][expiration][strike] = {
-                    'symbol': contract.ticker,
-                    'strike': strike,
-                    'expiration': expiration,
-                    'type': 'call'
-                }
-            else:
-                if expiration not in chain['puts']:
-                    chain['puts'][expiration] = {}
-                chain['puts'][expiration][strike] = {
-                    'symbol': contract.ticker,
-                    'strike': strike,
-                    'expiration': expiration,
-                    'type': 'put'
-                }
-        
-        chain['expirations'] = sorted(list(chain['expirations']))
-        
-        return chain
+    def get_single_flight_stats(self) -> Dict[str, Any]:
+        """Get coalesced-call counters per cache key."""
+        return self._flights.get_stats()
     
-    async def _rate_limit_alpaca(self):
-        """Enforce Alpaca rate limiting."""
-        elapsed = (datetime.now() - self.last_alpaca_request).total_seconds()
-        min_interval = 60 / settings.alpaca_rate_limit
-        
-        if elapsed < min_interval:
-            await asyncio.sleep(min_interval - elapsed)
+    async def _acquire(self, service: str, cost: float = 1.0, reserve: float = 0.0) -> bool:
+        """
+        Take rate limit tokens for a provider call.
         
-        self.last_alpaca_request = datetime.now()
-    
-    async def _rate_limit_polygon(self):
-        """Enforce Polygon rate limiting."""
-        elapsed = (datetime.now() - self.last_polygon_request).total_seconds()
-        min_interval = 60 / settings.polygon_rate_limit
+        Waits at most ``settings.rate_limit_max_wait`` seconds; when the
+        bucket cannot refill in time the call is deferred and the caller
+        falls back to the last good value it has. ``reserve`` tokens are
+        left in the bucket for other callers.
+        """
+        granted = await rate_limiter.acquire(
+            service,
+            cost=cost,
+            max_wait=settings.rate_limit_max_wait,
+            reserve=reserve
+        )
         
-        if elapsed < min_interval:
-            await asyncio.sleep(min_interval - elapsed)
+        if not granted:
+            logger.debug(f"{service} rate limit reached, serving stale data")
         
-        self.last_polygon_request = datetime.now()
+        return granted
+    
+    def _serve_stale(self, cache_keys: Dict[str, str]) -> Dict[str, Any]:
+        """Return last good values for the given {name: cache key} mapping."""
+        return {
+            name: self._stale[key]
+            for name, key in cache_keys.items()
+            if key in self._stale
+        }
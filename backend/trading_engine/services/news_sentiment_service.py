@@ -1,23 +1,29 @@
 """
 News sentiment analysis service.
 """
-import asyncio
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
-import aiohttp
 from loguru import logger
 from transformers import pipeline
 
 from config import settings
-from core import get_db_context, redis_manager, CacheKeys
+from core import (
+    get_db_context, CacheKeys, rate_limiter, policy_cache, provider_recorder, http_transport, HttpTransport
+)
 from core.models import NewsSentiment
 
 
 class NewsSentimentService:
     """Service for fetching and analyzing news sentiment."""
     
-    def __init__(self):
-        """Initialize news sentiment service."""
+    def __init__(self, http: Optional[HttpTransport] = None):
+        """
+        Initialize news sentiment service.
+        
+        Args:
+            http: Pooled HTTP transport for REST calls (defaults to the shared one)
+        """
+        self.http = http or http_transport
         self.news_api_key = settings.news_api_key
         self.news_api_url = "https://newsapi.org/v2/everything"
         
@@ -33,7 +39,8 @@ class NewsSentimentService:
             logger.warning(f"Failed to load FinBERT, using default model: {e}")
             self.sentiment_analyzer = pipeline("sentiment-analysis")
         
-        self.last_news_request = datetime.now()
+        # Last fetched articles per symbol, served when the rate limit is hit
+        self._stale_news: Dict[str, List[Dict[str, Any]]] = {}
         
         logger.info("News sentiment service initialized")
     
@@ -53,59 +60,79 @@ class NewsSentimentService:
             List of news articles
         """
         try:
-            # Check cache first
-            cache_key = CacheKeys.news_sentiment(symbol)
-            cached_news = redis_manager.get(cache_key)
-            
-            if cached_news:
-                return cached_news
-            
-            # Rate limiting
-            await self._rate_limit()
-            
-            # Fetch from NewsAPI
-            from_date = datetime.now() - timedelta(hours=hours_back)
-            
-            params = {
-                'apiKey': self.news_api_key,
-                'q': symbol,
-                'from': from_date.isoformat(),
-                'sortBy': 'publishedAt',
-                'language': 'en',
-                'pageSize': 20
-            }
+            # Stale articles are served while they are refreshed in the background
+            articles = await policy_cache.get_or_load(
+                'news',
+                CacheKeys.news_sentiment(symbol),
+                lambda: self._fetch_news(symbol, hours_back)
+            )
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(self.news_api_url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        articles = data.get('articles', [])
-                        
-                        # Process articles
-                        processed_articles = []
-                        for article in articles:
-                            processed = {
-                                'headline': article.get('title', ''),
-                                'source': article.get('source', {}).get('name', ''),
-                                'url': article.get('url', ''),
-                                'published_at': article.get('publishedAt', ''),
-                                'description': article.get('description', ''),
-                                'content': article.get('content', '')
-                            }
-                            processed_articles.append(processed)
-                        
-                        # Cache for 15 minutes
-                        redis_manager.set(cache_key, processed_articles, expiration=900)
-                        
-                        return processed_articles
-                    else:
-                        logger.error(f"NewsAPI error: {response.status}")
-                        return []
+            if articles is None:
+                return self._stale_news.get(symbol, [])
+            return articles
             
         except Exception as e:
             logger.error(f"Error fetching news for {symbol}: {e}")
             return []
     
+    async def _fetch_news(
+        self,
+        symbol: str,
+        hours_back: int
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Fetch news articles for a symbol from NewsAPI.
+        
+        Returns:
+            Processed articles, or None if the rate limit or an error
+            prevented the fetch
+        """
+        # Rate limiting - defer to the last fetched articles rather than sleep
+        granted = await rate_limiter.acquire(
+            'news_api',
+            max_wait=settings.rate_limit_max_wait
+        )
+        if not granted:
+            logger.debug(f"NewsAPI rate limit reached, serving stale news for {symbol}")
+            return None
+        
+        # Fetch from NewsAPI
+        from_date = datetime.now() - timedelta(hours=hours_back)
+        
+        params = {
+            'apiKey': self.news_api_key,
+            'q': symbol,
+            'from': from_date.isoformat(),
+            'sortBy': 'publishedAt',
+            'language': 'en',
+            'pageSize': 20
+        }
+        
+        # The time window moves every run, so it isn't part of the replay key
+        status, data = await provider_recorder.get_json(
+            'news_api', self.http.session(), self.news_api_url, params=params, volatile=('from',)
+        )
+        if status != 200:
+            logger.error(f"NewsAPI error: {status}")
+            return None
+        
+        # Process articles
+        processed_articles = []
+        for article in data.get('articles', []):
+            processed = {
+                'headline': article.get('title', ''),
+                'source': article.get('source', {}).get('name', ''),
+                'url': article.get('url', ''),
+                'published_at': article.get('publishedAt', ''),
+                'description': article.get('description', ''),
+                'content': article.get('content', '')
+            }
+            processed_articles.append(processed)
+        
+        self._stale_news[symbol] = processed_articles
+        
+        return processed_articles
+    
     async def analyze_sentiment(
         self,
         text: str
@@ -383,13 +410,3 @@ class NewsSentimentService:
             return 'legal'
         else:
             return 'general'
-    
-    async def _rate_limit(self):
-        """Enforce NewsAPI rate limiting."""
-        elapsed = (datetime.now() - self.last_news_request).total_seconds()
-        min_interval = 86400 / settings.news_api_rate_limit  # Daily limit
-        
-        if elapsed < min_interval:
-            await asyncio.sleep(min_interval - elapsed)
-        
-        self.last_news_request = datetime.now()
@@ -8,19 +8,30 @@ import logging
 from typing import Optional, Dict, List
 from openai import OpenAI
 
+from core.blocking_executor import blocking_adapter
+from core.http_transport import http_transport, HttpTransport
+
 logger = logging.getLogger(__name__)
 
 
 class OpenAIService:
     """Service for OpenAI-powered natural language features"""
     
-    def __init__(self):
+    def __init__(self, http: Optional[HttpTransport] = None):
+        """
+        Initialize OpenAI service.
+        
+        Args:
+            http: Pooled HTTP transport whose sync client the SDK uses
+                (defaults to the shared one)
+        """
+        self.http = http or http_transport
         self.api_key = os.getenv('OPENAI_API_KEY')
         self.model = os.getenv('OPENAI_MODEL', 'gpt-4')
         self.enabled = bool(self.api_key)
         
         if self.enabled:
-            self.client = OpenAI(api_key=self.api_key)
+            self.client = OpenAI(api_key=self.api_key, http_client=self.http.sync_client())
             logger.info(f"OpenAI service initialized with model: {self.model}")
         else:
             logger.info("OpenAI service disabled (no API key)")
@@ -78,7 +89,9 @@ class OpenAIService:
             Keep it concise and actionable.
             """
             
-            response = self.client.chat.completions.create(
+            response = await blocking_adapter.run(
+                'openai',
+                self.client.chat.completions.create,
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are an expert options trader providing clear, actionable insights."},
@@ -135,7 +148,9 @@ class OpenAIService:
             Use a friendly but professional tone. Include relevant emojis.
             """
             
-            response = self.client.chat.completions.create(
+            response = await blocking_adapter.run(
+                'openai',
+                self.client.chat.completions.create,
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are a professional trading analyst providing daily market updates."},
@@ -200,7 +215,9 @@ class OpenAIService:
             Be concise and actionable.
             """
             
-            response = self.client.chat.completions.create(
+            response = await blocking_adapter.run(
+                'openai',
+                self.client.chat.completions.create,
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are an options trading advisor providing position updates."},
@@ -251,7 +268,9 @@ class OpenAIService:
             Format as JSON.
             """
             
-            response = self.client.chat.completions.create(
+            response = await blocking_adapter.run(
+                'openai',
+                self.client.chat.completions.create,
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are a financial news analyst providing sentiment analysis."},
@@ -319,7 +338,9 @@ class OpenAIService:
             Use a friendly, encouraging tone with emojis.
             """
             
-            response = self.client.chat.completions.create(
+            response = await blocking_adapter.run(
+                'openai',
+                self.client.chat.completions.create,
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are a supportive trading coach providing daily summaries."},
@@ -365,7 +386,9 @@ class OpenAIService:
             Provide a helpful, actionable answer in 2-3 sentences.
             """
             
-            response = self.client.chat.completions.create(
+            response = await blocking_adapter.run(
+                'openai',
+                self.client.chat.completions.create,
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are a knowledgeable options trading assistant."},
@@ -8,7 +8,7 @@ import uuid
 from loguru import logger
 
 from config import settings
-from core import get_db_context, redis_manager, get_trade_logger
+from core import get_db_context, redis_manager, CacheKeys, get_trade_logger, greeks_engine
 from core.models import Position, PositionHistory
 from services.execution_service import ExecutionService
 from services.market_data_service import MarketDataService
@@ -42,23 +42,153 @@ class PositionManager:
             
             logger.debug(f"Monitoring {len(positions)} open positions")
             
+            # One chain snapshot per underlying turns the quotes below into lookups
+            await self.market_data_service.get_options_snapshots(
+                list({p.symbol for p in positions})
+            )
+            
+            # Fetch option quotes and underlying prices for every position
+            semaphore = asyncio.Semaphore(max(1, settings.sdk_max_queue))
+            
+            async def fetch_quote(option_symbol: str):
+                async with semaphore:
+                    return await self.market_data_service.get_option_quote(option_symbol)
+            
+            quotes = await asyncio.gather(
+                *(fetch_quote(p.option_symbol) for p in positions),
+                return_exceptions=True
+            )
+            quotes = [q if isinstance(q, dict) else None for q in quotes]
+            
+            underlying_prices = await self.market_data_service.get_stock_prices(
+                list({p.symbol for p in positions})
+            )
+            
+            # IV and Greeks for all contracts in one pass
+            position_greeks = self._compute_greeks(positions, quotes, underlying_prices)
+            
             # Update each position
-            for position in positions:
+            for position, quote, greeks in zip(positions, quotes, position_greeks):
                 try:
-                    await self._update_position(position)
+                    await self._update_position(position, quote, greeks)
                     await self._check_exit_conditions(position)
                 except Exception as e:
                     logger.error(f"Error monitoring position {position.id}: {e}")
             
+            self._publish_portfolio_greeks(positions, position_greeks)
+            
         except Exception as e:
             logger.error(f"Error in position monitoring: {e}")
     
-    async def _update_position(self, position: Position):
-        """Update position with current market data."""
+    def _compute_greeks(
+        self,
+        positions: List[Position],
+        quotes: List[Optional[Dict[str, Any]]],
+        underlying_prices: Dict[str, float]
+    ) -> List[Optional[Dict[str, float]]]:
+        """
+        Compute position-level IV and Greeks for all positions at once.
+        
+        Greeks are scaled to the position (per-share Greeks x 100 x signed
+        quantity), so summing them gives the portfolio exposure.
+        
+        Args:
+            positions: Open positions
+            quotes: Option quote per position (None if unavailable)
+            underlying_prices: Underlying price by symbol
+            
+        Returns:
+            Greeks dict per position, or None where they couldn't be computed
+        """
+        try:
+            contracts = []
+            index = []
+            
+            for i, (position, quote) in enumerate(zip(positions, quotes)):
+                underlying_price = underlying_prices.get(position.symbol)
+                if not quote or not underlying_price or not position.strike_price:
+                    continue
+                
+                contracts.append({
+                    'symbol': position.option_symbol,
+                    'underlying_price': underlying_price,
+                    'strike': float(position.strike_price),
+                    'expiration': position.expiration_date,
+                    'option_type': position.option_type,
+                    'price': quote['mid'],
+                    'timestamp': quote.get('timestamp'),
+                })
+                index.append(i)
+            
+            results: List[Optional[Dict[str, float]]] = [None] * len(positions)
+            
+            for i, contract_greeks in zip(index, greeks_engine.evaluate(contracts)):
+                if contract_greeks is None:
+                    continue
+                
+                multiplier = positions[i].quantity * 100
+                results[i] = {
+                    'iv': contract_greeks['iv'],
+                    'delta': contract_greeks['delta'] * multiplier,
+                    'gamma': contract_greeks['gamma'] * multiplier,
+                    'theta': contract_greeks['theta'] * multiplier,
+                    'vega': contract_greeks['vega'] * multiplier,
+                }
+            
+            greeks_engine.prune([p.option_symbol for p in positions])
+            
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error computing position Greeks: {e}")
+            return [None] * len(positions)
+    
+    def _publish_portfolio_greeks(
+        self,
+        positions: List[Position],
+        position_greeks: List[Optional[Dict[str, float]]]
+    ):
+        """Cache each user's summed portfolio Greeks for the risk checks."""
         try:
-            # Get current option price
-            quote = await self.market_data_service.get_option_quote(position.option_symbol)
+            totals: Dict[str, Dict[str, float]] = {}
+            
+            for position, greeks in zip(positions, position_greeks):
+                user_totals = totals.setdefault(str(position.user_id), {
+                    'delta': 0.0, 'gamma': 0.0, 'theta': 0.0, 'vega': 0.0, 'positions': 0
+                })
+                user_totals['positions'] += 1
+                
+                # Fall back to the last stored Greeks when this tick had none
+                source = greeks or {
+                    'delta': position.delta, 'gamma': position.gamma,
+                    'theta': position.theta, 'vega': position.vega
+                }
+                for greek in ('delta', 'gamma', 'theta', 'vega'):
+                    user_totals[greek] += source.get(greek) or 0
             
+            updated_at = datetime.now().isoformat()
+            redis_manager.mset(
+                {
+                    CacheKeys.portfolio_greeks(user_id): dict(
+                        {k: round(v, 4) for k, v in user_totals.items()},
+                        updated_at=updated_at
+                    )
+                    for user_id, user_totals in totals.items()
+                },
+                expiration=60
+            )
+            
+        except Exception as e:
+            logger.error(f"Error publishing portfolio Greeks: {e}")
+    
+    async def _update_position(
+        self,
+        position: Position,
+        quote: Optional[Dict[str, Any]],
+        greeks: Optional[Dict[str, float]] = None
+    ):
+        """Update position with current market data."""
+        try:
             if not quote:
                 logger.warning(f"Could not get quote for {position.option_symbol}")
                 return
@@ -83,12 +213,13 @@ class PositionManager:
                     db_position.unrealized_pnl_pct = unrealized_pnl_pct
                     db_position.last_updated_at = datetime.now()
                     
-                    # Update Greeks if available (simplified - in production, calculate actual Greeks)
-                    db_position.delta = None  # Would calculate from option pricing model
-                    db_position.gamma = None
-                    db_position.theta = None
-                    db_position.vega = None
-                    db_position.iv = None
+                    # Position-level Greeks; keep the last values if IV didn't solve
+                    if greeks:
+                        db_position.delta = greeks['delta']
+                        db_position.gamma = greeks['gamma']
+                        db_position.theta = greeks['theta']
+                        db_position.vega = greeks['vega']
+                        db_position.iv = greeks['iv']
                     
                     db.commit()
             
@@ -96,11 +227,15 @@ class PositionManager:
             await self._record_position_history(position.id, current_price, unrealized_pnl, unrealized_pnl_pct)
             
             # Publish update to Redis for real-time UI
-            await self._publish_position_update(position.id, {
+            update = {
                 'current_price': current_price,
                 'unrealized_pnl': unrealized_pnl,
                 'unrealized_pnl_pct': unrealized_pnl_pct
-            })
+            }
+            if greeks:
+                update['greeks'] = greeks
+            
+            await self._publish_position_update(position.id, update)
             
         except Exception as e:
             logger.error(f"Error updating position {position.id}: {e}")
@@ -231,6 +366,7 @@ class PositionManager:
                         'current_price': update_data['current_price'],
                         'unrealized_pnl': update_data['unrealized_pnl'],
                         'unrealized_pnl_pct': update_data['unrealized_pnl_pct'],
+                        'greeks': update_data.get('greeks'),
                         'timestamp': datetime.now().isoformat()
                     }
                     
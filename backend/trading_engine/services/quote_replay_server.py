@@ -0,0 +1,226 @@
+"""
+Local stand-in for the broker quote websocket, for tests and offline runs.
+
+Speaks the same auth/subscribe/quote protocol as the Alpaca market data
+stream and replays quotes from a JSON-lines file (one "q" message per line,
+as received from the live feed). Without a file it streams a random walk
+for every subscribed symbol. Clients sending binary (msgpack) frames, like
+the options feed, get msgpack frames back; everyone else gets JSON.
+
+Usage:
+    python -m services.quote_replay_server --file quotes.jsonl --port 8765
+    STOCK_STREAM_URL=ws://localhost:8765 ENABLE_QUOTE_STREAMING=true python main.py
+"""
+import argparse
+import asyncio
+import json
+import random
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set
+import websockets
+from loguru import logger
+
+try:
+    import msgpack
+except ImportError:  # Only needed for msgpack clients (the options feed)
+    msgpack = None
+
+
+class QuoteReplayServer:
+    """Websocket server replaying recorded or synthetic quotes."""
+    
+    def __init__(
+        self,
+        quotes: Optional[List[Dict[str, Any]]] = None,
+        host: str = 'localhost',
+        port: int = 8765,
+        speed: float = 1.0,
+        loop_replay: bool = True,
+        synthetic_interval: float = 0.1
+    ):
+        """
+        Initialize replay server.
+        
+        Args:
+            quotes: Recorded quote messages; None streams synthetic quotes
+            host: Bind host
+            port: Bind port (0 picks a free port)
+            speed: Replay speed multiplier (2.0 replays twice as fast)
+            loop_replay: Restart from the beginning when the recording ends
+            synthetic_interval: Seconds between synthetic quote rounds
+        """
+        self.quotes = quotes
+        self.host = host
+        self.port = port
+        self.speed = speed
+        self.loop_replay = loop_replay
+        self.synthetic_interval = synthetic_interval
+        
+        self._server = None
+    
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> 'QuoteReplayServer':
+        """Create a server replaying a JSON-lines recording."""
+        with open(path) as f:
+            quotes = [json.loads(line) for line in f if line.strip()]
+        return cls(quotes=quotes, **kwargs)
+    
+    @property
+    def url(self) -> str:
+        """Websocket URL clients should connect to."""
+        return f"ws://{self.host}:{self.port}"
+    
+    async def start(self):
+        """Start listening."""
+        self._server = await websockets.serve(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Quote replay server listening on {self.url}")
+    
+    async def stop(self):
+        """Stop listening and close client connections."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+    
+    async def _handle_client(self, ws, path: str = None):
+        """Serve one client connection."""
+        subscribed: Set[str] = set()
+        authenticated = asyncio.Event()
+        # Replies follow the encoding of the client's frames (JSON until the
+        # first binary frame arrives)
+        state = {'msgpack': False}
+        
+        await self._send(ws, [{'T': 'success', 'msg': 'connected'}], state)
+        
+        sender = asyncio.create_task(self._send_quotes(ws, subscribed, authenticated, state))
+        
+        try:
+            async for frame in ws:
+                if isinstance(frame, bytes):
+                    if msgpack is None:
+                        logger.warning("Quote replay server: msgpack frame received but msgpack is not installed")
+                        continue
+                    state['msgpack'] = True
+                    message = msgpack.unpackb(frame, raw=False)
+                else:
+                    message = json.loads(frame)
+                action = message.get('action')
+                
+                if action == 'auth':
+                    authenticated.set()
+                    await self._send(ws, [{'T': 'success', 'msg': 'authenticated'}], state)
+                elif action == 'subscribe':
+                    subscribed.update(message.get('quotes', []))
+                    await self._send(ws, [{'T': 'subscription', 'quotes': sorted(subscribed)}], state)
+                elif action == 'unsubscribe':
+                    subscribed.difference_update(message.get('quotes', []))
+                    await self._send(ws, [{'T': 'subscription', 'quotes': sorted(subscribed)}], state)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            sender.cancel()
+    
+    @staticmethod
+    async def _send(ws, messages: List[Dict[str, Any]], state: Dict[str, bool]):
+        """Send messages in the encoding the client speaks."""
+        if state['msgpack']:
+            await ws.send(msgpack.packb(messages))
+        else:
+            await ws.send(json.dumps(messages))
+    
+    async def _send_quotes(
+        self,
+        ws,
+        subscribed: Set[str],
+        authenticated: asyncio.Event,
+        state: Dict[str, bool]
+    ):
+        """Push quotes for the client's subscribed symbols."""
+        await authenticated.wait()
+        
+        if self.quotes is None:
+            await self._send_synthetic(ws, subscribed, state)
+            return
+        
+        while True:
+            previous = None
+            
+            for quote in self.quotes:
+                timestamp = _parse_timestamp(quote.get('t'))
+                if previous is not None and timestamp is not None:
+                    delay = (timestamp - previous).total_seconds() / self.speed
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                previous = timestamp or previous
+                
+                if quote.get('S') in subscribed:
+                    await self._send(ws, [quote], state)
+            
+            if not self.loop_replay:
+                return
+    
+    async def _send_synthetic(self, ws, subscribed: Set[str], state: Dict[str, bool]):
+        """Stream a random walk around 100 for every subscribed symbol."""
+        mids: Dict[str, float] = {}
+        
+        while True:
+            batch = []
+            now = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+            
+            for symbol in list(subscribed):
+                mid = mids.get(symbol, 100.0) * (1 + random.gauss(0, 0.0005))
+                mids[symbol] = mid
+                half_spread = max(0.01, mid * 0.0002)
+                batch.append({
+                    'T': 'q',
+                    'S': symbol,
+                    'bp': round(mid - half_spread, 2),
+                    'ap': round(mid + half_spread, 2),
+                    'bs': random.randint(1, 20),
+                    'as': random.randint(1, 20),
+                    't': now,
+                })
+            
+            if batch:
+                await self._send(ws, batch, state)
+            
+            await asyncio.sleep(self.synthetic_interval / self.speed)
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse an RFC 3339 feed timestamp (nanosecond precision is truncated)."""
+    if not value:
+        return None
+    try:
+        value = value.replace('Z', '+00:00')
+        if '.' in value:
+            head, rest = value.split('.', 1)
+            fraction = ''.join(c for c in rest if c.isdigit())
+            offset = rest[len(fraction):]
+            value = f"{head}.{fraction[:6]}{offset}"
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+async def _serve(args):
+    """Run the server until interrupted."""
+    options = {'host': args.host, 'port': args.port, 'speed': args.speed}
+    server = QuoteReplayServer.from_file(args.file, **options) if args.file else QuoteReplayServer(**options)
+    
+    await server.start()
+    await asyncio.Future()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay quotes over a local websocket")
+    parser.add_argument('--file', help="JSON-lines recording of quote messages")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--speed', type=float, default=1.0)
+    
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
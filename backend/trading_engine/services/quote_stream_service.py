@@ -0,0 +1,284 @@
+"""
+Streaming quote ingestion from the broker's websocket feeds.
+"""
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Set
+import websockets
+from loguru import logger
+
+try:
+    import msgpack
+except ImportError:  # Only needed for the options feed
+    msgpack = None
+
+from config import settings
+from core import get_db_context, quote_book, bar_aggregator
+from core.bar_aggregator import BarAggregator
+from core.models import Position, Watchlist
+from core.quote_book import QuoteBook
+
+
+class QuoteFeed:
+    """One websocket connection speaking the Alpaca market data protocol."""
+    
+    def __init__(
+        self,
+        name: str,
+        url: str,
+        book: QuoteBook,
+        encoding: str = 'json',
+        bars: Optional[BarAggregator] = None
+    ):
+        """
+        Initialize quote feed.
+        
+        Args:
+            name: Feed name used in logs ("stocks" or "options")
+            url: Websocket URL
+            book: Quote book to write into
+            encoding: Frame encoding, "json" or "msgpack"
+            bars: Bar aggregator fed with quote midpoints and trades (the
+                trades channel is subscribed only when set)
+        """
+        self.name = name
+        self.url = url
+        self.book = book
+        self.encoding = encoding
+        self.bars = bars
+        self.channels = ('quotes', 'trades') if bars is not None else ('quotes',)
+        
+        self.symbols: Set[str] = set()
+        self._subscribed: Set[str] = set()
+        self._ws = None
+        self._running = False
+        
+        self.stats = {'messages': 0, 'quotes': 0, 'trades': 0, 'reconnects': 0, 'errors': 0}
+    
+    def _encode(self, message: Dict[str, Any]):
+        """Encode an outgoing control message."""
+        if self.encoding == 'msgpack':
+            return msgpack.packb(message)
+        return json.dumps(message)
+    
+    def _decode(self, frame) -> List[Dict[str, Any]]:
+        """Decode an incoming frame into a list of messages."""
+        if isinstance(frame, bytes) and msgpack is not None and self.encoding == 'msgpack':
+            data = msgpack.unpackb(frame, raw=False, timestamp=3)
+        else:
+            data = json.loads(frame)
+        return data if isinstance(data, list) else [data]
+    
+    async def set_symbols(self, symbols: Set[str]):
+        """
+        Change the subscribed symbol set.
+        
+        Args:
+            symbols: Symbols that should be streamed
+        """
+        self.symbols = {QuoteBook.normalize(s) for s in symbols}
+        
+        if self._ws is not None:
+            await self._sync_subscriptions()
+    
+    async def _sync_subscriptions(self):
+        """Send subscribe/unsubscribe for the difference with the live set."""
+        added = sorted(self.symbols - self._subscribed)
+        removed = sorted(self._subscribed - self.symbols)
+        
+        try:
+            if added:
+                await self._ws.send(self._encode({'action': 'subscribe', **{channel: added for channel in self.channels}}))
+            if removed:
+                await self._ws.send(self._encode({'action': 'unsubscribe', **{channel: removed for channel in self.channels}}))
+                self.book.remove(removed)
+                if self.bars is not None:
+                    self.bars.remove(removed)
+        except Exception as e:
+            logger.warning(f"Quote feed {self.name} subscription update failed: {e}")
+            return
+        
+        self._subscribed = set(self.symbols)
+        
+        if added or removed:
+            logger.info(
+                f"Quote feed {self.name}: +{len(added)} -{len(removed)} "
+                f"({len(self._subscribed)} symbols)"
+            )
+    
+    async def _authenticate(self, ws) -> bool:
+        """Authenticate the connection."""
+        await ws.send(self._encode({
+            'action': 'auth',
+            'key': settings.alpaca_api_key,
+            'secret': settings.alpaca_secret_key
+        }))
+        
+        # Server sends "connected" then "authenticated"
+        for _ in range(2):
+            for message in self._decode(await asyncio.wait_for(ws.recv(), timeout=10)):
+                if message.get('T') == 'error':
+                    logger.error(f"Quote feed {self.name} auth error: {message.get('msg')}")
+                    return False
+                if message.get('T') == 'success' and message.get('msg') == 'authenticated':
+                    return True
+        
+        return False
+    
+    def _handle(self, message: Dict[str, Any]):
+        """Apply one feed message to the book."""
+        message_type = message.get('T')
+        
+        if message_type == 'q':
+            timestamp = message.get('t')
+            bid, ask = message.get('bp'), message.get('ap')
+            self.book.update(
+                symbol=message['S'],
+                bid=bid,
+                ask=ask,
+                bid_size=message.get('bs', 0),
+                ask_size=message.get('as', 0),
+                timestamp=timestamp if isinstance(timestamp, str) else str(timestamp)
+            )
+            if self.bars is not None and bid and ask:
+                self.bars.on_tick(message['S'], (bid + ask) / 2)
+            self.stats['quotes'] += 1
+        elif message_type == 't':
+            # Bars are bucketed by receive time; parsing feed timestamps per tick isn't worth it
+            if self.bars is not None:
+                self.bars.on_tick(message['S'], message.get('p'), message.get('s', 0))
+            self.stats['trades'] += 1
+        elif message_type == 'error':
+            self.stats['errors'] += 1
+            logger.warning(f"Quote feed {self.name} error: {message.get('msg')}")
+    
+    async def run(self):
+        """Connect, subscribe and ingest quotes until stopped."""
+        if self.encoding == 'msgpack' and msgpack is None:
+            logger.warning(f"Quote feed {self.name} disabled: msgpack is not installed")
+            return
+        
+        self._running = True
+        backoff = 1
+        
+        while self._running:
+            try:
+                async with websockets.connect(self.url, max_queue=None) as ws:
+                    if not await self._authenticate(ws):
+                        raise ConnectionError("authentication failed")
+                    
+                    self._ws = ws
+                    self._subscribed = set()
+                    await self._sync_subscriptions()
+                    
+                    logger.info(f"Quote feed {self.name} connected to {self.url}")
+                    backoff = 1
+                    
+                    async for frame in ws:
+                        self.stats['messages'] += 1
+                        for message in self._decode(frame):
+                            self._handle(message)
+                            
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not self._running:
+                    break
+                self.stats['reconnects'] += 1
+                logger.warning(f"Quote feed {self.name} disconnected: {e}, reconnecting in {backoff}s")
+            finally:
+                self._ws = None
+            
+            if self._running:
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+    
+    async def stop(self):
+        """Close the connection and stop reconnecting."""
+        self._running = False
+        if self._ws is not None:
+            await self._ws.close()
+
+
+class QuoteStreamService:
+    """Keeps the quote book fed for watchlist symbols and open-position contracts."""
+    
+    def __init__(self, book: Optional[QuoteBook] = None):
+        """Initialize quote stream service."""
+        self.book = book or quote_book
+        
+        self.stock_feed = QuoteFeed(
+            'stocks',
+            settings.stock_stream_url,
+            self.book,
+            bars=bar_aggregator if settings.bar_aggregation_enabled else None
+        )
+        self.option_feed = QuoteFeed(
+            'options',
+            settings.option_stream_url,
+            self.book,
+            encoding=settings.option_stream_encoding
+        )
+        
+        self._running = False
+        
+        logger.info("Quote stream service initialized")
+    
+    def _load_symbols(self) -> Dict[str, Set[str]]:
+        """Get watchlist symbols and open-position option contracts."""
+        with get_db_context() as db:
+            stocks = {
+                w.symbol for w in
+                db.query(Watchlist.symbol).filter(Watchlist.is_active == True).all()
+            }
+            positions = db.query(Position.symbol, Position.option_symbol).filter(
+                Position.status == 'open'
+            ).all()
+        
+        options = {p.option_symbol for p in positions if p.option_symbol}
+        stocks.update(p.symbol for p in positions if p.symbol)
+        
+        return {'stocks': stocks, 'options': options}
+    
+    async def refresh_subscriptions(self):
+        """Resubscribe both feeds to the current symbol sets."""
+        try:
+            symbols = self._load_symbols()
+            await self.stock_feed.set_symbols(symbols['stocks'])
+            await self.option_feed.set_symbols(symbols['options'])
+        except Exception as e:
+            logger.error(f"Error refreshing quote subscriptions: {e}")
+    
+    async def run(self):
+        """Run both feeds and keep their subscriptions current."""
+        self._running = True
+        
+        await self.refresh_subscriptions()
+        
+        feeds = [
+            asyncio.create_task(self.stock_feed.run()),
+            asyncio.create_task(self.option_feed.run()),
+        ]
+        
+        try:
+            while self._running:
+                await asyncio.sleep(settings.quote_stream_refresh_interval)
+                await self.refresh_subscriptions()
+        finally:
+            for task in feeds:
+                task.cancel()
+            await asyncio.gather(*feeds, return_exceptions=True)
+    
+    async def stop(self):
+        """Stop streaming."""
+        self._running = False
+        await self.stock_feed.stop()
+        await self.option_feed.stop()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get feed and book counters."""
+        return {
+            'stocks': dict(self.stock_feed.stats, symbols=len(self.stock_feed.symbols)),
+            'options': dict(self.option_feed.stats, symbols=len(self.option_feed.symbols)),
+            'book': self.book.get_stats(),
+        }
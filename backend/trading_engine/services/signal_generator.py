@@ -9,8 +9,8 @@ import uuid
 from loguru import logger
 
 from config import settings, StrategyConfig
-from core import get_db_context, redis_manager, CacheKeys
-from core.models import TradeSignal, User, UserConfig, Watchlist
+from core import get_db_context, redis_manager, CacheKeys, greeks_engine, bar_aggregator
+from core.models import TradeSignal, User, UserConfig, Watchlist, Position
 from services.market_data_service import MarketDataService
 from services.news_sentiment_service import NewsSentimentService
 from strategies.strategy_selector import StrategySelector
@@ -22,7 +22,7 @@ class SignalGenerator:
     def __init__(self, market_data_service: MarketDataService):
         """Initialize signal generator."""
         self.market_data_service = market_data_service
-        self.news_sentiment_service = NewsSentimentService()
+        self.news_sentiment_service = NewsSentimentService(http=market_data_service.http)
         self.strategy_selector = StrategySelector()
         
         logger.info("Signal generator initialized")
@@ -149,8 +149,21 @@ class SignalGenerator:
                     logger.info(f"Trade vetoed for {symbol}: {veto_check['veto_reason']}")
                     return None
             
-            # Get historical volatility
-            hv = await self.market_data_service.get_historical_volatility(symbol)
+            # Get realized volatilities (20/60/252 day)
+            volatility_profiles = await self.market_data_service.get_volatility_profiles([symbol])
+            volatility_profile = volatility_profiles.get(symbol, {})
+            hv = volatility_profile.get('hv_252')
+            
+            # Get IV percentile from the daily ATM IV history
+            iv_stats = self.market_data_service.get_iv_ranks([symbol]).get(symbol, {})
+            iv_percentile = iv_stats.get('iv_percentile')
+            
+            # Chain snapshot quotes keep the volatility surface used for
+            # delta-targeted strikes current (and are reused for the quote below)
+            await self.market_data_service.get_options_snapshot(symbol)
+            
+            # Intraday indicators, kept current by the bar aggregator
+            technicals = bar_aggregator.technicals(symbol)
             
             # Select best strategy
             strategy_result = await self.strategy_selector.select_strategy(
@@ -159,7 +172,10 @@ class SignalGenerator:
                 options_chain=options_chain,
                 historical_volatility=hv,
                 news_sentiment=news_sentiment,
-                user_config=config
+                user_config=config,
+                volatility_profile=volatility_profile,
+                iv_percentile=iv_percentile,
+                technicals=technicals
             )
             
             if not strategy_result:
@@ -167,15 +183,23 @@ class SignalGenerator:
                 return None
             
             # Validate liquidity
+            option_quote = await self.market_data_service.get_option_quote(
+                strategy_result['option_symbol']
+            )
             liquidity_valid = await self._validate_liquidity(
                 strategy_result['option_symbol'],
-                config
+                config,
+                quote=option_quote
             )
             
             if not liquidity_valid:
                 logger.debug(f"Liquidity check failed for {symbol}")
                 return None
             
+            # Enforce portfolio Greek limits
+            if not self._within_greek_limits(user_id, stock_price, strategy_result, option_quote, config):
+                return None
+            
             # Build signal
             signal = {
                 'user_id': user_id,
@@ -195,6 +219,9 @@ class SignalGenerator:
                 'market_conditions': {
                     'stock_price': stock_price,
                     'historical_volatility': hv,
+                    'volatility_profile': volatility_profile,
+                    'iv_percentile': iv_percentile,
+                    'technicals': technicals,
                     'news_sentiment': news_sentiment['avg_sentiment'] if news_sentiment else None,
                     'timestamp': datetime.now().isoformat()
                 },
@@ -212,11 +239,13 @@ class SignalGenerator:
     async def _validate_liquidity(
         self,
         option_symbol: str,
-        config: UserConfig
+        config: UserConfig,
+        quote: Optional[Dict[str, Any]] = None
     ) -> bool:
         """Validate option liquidity meets requirements."""
         try:
-            quote = await self.market_data_service.get_option_quote(option_symbol)
+            if quote is None:
+                quote = await self.market_data_service.get_option_quote(option_symbol)
             
             if not quote:
                 return False
@@ -226,8 +255,26 @@ class SignalGenerator:
                 logger.debug(f"Spread too wide: {quote['spread_pct']}%")
                 return False
             
-            # In production, also check volume and open interest
-            # For now, we'll assume if we got a quote, it's liquid enough
+            # Volume and open interest come with chain snapshot quotes
+            volume = quote.get('volume')
+            open_interest = quote.get('open_interest')
+            if volume is None or open_interest is None:
+                return True
+            
+            if volume < config.min_option_volume:
+                logger.debug(f"Volume too low: {volume}")
+                return False
+            
+            if open_interest < config.min_open_interest:
+                logger.debug(f"Open interest too low: {open_interest}")
+                return False
+            
+            score = await self.market_data_service.calculate_liquidity_score(
+                volume, open_interest, quote['spread_pct']
+            )
+            if score < config.min_liquidity_score:
+                logger.debug(f"Liquidity score too low: {score}")
+                return False
             
             return True
             
@@ -235,6 +282,90 @@ class SignalGenerator:
             logger.error(f"Error validating liquidity for {option_symbol}: {e}")
             return False
     
+    def _get_portfolio_greeks(self, user_id: uuid.UUID) -> Dict[str, float]:
+        """Get a user's portfolio Greeks, from the position monitor's cache or the database."""
+        cached = redis_manager.get(CacheKeys.portfolio_greeks(str(user_id)))
+        if cached:
+            return cached
+        
+        with get_db_context() as db:
+            positions = db.query(Position).filter(
+                Position.user_id == user_id,
+                Position.status == 'open'
+            ).all()
+            
+            return {
+                greek: sum(getattr(p, greek) or 0 for p in positions)
+                for greek in ('delta', 'gamma', 'theta', 'vega')
+            }
+    
+    def _within_greek_limits(
+        self,
+        user_id: uuid.UUID,
+        stock_price: float,
+        strategy_result: Dict[str, Any],
+        quote: Optional[Dict[str, Any]],
+        config: UserConfig
+    ) -> bool:
+        """
+        Check that a trade keeps portfolio delta, gamma and vega within the user's limits.
+        
+        Args:
+            user_id: User ID
+            stock_price: Underlying price
+            strategy_result: Selected trade
+            quote: Option quote for the selected contract
+            config: User configuration
+            
+        Returns:
+            True if the trade may be signalled
+        """
+        try:
+            if not quote:
+                return True
+            
+            trade_greeks = greeks_engine.evaluate([{
+                'symbol': strategy_result['option_symbol'],
+                'underlying_price': stock_price,
+                'strike': strategy_result['strike_price'],
+                'expiration': strategy_result['expiration_date'],
+                'option_type': strategy_result['option_type'],
+                'price': quote['mid'],
+                'timestamp': quote.get('timestamp'),
+            }])[0]
+            
+            if trade_greeks is None:
+                logger.debug(f"Could not price {strategy_result['option_symbol']}, skipping Greek limits")
+                return True
+            
+            direction = -1 if strategy_result['signal_type'] == 'sell' else 1
+            multiplier = direction * strategy_result['quantity'] * 100
+            portfolio = self._get_portfolio_greeks(user_id)
+            
+            limits = {
+                'delta': config.max_portfolio_delta,
+                'gamma': config.max_portfolio_gamma,
+                'vega': config.max_portfolio_vega,
+            }
+            
+            for greek, limit in limits.items():
+                if limit is None:
+                    continue
+                
+                projected = (portfolio.get(greek) or 0) + trade_greeks[greek] * multiplier
+                if abs(projected) > limit:
+                    logger.info(
+                        f"Signal for {strategy_result['option_symbol']} blocked: portfolio "
+                        f"{greek} would be {projected:.2f} (limit {limit})"
+                    )
+                    return False
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error checking Greek limits: {e}")
+            return False
+    
     async def _create_signal(self, signal_data: Dict[str, Any]):
         """Create and store a trade signal."""
         try:
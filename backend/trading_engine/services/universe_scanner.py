@@ -0,0 +1,368 @@
+"""
+Optionable-universe scanner that ranks watchlist candidates from bulk snapshots.
+"""
+import asyncio
+import math
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+import aiohttp
+import numpy as np
+from loguru import logger
+from alpaca.trading.client import TradingClient
+from alpaca.trading.requests import GetAssetsRequest
+from alpaca.trading.enums import AssetClass, AssetStatus
+
+from config import settings
+from core import (
+    redis_manager, CacheKeys, get_db_context, rate_limiter, blocking_adapter, provider_recorder,
+    iv_history, http_transport
+)
+from core.models import Watchlist
+
+
+# Optionable asset list is re-read once a day
+ASSET_INDEX_TTL = 86400
+
+# Parkinson estimator scale: variance = mean(ln(H/L)^2) / (4 ln 2)
+PARKINSON_FACTOR = 1.0 / (4.0 * math.log(2.0))
+
+# Score weights: liquidity, spread tightness, volatility
+SCORE_WEIGHTS = (0.4, 0.3, 0.3)
+
+# Snapshot columns parsed into the screening matrix
+COLUMNS = ('price', 'bid', 'ask', 'volume', 'high', 'low', 'prev_high', 'prev_low')
+
+
+class UniverseScanner:
+    """
+    Screen every tradable, optionable US equity and rank candidates.
+    
+    The asset list is loaded once into a sorted symbol index (cached in
+    Redis for a day). Each scan pulls Alpaca snapshots for the whole index
+    in concurrent pages, parses them into one float matrix and applies the
+    price, volume, spread and historical volatility screens as array masks
+    in a single pass. IV rank is only looked up for the survivors, which
+    are then scored and stored for the API.
+    
+    A scan is bounded by ``universe_scan_timeout`` (never longer than one
+    signal interval): pages still in flight at the deadline are cancelled
+    and the scan ranks what arrived.
+    """
+    
+    def __init__(self):
+        """Initialize universe scanner."""
+        self.trading_client = TradingClient(
+            api_key=settings.alpaca_api_key,
+            secret_key=settings.alpaca_secret_key,
+            paper=settings.trading_mode == 'paper'
+        )
+        
+        self._symbols: np.ndarray = np.array([], dtype='U16')
+        self._loaded_at = 0.0
+        self._stats = {'scans': 0, 'pages': 0, 'page_errors': 0, 'timeouts': 0}
+        self._last_scan: Dict[str, Any] = {}
+        
+        logger.info("Universe scanner initialized")
+    
+    async def _fetch_assets(self) -> List[str]:
+        """Symbols of active, tradable US equities with options enabled."""
+        params = GetAssetsRequest(
+            status=AssetStatus.ACTIVE,
+            asset_class=AssetClass.US_EQUITY
+        ).to_request_fields()
+        # The SDK request model has no attributes filter, so the raw endpoint is used
+        params['attributes'] = 'options_enabled'
+        
+        assets = await blocking_adapter.run('alpaca', self.trading_client.get, '/assets', params)
+        
+        return sorted({
+            asset['symbol']
+            for asset in assets or []
+            if asset.get('tradable') and 'options_enabled' in (asset.get('attributes') or [])
+        })
+    
+    async def load_assets(self, force: bool = False) -> int:
+        """
+        Load the optionable symbol index (Redis first, then Alpaca).
+        
+        Args:
+            force: Re-read the asset list even if the index is current
+            
+        Returns:
+            Number of symbols in the index
+        """
+        if not force and len(self._symbols) and time.monotonic() - self._loaded_at < ASSET_INDEX_TTL:
+            return len(self._symbols)
+        
+        cache_key = CacheKeys.universe_assets()
+        symbols = None if force else redis_manager.get(cache_key)
+        
+        if not symbols:
+            try:
+                symbols = await self._fetch_assets()
+            except Exception as e:
+                logger.error(f"Error loading optionable assets: {e}")
+                return len(self._symbols)
+            
+            if symbols:
+                redis_manager.set(cache_key, symbols, expiration=ASSET_INDEX_TTL)
+                logger.info(f"Loaded {len(symbols)} optionable symbols from Alpaca")
+        
+        if symbols:
+            self._symbols = np.array(symbols, dtype='U16')
+            self._loaded_at = time.monotonic()
+        
+        return len(self._symbols)
+    
+    async def _fetch_page(self, session: aiohttp.ClientSession, symbols: List[str], deadline: float) -> Dict[str, Any]:
+        """Snapshots for one page of symbols ({} if rate limited past the deadline)."""
+        if not await rate_limiter.acquire('alpaca', max_wait=max(deadline - time.monotonic(), 0)):
+            return {}
+        
+        url = f"{settings.alpaca_data_url}/v2/stocks/snapshots"
+        headers = {
+            'APCA-API-KEY-ID': settings.alpaca_api_key,
+            'APCA-API-SECRET-KEY': settings.alpaca_secret_key,
+        }
+        
+        status, data = await provider_recorder.get_json(
+            'alpaca', session, url, params={'symbols': ','.join(symbols)}, headers=headers
+        )
+        if status != 200:
+            raise RuntimeError(f"Alpaca snapshot error: {status}")
+        
+        return data or {}
+    
+    async def _fetch_snapshots(self, deadline: float) -> Dict[str, Any]:
+        """
+        Snapshots for the whole index, fetched in concurrent pages.
+        
+        Args:
+            deadline: Monotonic time by which pages must have arrived
+            
+        Returns:
+            Mapping of symbol to raw snapshot for the pages that completed
+        """
+        page_size = settings.universe_scan_page_size
+        pages = [
+            self._symbols[i:i + page_size].tolist()
+            for i in range(0, len(self._symbols), page_size)
+        ]
+        semaphore = asyncio.Semaphore(settings.universe_scan_concurrency)
+        snapshots: Dict[str, Any] = {}
+        
+        session = http_transport.session()
+        
+        async def fetch(page: List[str]):
+            async with semaphore:
+                try:
+                    snapshots.update(await self._fetch_page(session, page, deadline))
+                    self._stats['pages'] += 1
+                except Exception as e:
+                    logger.debug(f"Snapshot page starting {page[0]} failed: {e}")
+                    self._stats['page_errors'] += 1
+        
+        tasks = [asyncio.ensure_future(fetch(page)) for page in pages]
+        _, pending = await asyncio.wait(tasks, timeout=max(deadline - time.monotonic(), 0))
+        
+        if pending:
+            self._stats['timeouts'] += 1
+            logger.warning(f"Universe scan deadline reached with {len(pending)}/{len(pages)} snapshot pages pending")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        
+        return snapshots
+    
+    @staticmethod
+    def _matrix(symbols: np.ndarray, snapshots: Dict[str, Any]) -> np.ndarray:
+        """Parse snapshots into a (symbols x COLUMNS) float matrix (NaN where missing)."""
+        matrix = np.full((len(symbols), len(COLUMNS)), np.nan)
+        
+        for i, symbol in enumerate(symbols.tolist()):
+            snapshot = snapshots.get(symbol)
+            if not snapshot:
+                continue
+            
+            trade = snapshot.get('latestTrade') or {}
+            quote = snapshot.get('latestQuote') or {}
+            daily = snapshot.get('dailyBar') or {}
+            prev = snapshot.get('prevDailyBar') or {}
+            
+            matrix[i] = (
+                trade.get('p') or daily.get('c') or np.nan,
+                quote.get('bp', np.nan),
+                quote.get('ap', np.nan),
+                # The previous session is the last complete day of volume
+                prev.get('v', np.nan),
+                daily.get('h', np.nan),
+                daily.get('l', np.nan),
+                prev.get('h', np.nan),
+                prev.get('l', np.nan),
+            )
+        
+        return matrix
+    
+    @staticmethod
+    def _percentile_rank(values: np.ndarray) -> np.ndarray:
+        """Rank of each value among the others, scaled to [0, 1]."""
+        if len(values) < 2:
+            return np.ones(len(values))
+        return np.argsort(np.argsort(values, kind='stable'), kind='stable') / (len(values) - 1)
+    
+    def screen(self, symbols: np.ndarray, matrix: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Apply the price, volume, spread and volatility screens.
+        
+        Args:
+            symbols: Symbols, one per matrix row
+            matrix: Snapshot matrix from ``_matrix``
+            
+        Returns:
+            Column arrays (symbol, price, spread_pct, volume, dollar_volume,
+            hv) of the rows passing every screen
+        """
+        price, bid, ask, volume, high, low, prev_high, prev_low = matrix.T
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mid = (bid + ask) / 2
+            spread_pct = np.where((bid > 0) & (ask >= bid), (ask - bid) / mid * 100, np.inf)
+            
+            # Two-day Parkinson range estimator as an annualized HV proxy, in percent
+            squared = np.stack([np.log(high / low), np.log(prev_high / prev_low)]) ** 2
+            days = np.sum(~np.isnan(squared), axis=0)
+            hv = np.sqrt(np.nansum(squared, axis=0) / days * PARKINSON_FACTOR * 252) * 100
+        
+        dollar_volume = price * volume
+        
+        # NaN compares False, so rows with missing fields drop out here
+        mask = (
+            (price >= settings.universe_min_price) & (price <= settings.universe_max_price)
+            & (volume >= settings.universe_min_volume)
+            & (spread_pct <= settings.universe_max_spread_pct)
+            & (hv >= settings.universe_min_hv) & (hv <= settings.universe_max_hv)
+        )
+        
+        return {
+            'symbol': symbols[mask],
+            'price': price[mask],
+            'spread_pct': spread_pct[mask],
+            'volume': volume[mask],
+            'dollar_volume': dollar_volume[mask],
+            'hv': hv[mask],
+        }
+    
+    def rank(self, passed: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+        """
+        Apply the IV rank screen to the survivors and score them.
+        
+        Symbols without enough IV history keep their HV percentile as the
+        volatility component and are not screened on IV rank.
+        
+        Args:
+            passed: Output of ``screen``
+            
+        Returns:
+            Candidates, best first, at most ``universe_max_candidates``
+        """
+        symbols = passed['symbol'].tolist()
+        iv_rank = np.array([
+            np.nan if (value := iv_history.rank(symbol)) is None else value
+            for symbol in symbols
+        ], dtype=float)
+        
+        with np.errstate(invalid='ignore'):
+            keep = ~(iv_rank < settings.universe_min_iv_rank)
+        
+        columns = {name: values[keep] for name, values in passed.items()}
+        iv_rank = iv_rank[keep]
+        if not len(iv_rank):
+            return []
+        
+        liquidity = self._percentile_rank(columns['dollar_volume'])
+        tightness = self._percentile_rank(-columns['spread_pct'])
+        volatility = np.where(np.isnan(iv_rank), self._percentile_rank(columns['hv']), iv_rank / 100)
+        
+        w_liquidity, w_tightness, w_volatility = SCORE_WEIGHTS
+        score = w_liquidity * liquidity + w_tightness * tightness + w_volatility * volatility
+        
+        order = np.argsort(-score, kind='stable')[:settings.universe_max_candidates]
+        
+        return [
+            {
+                'symbol': str(columns['symbol'][i]),
+                'price': round(float(columns['price'][i]), 2),
+                'spread_pct': round(float(columns['spread_pct'][i]), 3),
+                'volume': int(columns['volume'][i]),
+                'dollar_volume': round(float(columns['dollar_volume'][i]), 0),
+                'hv': round(float(columns['hv'][i]), 2),
+                'iv_rank': None if np.isnan(iv_rank[i]) else float(iv_rank[i]),
+                'score': round(float(score[i]), 4),
+            }
+            for i in order
+        ]
+    
+    @staticmethod
+    def _watchlist_symbols() -> set:
+        """Symbols on any active watchlist."""
+        with get_db_context() as db:
+            rows = db.query(Watchlist.symbol).filter(Watchlist.is_active == True).distinct().all()
+            return {row.symbol for row in rows}
+    
+    async def scan(self) -> List[Dict[str, Any]]:
+        """
+        Run one scan of the optionable universe.
+        
+        Returns:
+            Ranked candidates (also stored in Redis for the API)
+        """
+        started = time.monotonic()
+        deadline = started + min(settings.universe_scan_timeout, settings.signal_generation_interval)
+        
+        try:
+            if not await self.load_assets():
+                logger.warning("Universe scan skipped: no optionable assets loaded")
+                return []
+            
+            symbols = self._symbols
+            snapshots = await self._fetch_snapshots(deadline)
+            
+            matrix = self._matrix(symbols, snapshots)
+            passed = self.screen(symbols, matrix)
+            candidates = await asyncio.to_thread(self.rank, passed)
+            
+            watchlist = await asyncio.to_thread(self._watchlist_symbols)
+            for candidate in candidates:
+                candidate['in_watchlist'] = candidate['symbol'] in watchlist
+            
+            elapsed = time.monotonic() - started
+            self._stats['scans'] += 1
+            self._last_scan = {
+                'timestamp': datetime.utcnow().isoformat(),
+                'universe': len(symbols),
+                'snapshots': len(snapshots),
+                'passed_screens': len(passed['symbol']),
+                'candidates': len(candidates),
+                'elapsed_seconds': round(elapsed, 2),
+            }
+            
+            redis_manager.set(
+                CacheKeys.universe_candidates(),
+                dict(self._last_scan, results=candidates),
+                expiration=settings.universe_scan_interval * 2
+            )
+            
+            logger.info(
+                f"Universe scan: {len(snapshots)}/{len(symbols)} snapshots, "
+                f"{len(passed['symbol'])} passed screens, {len(candidates)} candidates in {elapsed:.1f}s"
+            )
+            return candidates
+            
+        except Exception as e:
+            logger.error(f"Error scanning optionable universe: {e}")
+            return []
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get scan counters and the summary of the last scan."""
+        return dict(self._stats, universe=len(self._symbols), last_scan=self._last_scan)
@@ -7,6 +7,8 @@ from loguru import logger
 
 from config import StrategyConfig
 from core.models import UserConfig
+from core.options_chain import OptionsChain
+from core.vol_surface import vol_surfaces
 
 
 class StrategySelector:
@@ -20,10 +22,13 @@ class StrategySelector:
         self,
         symbol: str,
         stock_price: float,
-        options_chain: Dict[str, Any],
+        options_chain: OptionsChain,
         historical_volatility: Optional[float],
         news_sentiment: Optional[Dict[str, Any]],
-        user_config: UserConfig
+        user_config: UserConfig,
+        volatility_profile: Optional[Dict[str, float]] = None,
+        iv_percentile: Optional[float] = None,
+        technicals: Optional[Dict[str, Any]] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Select best strategy for current market conditions.
@@ -35,6 +40,9 @@ class StrategySelector:
             historical_volatility: Historical volatility
             news_sentiment: News sentiment summary
             user_config: User configuration
+            volatility_profile: Realized volatilities by window (hv_20, hv_60, ...)
+            iv_percentile: Percentile of current ATM IV in its history
+            technicals: Intraday indicators (RSI, MACD, EMAs, trend)
             
         Returns:
             Strategy recommendation or None
@@ -51,7 +59,10 @@ class StrategySelector:
             market_analysis = self._analyze_market_conditions(
                 stock_price=stock_price,
                 historical_volatility=historical_volatility,
-                news_sentiment=news_sentiment
+                news_sentiment=news_sentiment,
+                volatility_profile=volatility_profile,
+                iv_percentile=iv_percentile,
+                technicals=technicals
             )
             
             # Score each strategy
@@ -97,23 +108,54 @@ class StrategySelector:
         self,
         stock_price: float,
         historical_volatility: Optional[float],
-        news_sentiment: Optional[Dict[str, Any]]
+        news_sentiment: Optional[Dict[str, Any]],
+        volatility_profile: Optional[Dict[str, float]] = None,
+        iv_percentile: Optional[float] = None,
+        technicals: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """Analyze current market conditions."""
+        volatility_profile = volatility_profile or {}
+        technicals = technicals or {}
+        
         analysis = {
             'volatility_regime': 'normal',
+            'volatility_trend': 'stable',
             'sentiment': 'neutral',
             'trend': 'neutral',
             'volatility_level': historical_volatility or 30.0
         }
         
-        # Volatility regime
-        if historical_volatility:
+        # Short-term vs long-term realized volatility
+        short_vol = volatility_profile.get('hv_20')
+        long_vol = volatility_profile.get('hv_252') or historical_volatility
+        if short_vol and long_vol:
+            analysis['volatility_ratio'] = round(short_vol / long_vol, 2)
+            if short_vol > long_vol * 1.2:
+                analysis['volatility_trend'] = 'rising'
+            elif short_vol < long_vol * 0.8:
+                analysis['volatility_trend'] = 'falling'
+        
+        # Volatility regime: IV percentile when there is IV history,
+        # otherwise the level of historical volatility
+        if iv_percentile is not None:
+            analysis['iv_percentile'] = iv_percentile
+            if iv_percentile >= 70:
+                analysis['volatility_regime'] = 'high'
+            elif iv_percentile <= 30:
+                analysis['volatility_regime'] = 'low'
+        elif historical_volatility:
             if historical_volatility > 50:
                 analysis['volatility_regime'] = 'high'
             elif historical_volatility < 20:
                 analysis['volatility_regime'] = 'low'
         
+        # Intraday trend: moving averages and MACD momentum agree
+        if technicals.get('trend'):
+            analysis['trend'] = technicals['trend']
+        for key in ('rsi', 'macd', 'ma_signal'):
+            if technicals.get(key) is not None:
+                analysis[key] = technicals[key]
+        
         # Sentiment
         if news_sentiment:
             avg_sentiment = news_sentiment.get('avg_sentiment', 0)
@@ -128,7 +170,7 @@ class StrategySelector:
         self,
         strategy_name: str,
         market_analysis: Dict[str, Any],
-        options_chain: Dict[str, Any],
+        options_chain: OptionsChain,
         stock_price: float
     ) -> float:
         """Score a strategy based on market conditions."""
@@ -152,6 +194,8 @@ class StrategySelector:
             # Debit spreads work well with directional conviction
             if sentiment in ['positive', 'negative']:
                 score += 2.0
+            if market_analysis['trend'] != 'neutral':
+                score += 1.0
             
             # Better in lower volatility (cheaper to buy)
             if volatility_regime == 'low':
@@ -180,7 +224,7 @@ class StrategySelector:
         strategy_name: str,
         symbol: str,
         stock_price: float,
-        options_chain: Dict[str, Any],
+        options_chain: OptionsChain,
         market_analysis: Dict[str, Any],
         confidence_score: float,
         user_config: UserConfig
@@ -251,14 +295,14 @@ class StrategySelector:
     
     def _find_suitable_expiration(
         self,
-        options_chain: Dict[str, Any],
+        options_chain: OptionsChain,
         min_dte: int,
         max_dte: int,
         allowed_expirations: List[str]
     ) -> Optional[date]:
         """Find suitable expiration date."""
         try:
-            expirations = options_chain.get('expirations', [])
+            expirations = options_chain.expirations
             
             if not expirations:
                 return None
@@ -287,18 +331,16 @@ class StrategySelector:
     
     def _is_expiration_allowed(self, dte: int, allowed_expirations: List[str]) -> bool:
         """Check if expiration type is allowed."""
-        if 'weekly' in allowed_expirations and dte <= 7:
-            return True
-        if 'monthly' in allowed_expirations and 20 <= dte <= 45:
-            return True
-        if 'quarterly' in allowed_expirations and 60 <= dte <= 120:
-            return True
+        for expiration_type in allowed_expirations:
+            window = StrategyConfig.EXPIRATION_WINDOWS.get(expiration_type)
+            if window and window[0] <= dte <= window[1]:
+                return True
         
         return False
     
     def _find_suitable_strike(
         self,
-        options_chain: Dict[str, Any],
+        options_chain: OptionsChain,
         expiration: date,
         stock_price: float,
         strategy_config: Dict[str, Any],
@@ -327,36 +369,52 @@ class StrategySelector:
             logger.error(f"Error finding strike: {e}")
             return None
     
+    def _target_strike(
+        self,
+        options_chain: OptionsChain,
+        expiration: date,
+        option_type: str,
+        strategy_config: Dict[str, Any],
+        stock_price: float,
+        fallback_pct: float
+    ) -> float:
+        """
+        Strike at the strategy's delta target on the fitted volatility smile.
+        
+        Falls back to a fixed fraction of spot when the underlying has no
+        fitted smile for the expiration yet.
+        """
+        strike = vol_surfaces.strike_for_delta(
+            options_chain.symbol,
+            expiration.isoformat(),
+            option_type,
+            strategy_config['delta_target'],
+            spot=stock_price
+        )
+        return strike if strike else stock_price * fallback_pct
+    
     def _find_credit_spread_strikes(
         self,
-        options_chain: Dict[str, Any],
+        options_chain: OptionsChain,
         expiration: date,
         stock_price: float,
         strategy_config: Dict[str, Any],
         market_analysis: Dict[str, Any]
     ) -> Optional[Dict[str, Any]]:
         """Find strikes for credit spread."""
-        # Simplified version - sell put spread below current price
-        exp_str = expiration.isoformat()
-        puts = options_chain.get('puts', {}).get(exp_str, {})
-        
-        if not puts:
-            return None
-        
-        # Target strike ~30 delta (roughly 70% OTM)
-        target_strike = stock_price * 0.95  # 5% OTM
+        # Sell put spread below current price, short strike at the target delta
+        target_strike = self._target_strike(
+            options_chain, expiration, 'put', strategy_config, stock_price, fallback_pct=0.95
+        )
         
         # Find closest strike
-        strikes = sorted([float(s) for s in puts.keys()])
-        closest_strike = min(strikes, key=lambda x: abs(x - target_strike))
+        option_data = options_chain.nearest(expiration.isoformat(), 'put', target_strike)
         
-        if closest_strike in puts:
-            option_data = puts[closest_strike]
-            
+        if option_data:
             return {
                 'signal_type': 'sell',
                 'option_symbol': option_data['symbol'],
-                'strike': closest_strike,
+                'strike': option_data['strike'],
                 'option_type': 'put',
                 'limit_price': None,  # Will be determined at execution
                 'fallback_strikes': []
@@ -366,7 +424,7 @@ class StrategySelector:
     
     def _find_debit_spread_strikes(
         self,
-        options_chain: Dict[str, Any],
+        options_chain: OptionsChain,
         expiration: date,
         stock_price: float,
         strategy_config: Dict[str, Any],
@@ -375,32 +433,27 @@ class StrategySelector:
         """Find strikes for debit spread."""
         sentiment = market_analysis.get('sentiment', 'neutral')
         
-        # Choose calls for bullish, puts for bearish
+        # Choose calls for bullish, puts for bearish; without a news view
+        # follow the intraday trend
+        if sentiment == 'neutral' and market_analysis.get('trend') == 'bullish':
+            sentiment = 'positive'
+        
         if sentiment == 'positive':
-            option_type = 'call'
-            options = options_chain.get('calls', {})
-            target_strike = stock_price * 1.03  # 3% OTM
+            option_type, fallback_pct = 'call', 1.03
         else:
-            option_type = 'put'
-            options = options_chain.get('puts', {})
-            target_strike = stock_price * 0.97  # 3% OTM
+            option_type, fallback_pct = 'put', 0.97
         
-        exp_str = expiration.isoformat()
-        exp_options = options.get(exp_str, {})
+        target_strike = self._target_strike(
+            options_chain, expiration, option_type, strategy_config, stock_price, fallback_pct
+        )
         
-        if not exp_options:
-            return None
-        
-        strikes = sorted([float(s) for s in exp_options.keys()])
-        closest_strike = min(strikes, key=lambda x: abs(x - target_strike))
+        option_data = options_chain.nearest(expiration.isoformat(), option_type, target_strike)
         
-        if closest_strike in exp_options:
-            option_data = exp_options[closest_strike]
-            
+        if option_data:
             return {
                 'signal_type': 'buy',
                 'option_symbol': option_data['symbol'],
-                'strike': closest_strike,
+                'strike': option_data['strike'],
                 'option_type': option_type,
                 'limit_price': None,
                 'fallback_strikes': []
@@ -410,31 +463,24 @@ class StrategySelector:
     
     def _find_covered_call_strike(
         self,
-        options_chain: Dict[str, Any],
+        options_chain: OptionsChain,
         expiration: date,
         stock_price: float,
         strategy_config: Dict[str, Any]
     ) -> Optional[Dict[str, Any]]:
         """Find strike for covered call."""
-        exp_str = expiration.isoformat()
-        calls = options_chain.get('calls', {}).get(exp_str, {})
-        
-        if not calls:
-            return None
-        
         # Target strike ~30 delta (slightly OTM)
-        target_strike = stock_price * 1.05  # 5% OTM
+        target_strike = self._target_strike(
+            options_chain, expiration, 'call', strategy_config, stock_price, fallback_pct=1.05
+        )
         
-        strikes = sorted([float(s) for s in calls.keys()])
-        closest_strike = min(strikes, key=lambda x: abs(x - target_strike))
+        option_data = options_chain.nearest(expiration.isoformat(), 'call', target_strike)
         
-        if closest_strike in calls:
-            option_data = calls[closest_strike]
-            
+        if option_data:
             return {
                 'signal_type': 'sell',
                 'option_symbol': option_data['symbol'],
-                'strike': closest_strike,
+                'strike': option_data['strike'],
                 'option_type': 'call',
                 'limit_price': None,
                 'fallback_strikes': []